@@ -0,0 +1,321 @@
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import signalsGeneratingShowing as signals
+from filters import KalmanFilter, kalman_filter_batch
+from fusion import fuse_estimates
+from parallelKalman import kalman_filter_parallel
+from metrics import calculate_std_errors, error_statistics
+from simulationArchive import save_simulation_data, load_simulation_archive
+
+BASELINE_FORMAT_VERSION = 1
+# Czasy zależą od maszyny, więc punkt odniesienia nie jest częścią repozytorium -
+# każda maszyna tworzy własny pierwszym przebiegiem z --save-baseline
+default_baseline_path = "benchmark_baseline.json"
+
+# Profile rozmiarów: długości torów (próbki) i liczby torów
+PROFILES = {
+    "quick": {"lengths": (1_000, 10_000), "tracks": (1, 100), "max_elements": 1_000_000},
+    "standard": {"lengths": (1_000, 100_000, 1_000_000), "tracks": (1, 100, 10_000), "max_elements": 10_000_000},
+    "full": {"lengths": (1_000, 10_000, 100_000, 1_000_000, 10_000_000), "tracks": (1, 10, 1_000, 100_000),
+             "max_elements": 20_000_000}
+}
+
+# Rejestr przypadków: nazwa -> (funkcja przygotowania, ograniczenia rozmiaru)
+BENCHMARKS = {}
+
+
+def register(name, max_tracks=None, max_length=None):
+    """
+    Dekorator rejestrujący przypadek pomiarowy.
+    Funkcja przygotowania otrzymuje (n_tracks, n_samples, rng) i zwraca funkcję mierzoną
+    bez argumentów (dane wejściowe przygotowane są poza pomiarem czasu).
+
+    Parametry:
+    name (str): Nazwa przypadku
+    max_tracks (int): Największa obsługiwana liczba torów (None - bez ograniczeń)
+    max_length (int): Największa obsługiwana długość toru (None - bez ograniczeń)
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = {"setup": setup, "max_tracks": max_tracks, "max_length": max_length}
+        return setup
+    return decorator
+
+
+def scenario_inputs(n_tracks, n_samples, rng):
+    """
+    Powtarzalne dane wejściowe: sygnał idealny i zaszumione pomiary (tory x próbki)
+    """
+    signals_dict = {"speed": 2, "start_height": 0, "time_step": 0.05, "flight_time": n_samples * 0.05}
+    _, signals_y = signals.generate_true_signal_array(signals_dict)
+    noised = signals.generate_noised_signals_array(signals_y, n_sensors=n_tracks, rng=rng)
+    return signals_y, noised
+
+
+@register("generation_vectorized")
+def _generation_vectorized(n_tracks, n_samples, rng):
+    _, signals_y = scenario_inputs(1, n_samples, rng)
+    return lambda: signals.generate_noised_signals_array(signals_y, n_sensors=n_tracks, rng=rng)
+
+
+@register("generation_list", max_tracks=1, max_length=100_000)
+def _generation_list(n_tracks, n_samples, rng):
+    signals_y = scenario_inputs(1, n_samples, rng)[0].tolist()
+    return lambda: signals.generate_noised_signals_on_sensor(signals_y)
+
+
+@register("filter_scalar", max_tracks=1, max_length=1_000_000)
+def _filter_scalar(n_tracks, n_samples, rng):
+    noised = scenario_inputs(1, n_samples, rng)[1][0].tolist()
+    return lambda: KalmanFilter(2, noised, backend="python").run()
+
+
+@register("filter_batch")
+def _filter_batch(n_tracks, n_samples, rng):
+    noised = scenario_inputs(n_tracks, n_samples, rng)[1]
+    return lambda: kalman_filter_batch(noised, 2)
+
+
+@register("filter_parallel_scan", max_tracks=1)
+def _filter_parallel_scan(n_tracks, n_samples, rng):
+    noised = scenario_inputs(1, n_samples, rng)[1][0]
+    return lambda: kalman_filter_parallel(noised, 2)
+
+
+@register("fusion")
+def _fusion(n_tracks, n_samples, rng):
+    noised = scenario_inputs(max(n_tracks, 2), n_samples, rng)[1]
+    variances = rng.uniform(0.5, 2.0, noised.shape)
+    return lambda: fuse_estimates(noised, variances)
+
+
+@register("metrics_std", max_tracks=1)
+def _metrics_std(n_tracks, n_samples, rng):
+    signals_y, noised = scenario_inputs(2, n_samples, rng)
+    return lambda: calculate_std_errors(signals_y, noised[0], noised[1])
+
+
+@register("metrics_full")
+def _metrics_full(n_tracks, n_samples, rng):
+    signals_y, noised = scenario_inputs(n_tracks, n_samples, rng)
+    variances = rng.uniform(0.5, 2.0, noised.shape)
+    return lambda: error_statistics(signals_y, noised, variances)
+
+
+def _simulation_data(n_samples, rng):
+    signals_y, noised = scenario_inputs(2, n_samples, rng)
+    return {
+        "signals_y": signals_y,
+        "signals_x": np.round(0.05 * np.arange(n_samples), 3),
+        "noised_signals_y_1": noised[0],
+        "noised_signals_y_2": noised[1],
+        "estimated_signals_y_1": noised[0],
+        "estimated_signals_y_2": noised[1],
+        "combined_estimated_y": noised.mean(axis=0),
+        "kalman_step": 1
+    }
+
+
+def _io_case(extension, load):
+    def setup(n_tracks, n_samples, rng):
+        data = _simulation_data(n_samples, rng)
+        folder = tempfile.mkdtemp()
+        atexit.register(shutil.rmtree, folder, ignore_errors=True)
+        path = os.path.join(folder, f"symulacja.{extension}")
+        save_simulation_data(path, data)
+        if not load:
+            return lambda: save_simulation_data(path, data)
+
+        def run():
+            if extension == "json":
+                with open(path, 'r', encoding='utf-8') as f:
+                    json.load(f)
+            else:
+                with load_simulation_archive(path) as archive:
+                    for name in archive.columns:
+                        archive[name]
+        return run
+    return setup
+
+
+register("io_json_save", max_tracks=1, max_length=1_000_000)(_io_case("json", load=False))
+register("io_json_load", max_tracks=1, max_length=1_000_000)(_io_case("json", load=True))
+register("io_npz_save", max_tracks=1)(_io_case("npz", load=False))
+register("io_npz_load", max_tracks=1)(_io_case("npz", load=True))
+
+
+def time_callable(function, repeat=5, min_time=0.2):
+    """
+    Pomiar czasu jak w timeit: liczba wywołań dobierana tak, by jedna seria trwała
+    co najmniej min_time, a wynik to czas jednego wywołania z kilku serii
+
+    Zwraca:
+    dict: median_sec, min_sec, number (wywołań na serię), repeat
+    """
+    start = time.perf_counter()
+    function()
+    single = time.perf_counter() - start
+    number = max(1, int(min_time / single)) if single < min_time else 1
+    repeat = repeat if single * number * repeat < 30 else max(1, int(30 / (single * number)))
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+    return {"median_sec": float(np.median(times)), "min_sec": float(np.min(times)),
+            "number": number, "repeat": repeat}
+
+
+def case_key(name, n_tracks, n_samples):
+    return f"{name}[tracks={n_tracks},samples={n_samples}]"
+
+
+def run_suite(profile="quick", names=None, seed=0, repeat=5, min_time=0.2, verbose=True):
+    """
+    Uruchamia przypadki z rejestru dla wszystkich rozmiarów profilu
+
+    Parametry:
+    profile (str): Nazwa profilu rozmiarów (PROFILES)
+    names (list): Wybrane przypadki (domyślnie wszystkie)
+    seed (int): Ziarno danych wejściowych (każdy przypadek i rozmiar startuje z tym samym ziarnem)
+    repeat (int): Liczba serii pomiarowych
+    min_time (float): Minimalny czas jednej serii [s]
+    verbose (bool): Czy wypisywać wyniki na bieżąco
+
+    Zwraca:
+    dict: {klucz przypadku: wynik time_callable oraz tracks, samples, samples_per_sec}
+    """
+    sizes = PROFILES[profile]
+    results = {}
+    for name in names or BENCHMARKS:
+        case = BENCHMARKS[name]
+        for n_tracks in sizes["tracks"]:
+            for n_samples in sizes["lengths"]:
+                if case["max_tracks"] is not None and n_tracks > case["max_tracks"]:
+                    continue
+                if case["max_length"] is not None and n_samples > case["max_length"]:
+                    continue
+                if n_tracks * n_samples > sizes["max_elements"]:
+                    continue
+
+                function = case["setup"](n_tracks, n_samples, np.random.default_rng(seed))
+                timing = time_callable(function, repeat=repeat, min_time=min_time)
+                timing.update(tracks=n_tracks, samples=n_samples,
+                              samples_per_sec=n_tracks * n_samples / timing["median_sec"])
+                key = case_key(name, n_tracks, n_samples)
+                results[key] = timing
+                if verbose:
+                    print(f"{key}: {timing['median_sec'] * 1e3:,.3f} ms, {timing['samples_per_sec']:,.0f} próbek/s")
+    return results
+
+
+def save_baseline(results, path=default_baseline_path, profile=None):
+    """
+    Zapisuje wyniki jako punkt odniesienia (z opisem maszyny)
+    """
+    baseline = {
+        "format_version": BASELINE_FORMAT_VERSION,
+        "profile": profile,
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "numpy": np.__version__, "cpu_count": os.cpu_count()},
+        "results": results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=4, ensure_ascii=False)
+
+
+def load_baseline(path=default_baseline_path):
+    with open(path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get("format_version") != BASELINE_FORMAT_VERSION:
+        raise ValueError(f"Nieobsługiwana wersja pliku odniesienia: {baseline.get('format_version')}")
+    return baseline
+
+
+def compare_results(results, baseline, threshold=0.2):
+    """
+    Raport regresji: stosunek mediany czasu do punktu odniesienia dla każdego przypadku
+
+    Parametry:
+    results (dict): Wyniki run_suite
+    baseline (dict): Punkt odniesienia (load_baseline)
+    threshold (float): Względna zmiana uznawana za regresję / poprawę (0.2 - 20%)
+
+    Zwraca:
+    list: Wiersze {"case", "baseline_sec", "current_sec", "ratio", "status"};
+          status: "REGRESJA", "POPRAWA", "OK" lub "NOWY"
+    """
+    reference = baseline["results"]
+    report = []
+    for key, timing in results.items():
+        row = {"case": key, "baseline_sec": None, "current_sec": timing["median_sec"], "ratio": None, "status": "NOWY"}
+        if key in reference:
+            row["baseline_sec"] = reference[key]["median_sec"]
+            row["ratio"] = timing["median_sec"] / row["baseline_sec"]
+            if row["ratio"] > 1 + threshold:
+                row["status"] = "REGRESJA"
+            elif row["ratio"] < 1 / (1 + threshold):
+                row["status"] = "POPRAWA"
+            else:
+                row["status"] = "OK"
+        report.append(row)
+    return report
+
+
+def print_report(report):
+    width = max(len(row["case"]) for row in report) if report else 10
+    print(f"{'Przypadek':<{width}}  {'Odniesienie [ms]':>16}  {'Teraz [ms]':>12}  {'Stosunek':>8}  Status")
+    for row in report:
+        baseline = f"{row['baseline_sec'] * 1e3:,.3f}" if row["baseline_sec"] is not None else "-"
+        ratio = f"{row['ratio']:.2f}" if row["ratio"] is not None else "-"
+        print(f"{row['case']:<{width}}  {baseline:>16}  {row['current_sec'] * 1e3:>12,.3f}  {ratio:>8}  {row['status']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Zestaw pomiarów wydajności z punktem odniesienia i raportem regresji",
+        epilog="Punkt odniesienia jest zależny od maszyny i nie jest dołączony do repozytorium: "
+               "najpierw utwórz go na tej maszynie (--save-baseline), potem porównuj kolejne przebiegi "
+               "z tym samym profilem.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick", help="Profil rozmiarów")
+    parser.add_argument("--bench", nargs="+", choices=sorted(BENCHMARKS), help="Wybrane przypadki")
+    parser.add_argument("--seed", type=int, default=0, help="Ziarno danych wejściowych")
+    parser.add_argument("--repeat", type=int, default=5, help="Liczba serii pomiarowych")
+    parser.add_argument("--baseline", default=default_baseline_path, help="Plik punktu odniesienia tej maszyny (tworzony przez --save-baseline)")
+    parser.add_argument("--save-baseline", action="store_true", help="Zapisz wyniki jako punkt odniesienia tej maszyny")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Próg regresji (względna zmiana czasu)")
+    parser.add_argument("--output", help="Plik JSON z wynikami i raportem")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.profile, args.bench, seed=args.seed, repeat=args.repeat)
+
+    report = None
+    if args.save_baseline:
+        save_baseline(results, args.baseline, profile=args.profile)
+        print(f"Zapisano punkt odniesienia: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        report = compare_results(results, load_baseline(args.baseline), args.threshold)
+        print_report(report)
+    else:
+        print(f"Brak punktu odniesienia {args.baseline} - punkt odniesienia jest zależny od maszyny, "
+              f"utwórz go najpierw poleceniem z --save-baseline")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"results": results, "report": report}, f, indent=4, ensure_ascii=False)
+
+    # Kod wyjścia 1 przy regresji - do użycia w nocnych przebiegach
+    return 1 if report and any(row["status"] == "REGRESJA" for row in report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from filters import KalmanFilter, CentralizedKalmanFilter, kalman_filter_batch
+from kalmanKernels import NUMBA_AVAILABLE
+from parallelKalman import kalman_filter_parallel
+from trackBank import TrackBank
+from fusion import fuse_estimates
+from metrics import calculate_std_errors, calculate_reduction_percentage
+import signalsGeneratingShowing as signals
+from simulationArchive import (convert_json_to_archive, load_simulation_archive,
+                               save_simulation_folder, open_simulation_mmap)
+
+
+def benchmark_track_bank(n_tracks=100_000, n_ticks=20, n_objects=10_000, seed=0):
+    """
+    Porównuje TrackBank z osobnymi obiektami KalmanFilter dla wielu torów
+
+    Parametry:
+    n_tracks (int): Liczba torów w TrackBank
+    n_ticks (int): Liczba taktów z pomiarami dla wszystkich torów
+    n_objects (int): Liczba obiektów KalmanFilter (pętla w Pythonie jest wolna)
+    seed (int): Ziarno generatora liczb losowych
+
+    Zwraca:
+    dict: Pamięć na tor [B] i liczba aktualizacji na sekundę dla obu podejść
+    """
+    rng = np.random.default_rng(seed)
+    speeds = rng.uniform(1, 15, n_tracks)
+    measurements = rng.uniform(0, 700, (n_ticks, n_tracks))
+
+    # TrackBank: pamięć i przepustowość
+    bank = TrackBank(capacity=n_tracks)
+    track_ids = np.array([bank.add_track(v) for v in speeds])
+    bank_bytes = bank.nbytes
+
+    start = time.perf_counter()
+    for z in measurements:
+        bank.step(track_ids, z)
+    bank_time = time.perf_counter() - start
+
+    # Osobne obiekty KalmanFilter: pamięć i przepustowość
+    n_objects = min(n_objects, n_tracks)
+    object_measurements = measurements[:, :n_objects].tolist()
+    tracemalloc.start()
+    filters = [KalmanFilter(v=v, noised_signals_height=[z])
+               for v, z in zip(speeds[:n_objects].tolist(), object_measurements[0])]
+    objects_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for tick in object_measurements:
+        for kf, z in zip(filters, tick):
+            x_pred, P_pred = kf.prediction()
+            kf.update(z=z, x_pred=x_pred, P_pred=P_pred)
+    objects_time = time.perf_counter() - start
+
+    return {
+        "track_bank_bytes_per_track": bank_bytes / n_tracks,
+        "track_bank_updates_per_sec": n_tracks * n_ticks / bank_time,
+        "objects_bytes_per_track": objects_bytes / n_objects,
+        "objects_updates_per_sec": n_objects * n_ticks / objects_time
+    }
+
+
+
+def benchmark_signal_generation(n_sensors=10, flight_time=3600, time_step=0.05, seed=0):
+    """
+    Mierzy czas generowania scenariusza: sygnał idealny i zaszumione pomiary wielu czujników
+
+    Parametry:
+    n_sensors (int): Liczba czujników
+    flight_time (float): Czas lotu [s]
+    time_step (float): Krok czasowy [s]
+    seed (int): Ziarno generatora liczb losowych
+
+    Zwraca:
+    dict: Czas [s] wersji wektorowej i pętli po próbkach (listy) oraz liczba próbek
+    """
+    signals_dict = {"speed": 2, "start_height": 0, "time_step": time_step, "flight_time": flight_time}
+
+    start = time.perf_counter()
+    _, signals_y = signals.generate_true_signal_array(signals_dict)
+    signals.generate_noised_signals_array(signals_y, n_sensors=n_sensors, rng=seed)
+    vectorized_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, signals_y = signals.generate_true_signal(signals_dict)
+    for _ in range(n_sensors):
+        signals.generate_noised_signals_on_sensor(signals_y)
+    list_time = time.perf_counter() - start
+
+    return {
+        "samples": n_sensors * len(signals_y),
+        "vectorized_sec": vectorized_time,
+        "list_api_sec": list_time
+    }
+
+
+
+def benchmark_fusion(n_sensors=10, n_samples=1_000_000, dropout_rate=0.1, seed=0):
+    """
+    Mierzy czas łączenia estymat wielu czujników z wariancją po każdej próbce
+
+    Parametry:
+    n_sensors (int): Liczba czujników
+    n_samples (int): Liczba próbek na czujnik
+    dropout_rate (float): Udział brakujących estymat (NaN)
+    seed (int): Ziarno generatora liczb losowych
+
+    Zwraca:
+    dict: Czas łączenia [s] i liczba próbek na sekundę
+    """
+    rng = np.random.default_rng(seed)
+    estimates = rng.normal(100, 5, (n_sensors, n_samples))
+    estimates[rng.random(estimates.shape) < dropout_rate] = np.nan
+    variances = rng.uniform(0.5, 2, (n_sensors, n_samples))
+
+    start = time.perf_counter()
+    fuse_estimates(estimates, variances)
+    fusion_time = time.perf_counter() - start
+
+    return {
+        "fusion_sec": fusion_time,
+        "sensor_samples_per_sec": n_sensors * n_samples / fusion_time
+    }
+
+
+def benchmark_centralized_filter(signals_dict=None, n_sensors=2, n_trials=10, seed=0):
+    """
+    Porównuje filtr scentralizowany z osobnymi filtrami czujników i łączeniem estymat:
+    dawny przebieg main.show_random (KalmanFilter.run na czujnik + łączenie ważone
+    końcowym P) oraz obecny (kalman_filter_batch + fuse_estimates z P po próbce)
+
+    Parametry:
+    signals_dict (dict): Parametry symulacji (domyślnie jak w main)
+    n_sensors (int): Liczba czujników
+    n_trials (int): Liczba realizacji
+    seed (int): Ziarno generatora liczb losowych
+
+    Zwraca:
+    dict: Średni czas [s] i średnia procentowa redukcja odchylenia dla każdego podejścia
+    """
+    if signals_dict is None:
+        signals_dict = {"speed": 2, "start_height": 0, "time_step": 0.05, "flight_time": 600}
+    rng = np.random.default_rng(seed)
+    _, signals_y = signals.generate_true_signal_array(signals_dict)
+    v = signals_dict["speed"]
+
+    def separate_filters(noised):
+        results = [KalmanFilter(v=v, noised_signals_height=sensor.tolist()).run() for sensor in noised]
+        weights = np.array([1 / P for _, P in results])[:, None]
+        return (weights * np.array([estimates for estimates, _ in results])).sum(axis=0) / weights.sum()
+
+    def batch_and_fusion(noised):
+        estimates, _, P_trajectory = kalman_filter_batch(noised, v, return_P_trajectory=True)
+        return fuse_estimates(estimates, P_trajectory)[0]
+
+    def centralized(noised):
+        return CentralizedKalmanFilter(v=v, noised_signals_height=noised).run()[0]
+
+    approaches = {"separate_filters": separate_filters, "batch_and_fusion": batch_and_fusion,
+                  "centralized": centralized}
+    times = {name: 0.0 for name in approaches}
+    reductions = {name: 0.0 for name in approaches}
+    for _ in range(n_trials):
+        noised = signals.generate_noised_signals_array(signals_y, n_sensors=n_sensors, rng=rng)
+        for name, approach in approaches.items():
+            start = time.perf_counter()
+            combined = approach(noised)
+            times[name] += time.perf_counter() - start
+            std_noisy, std_filtered = calculate_std_errors(signals_y, noised[0], combined)
+            reductions[name] += calculate_reduction_percentage(std_noisy, std_filtered)
+
+    results = {}
+    for name in approaches:
+        results[f"{name}_sec"] = times[name] / n_trials
+        results[f"{name}_reduction_percentage"] = reductions[name] / n_trials
+    return results
+
+
+def benchmark_archive_formats(json_path="dataFolder/Symulacja_5/symulacja.json"):
+    """
+    Porównuje rozmiar i czas wczytania pliku JSON z archiwami binarnymi
+
+    Parametry:
+    json_path (str): Ścieżka zapisanego pliku symulacja.json
+
+    Zwraca:
+    dict: Rozmiar [B] i czas pełnego wczytania [s] dla każdego formatu
+    """
+    results = {}
+
+    start = time.perf_counter()
+    with open(json_path, 'r', encoding='utf-8') as f:
+        json.load(f)
+    results["json_bytes"] = os.path.getsize(json_path)
+    results["json_load_sec"] = time.perf_counter() - start
+
+    variants = {
+        "npz_float64": (np.float64, False),
+        "npz_float64_compressed": (np.float64, True),
+        "npz_float32_compressed": (np.float32, True)
+    }
+    with tempfile.TemporaryDirectory() as folder:
+        for name, (dtype, compress) in variants.items():
+            archive_path = os.path.join(folder, f"{name}.npz")
+            convert_json_to_archive(json_path, archive_path, dtype=dtype, compress=compress)
+
+            start = time.perf_counter()
+            with load_simulation_archive(archive_path) as archive:
+                for column in archive.columns:
+                    archive[column]
+            results[f"{name}_bytes"] = os.path.getsize(archive_path)
+            results[f"{name}_load_sec"] = time.perf_counter() - start
+
+    return results
+
+
+
+def benchmark_mmap_plot(n_samples=10_000_000, max_points=20000, seed=0):
+    """
+    Mierzy czas i szczytowe zużycie pamięci wykresu długiego lotu otwartego
+    jako tablice mapowane w pamięci (decymacja min/max, renderowanie Agg)
+
+    Parametry:
+    n_samples (int): Liczba próbek lotu
+    max_points (int): Maksymalna liczba punktów wykresu
+    seed (int): Ziarno generatora liczb losowych
+
+    Zwraca:
+    dict: Czas otwarcia, decymacji i renderowania [s] oraz szczytowa pamięć [B]
+    """
+    import io
+    # Lokalna figura z płótnem Agg - bez zmiany backendu pyplot całego procesu
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    rng = np.random.default_rng(seed)
+    signals_x = np.arange(n_samples) * 0.05
+    signals_y = 2 * signals_x
+    noised = signals_y + rng.normal(0, 5, n_samples)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        save_simulation_folder(folder, {"signals_x": signals_x, "signals_y": signals_y,
+                                        "noised_signals_y_1": noised})
+        del signals_x, signals_y, noised
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        archive = open_simulation_mmap(folder)
+        window = archive.window(columns=["signals_x", "noised_signals_y_1"])
+        results["open_sec"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        x, y = signals.minmax_decimate(window["signals_x"], window["noised_signals_y_1"], max_points)
+        results["decimate_sec"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        figure = Figure()
+        FigureCanvasAgg(figure)
+        figure.add_subplot().plot(x, y)
+        figure.savefig(io.BytesIO(), format="png")
+        results["render_sec"] = time.perf_counter() - start
+
+        results["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        archive.close()
+        del window, x, y
+
+    return results
+
+
+def benchmark_kernel_backends(n_samples=1_000_000, seed=0):
+    """
+    Przepustowość KalmanFilter.run dla każdego dostępnego backendu pętli filtracji.
+    Czas kompilacji Numby mierzony jest osobno (pierwsze wywołanie).
+
+    Parametry:
+    n_samples (int): Liczba próbek pojedynczego toru
+    seed (int): Ziarno generatora liczb losowych
+
+    Zwraca:
+    dict: Liczba próbek na sekundę dla każdego backendu i zgodność wyników
+    """
+    rng = np.random.default_rng(seed)
+    # Prędkość dobrana tak, by cały lot pozostał poniżej 762 m (bez przerwania filtracji)
+    flight_time = n_samples * 0.05
+    speed = 700 / flight_time
+    signals_dict = {"speed": speed, "start_height": 0, "time_step": 0.05, "flight_time": flight_time}
+    _, signals_y = signals.generate_true_signal_array(signals_dict)
+    noised = signals.generate_noised_signals_array(signals_y, n_sensors=1, rng=rng)[0].tolist()
+
+    results = {}
+    start = time.perf_counter()
+    reference, _ = KalmanFilter(speed, noised, backend="python").run()
+    results["python_samples_per_sec"] = len(noised) / (time.perf_counter() - start)
+
+    if NUMBA_AVAILABLE:
+        start = time.perf_counter()
+        KalmanFilter(speed, noised[:10], backend="numba").run()
+        results["numba_compile_sec"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        estimates, _ = KalmanFilter(speed, noised, backend="numba").run()
+        results["numba_samples_per_sec"] = len(noised) / (time.perf_counter() - start)
+        results["numba_identical"] = float(estimates == reference)
+
+    return results
+
+
+def benchmark_parallel_scan(n_samples=4_000_000, max_workers=None, seed=0):
+    """
+    Przyspieszenie filtracji jednego długiego toru skanem prefiksowym
+    względem sekwencyjnej pętli KalmanFilter.run, dla rosnącej liczby wątków
+
+    Parametry:
+    n_samples (int): Liczba próbek toru
+    max_workers (int): Największa liczba wątków (domyślnie liczba rdzeni)
+    seed (int): Ziarno generatora liczb losowych
+
+    Zwraca:
+    dict: Czas pętli sekwencyjnej, przyspieszenie dla 1, 2, 4, ... wątków
+          oraz największa różnica względem pętli sekwencyjnej
+    """
+    rng = np.random.default_rng(seed)
+    # Lot przechodzi przez oba reżimy szumu procesu i przerwanie filtracji powyżej 762 m
+    flight_time = n_samples * 0.05
+    speed = 800 / flight_time
+    signals_dict = {"speed": speed, "start_height": 0, "time_step": 0.05, "flight_time": flight_time}
+    _, signals_y = signals.generate_true_signal_array(signals_dict)
+    noised = signals.generate_noised_signals_array(signals_y, n_sensors=1, rng=rng)[0]
+
+    start = time.perf_counter()
+    reference, _ = KalmanFilter(speed, noised.tolist(), backend="python").run()
+    results = {"sequential_sec": time.perf_counter() - start}
+
+    max_workers = max_workers or os.cpu_count() or 1
+    workers = 1
+    while workers <= max_workers:
+        start = time.perf_counter()
+        estimates, _ = kalman_filter_parallel(noised, speed, workers=workers)
+        elapsed = time.perf_counter() - start
+        results[f"scan_{workers}_workers_sec"] = elapsed
+        results[f"scan_{workers}_workers_speedup"] = results["sequential_sec"] / elapsed
+        workers *= 2
+
+    results["max_deviation"] = float(np.max(np.abs(estimates - np.asarray(reference))))
+    return results
+
+
+if __name__ == "__main__":
+    for benchmark in (benchmark_track_bank, benchmark_signal_generation, benchmark_fusion,
+                      benchmark_centralized_filter, benchmark_archive_formats,
+                      benchmark_mmap_plot, benchmark_kernel_backends, benchmark_parallel_scan):
+        print(f"[{benchmark.__name__}]")
+        for key, value in benchmark().items():
+            print(f"{key}: {value:,.4f}")
@@ -0,0 +1,253 @@
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import instrumentation
+import simulationBuilder as sim
+from simulationArchive import save_simulation_data, write_simulation_details
+from sweepRunner import default_sweep_point, expand_grid
+
+# Parametry symulacji zapisywane w szczegóły_symulacji.txt (jak main.simulation_signal_dict)
+SIGNAL_PARAMETERS = ("speed", "start_height", "time_step", "flight_time")
+
+
+def load_scenarios(config: dict):
+    """
+    Lista scenariuszy z konfiguracji
+
+    Parametry:
+    config (dict): Konfiguracja z kluczem "scenarios" (lista słowników parametrów)
+                   lub "grid" (słownik {parametr: lista wartości}, patrz sweepRunner.expand_grid);
+                   opcjonalnie "trials" - liczba realizacji każdego scenariusza
+
+    Zwraca:
+    list: Słowniki parametrów scenariuszy
+
+    Wyjątki:
+    ValueError: Brak obu kluczy lub nieznany parametr scenariusza (spoza default_sweep_point)
+    """
+    if "scenarios" in config:
+        for scenario in config["scenarios"]:
+            unknown = set(scenario) - set(default_sweep_point)
+            if unknown:
+                raise ValueError(f"Nieznane parametry scenariusza: {sorted(unknown)}")
+        base = expand_grid({})[0]
+        scenarios = [dict(base, **scenario) for scenario in config["scenarios"]]
+    elif "grid" in config:
+        scenarios = expand_grid(config["grid"])
+    else:
+        raise ValueError("Konfiguracja musi zawierać klucz 'scenarios' lub 'grid'")
+    return [scenario for scenario in scenarios for _ in range(config.get("trials", 1))]
+
+
+def apply_cli_grid(config: dict, grid: dict):
+    """
+    Uzupełnia (i nadpisuje) konfigurację parametrami z wiersza poleceń
+
+    Parametry:
+    config (dict): Konfiguracja jak w load_scenarios (modyfikowana w miejscu)
+    grid (dict): {parametr: lista wartości} z wiersza poleceń; przy liście "scenarios"
+                 każdy scenariusz jest powielany dla każdej kombinacji tych wartości,
+                 a przy siatce "grid" wartości zastępują listy siatki
+
+    Zwraca:
+    dict: Konfiguracja
+    """
+    if "scenarios" in config:
+        combinations = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+        config["scenarios"] = [dict(scenario, **combination)
+                               for scenario in config["scenarios"] for combination in combinations]
+    else:
+        config["grid"] = dict(config.get("grid", {}), **grid)
+    return config
+
+
+def next_simulation_number(output_folder):
+    """
+    Numer kolejnej symulacji w folderze wyników (foldery Symulacja_<n>...)
+    """
+    numbers = [int(match.group(1)) for name in os.listdir(output_folder)
+               if (match := re.match(r"Symulacja_(\d+)", name))]
+    return max(numbers, default=0) + 1
+
+
+def run_scenario(scenario: dict, folder: str, seed, n_sensors=2, file_format="json", instrument=None):
+    """
+    Generowanie, filtracja, łączenie, ocena i zapis jednej symulacji (w procesie roboczym)
+
+    Parametry:
+    scenario (dict): Parametry scenariusza (jak sweepRunner.default_sweep_point)
+    folder (str): Folder symulacji (zostanie utworzony)
+    seed (int lub tuple): Ziarno generatora liczb losowych
+    n_sensors (int): Liczba czujników
+    file_format (str): "json" lub "npz"
+    instrument (str): None, "time" lub "memory" - pomiary etapów (patrz instrumentation)
+
+    Zwraca:
+    dict: Folder, liczba próbek, czasy etapów [s], redukcja odchylenia standardowego
+          oraz raport etapów ("stages", gdy instrument)
+    """
+    if instrument:
+        # Proces roboczy mógł wykonać już inne scenariusze - raport dotyczy tylko tego
+        instrumentation.enable(memory=instrument == "memory")
+        instrumentation.reset()
+    start = time.perf_counter()
+    signals_dict = {key: scenario[key] for key in SIGNAL_PARAMETERS}
+    result = sim.run_simulation(
+        signals_dict, n_sensors=n_sensors, Q1=scenario["Q1"], Q2=scenario["Q2"],
+        sensor_damaged=scenario["damage_rate"] > 0, damage_rate=scenario["damage_rate"], seed=seed,
+        robust=bool(scenario["robust"]))
+    simulation_time = time.perf_counter() - start
+
+    data = {"signals_y": result.signals_y, "signals_x": result.signals_x}
+    for sensor in range(n_sensors):
+        data[f"noised_signals_y_{sensor + 1}"] = result.noised_signals_y[sensor]
+    for sensor in range(n_sensors):
+        data[f"estimated_signals_y_{sensor + 1}"] = result.estimated_signals_y[sensor]
+    data["combined_estimated_y"] = result.combined_estimated_y
+    data["kalman_step"] = result.kalman_step
+
+    os.makedirs(folder, exist_ok=True)
+    save_simulation_data(os.path.join(folder, f"symulacja.{file_format}"), data, simulation_signal_dict=signals_dict)
+    write_simulation_details(os.path.join(folder, "szczegóły_symulacji.txt"), signals_dict, result.metrics)
+
+    return {
+        "folder": folder,
+        "samples": int(result.noised_signals_y.size),
+        "simulation_sec": simulation_time,
+        "save_sec": time.perf_counter() - start - simulation_time,
+        "reduction_percentage": float(result.metrics["reduction_percentage"]),
+        "stages": instrumentation.report() if instrument else None
+    }
+
+
+def run_batch(scenarios, output_folder="dataFolder", workers=None, seed=0, n_sensors=2, file_format="json",
+              instrument=None):
+    """
+    Równoległe uruchomienie i zapis wielu symulacji.
+    Wyniki trafiają do folderów Symulacja_<n>[_damaged_<p>%] jak w dataFolder.
+
+    Parametry:
+    scenarios (list): Słowniki parametrów scenariuszy
+    output_folder (str): Folder wyników
+    workers (int): Liczba procesów (domyślnie liczba rdzeni)
+    seed (int): Główne ziarno; scenariusz i ma ziarno (seed, i)
+    n_sensors (int): Liczba czujników
+    file_format (str): "json" lub "npz"
+    instrument (str): None, "time" lub "memory" - pomiary etapów w procesach roboczych
+
+    Zwraca:
+    dict: Podsumowanie - liczba symulacji i próbek, czas, przepustowość, wyniki scenariuszy
+          oraz połączony raport etapów ("stages", gdy instrument)
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    first = next_simulation_number(output_folder)
+    folders = []
+    for i, scenario in enumerate(scenarios):
+        name = f"Symulacja_{first + i}"
+        if scenario["damage_rate"] > 0:
+            name += f"_damaged_{scenario['damage_rate'] * 100:g}%"
+        folders.append(os.path.join(output_folder, name))
+
+    start = time.perf_counter()
+    results = [None] * len(scenarios)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(run_scenario, scenario, folder, (seed, i), n_sensors, file_format, instrument): i
+            for i, (scenario, folder) in enumerate(zip(scenarios, folders))
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            print(f"[{sum(r is not None for r in results)}/{len(scenarios)}] {results[i]['folder']}: "
+                  f"redukcja {results[i]['reduction_percentage']:.2f}%, "
+                  f"{results[i]['simulation_sec'] + results[i]['save_sec']:.2f} s")
+    elapsed = time.perf_counter() - start
+
+    samples = sum(result["samples"] for result in results)
+    return {
+        "simulations": len(results),
+        "samples": samples,
+        "wall_sec": elapsed,
+        "simulations_per_sec": len(results) / elapsed,
+        "samples_per_sec": samples / elapsed,
+        "simulation_sec_total": sum(result["simulation_sec"] for result in results),
+        "save_sec_total": sum(result["save_sec"] for result in results),
+        "reduction_percentage_mean": float(np.mean([result["reduction_percentage"] for result in results])),
+        "stages": instrumentation.merge_reports(result["stages"] for result in results) if instrument else None,
+        "results": results
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Wsadowe uruchamianie symulacji filtru Kalmana bez interfejsu graficznego")
+    parser.add_argument("--config", help="Plik JSON z kluczem 'scenarios' lub 'grid' (opcjonalnie 'trials')")
+    parser.add_argument("--speed", type=float, nargs="+", help="Prędkości [m/s]")
+    parser.add_argument("--start-height", type=float, nargs="+", help="Wysokości początkowe [m]")
+    parser.add_argument("--time-step", type=float, nargs="+", help="Kroki czasowe [s]")
+    parser.add_argument("--flight-time", type=float, nargs="+", help="Czasy lotu [s]")
+    parser.add_argument("--Q1", type=float, nargs="+", help="Szum procesu dla wysokości <= 152.4m")
+    parser.add_argument("--Q2", type=float, nargs="+", help="Szum procesu dla wysokości > 152.4m")
+    parser.add_argument("--damage-rate", type=float, nargs="+", help="Stopnie uszkodzenia czujników (0-1)")
+    parser.add_argument("--robust", action="store_true",
+                        help="Tryb odporny filtru (bramkowanie innowacji, wagi Huberowskie, adaptacja szumu)")
+    parser.add_argument("--trials", type=int, default=None, help="Liczba realizacji każdego scenariusza")
+    parser.add_argument("--sensors", type=int, default=2, help="Liczba czujników")
+    parser.add_argument("--seed", type=int, default=0, help="Główne ziarno generatora liczb losowych")
+    parser.add_argument("--workers", type=int, default=None, help="Liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--output", default="dataFolder", help="Folder wyników")
+    parser.add_argument("--format", choices=("json", "npz"), default="json", help="Format pliku symulacji")
+    parser.add_argument("--summary", help="Plik JSON z podsumowaniem przebiegu")
+    parser.add_argument("--instrument", nargs="?", const="time", choices=("time", "memory"),
+                        help="Pomiar etapów (czas i próbki; 'memory' - także szczytowa pamięć)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    config = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+    # Parametry z wiersza poleceń uzupełniają (i nadpisują) scenariusze lub siatkę z pliku konfiguracji
+    grid = {key: values for key, values in {
+        "speed": args.speed, "start_height": args.start_height, "time_step": args.time_step,
+        "flight_time": args.flight_time, "Q1": args.Q1, "Q2": args.Q2, "damage_rate": args.damage_rate,
+        "robust": [True] if args.robust else None
+    }.items() if values is not None}
+    if grid:
+        apply_cli_grid(config, grid)
+    elif not config:
+        config["grid"] = {}
+    if args.trials is not None:
+        config["trials"] = args.trials
+
+    scenarios = load_scenarios(config)
+    print(f"Symulacje: {len(scenarios)}, procesy: {args.workers or os.cpu_count()}, folder: {args.output}")
+    summary = run_batch(scenarios, args.output, workers=args.workers, seed=args.seed,
+                        n_sensors=args.sensors, file_format=args.format, instrument=args.instrument)
+
+    print(f"Czas całkowity: {summary['wall_sec']:.2f} s "
+          f"(symulacje {summary['simulation_sec_total']:.2f} s, zapis {summary['save_sec_total']:.2f} s w sumie)")
+    print(f"Przepustowość: {summary['simulations_per_sec']:.2f} symulacji/s, "
+          f"{summary['samples_per_sec']:,.0f} próbek/s")
+    print(f"Średnia redukcja odchylenia standardowego: {summary['reduction_percentage_mean']:.2f}%")
+    if args.instrument:
+        print(instrumentation.format_report(summary["stages"]))
+
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=4, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,105 @@
 import numpy as np
-import random
-import matplotlib.pyplot as plt
+from instrumentation import stage
+
+
+# Progi prędkości (m/s) przedziałów szumu pomiarowego i szum R w kolejnych przedziałach
+SPEED_BUCKET_LIMITS = (3, 7, 12)
+SPEED_BUCKET_R = (0.1, 0.3, 0.6, 1.0)  # Niski, umiarkowany, zwiększony i wysoki szum pomiarowy
+
+
+def speed_bucket(v):
+    """
+    Numer przedziału prędkości (0 - v <= 3, 1 - v <= 7, 2 - v <= 12, 3 - szybciej)
+    :param v: Prędkość (m/s) - liczba lub tablica prędkości
+    :return: Numer przedziału jako int (dla liczby) lub tablica NumPy (dla tablicy)
+    """
+    bucket = np.searchsorted(SPEED_BUCKET_LIMITS, np.asarray(v, dtype=float), side="left")
+    return int(bucket) if bucket.ndim == 0 else bucket
+
+
+def measurement_noise_for_speed(v):
+    """
+    Dobieranie szumu pomiarowego R w zależności od prędkości
+    :param v: Prędkość (m/s) - liczba lub tablica prędkości
+    :return: R jako float (dla liczby) lub tablica NumPy (dla tablicy)
+    """
+    R = np.asarray(SPEED_BUCKET_R)[speed_bucket(v)]
+    return float(R) if R.ndim == 0 else R
+
+
+# Tryb odporny: bramka Mahalanobisa, próg Huberowski (w odchyleniach innowacji),
+# tempo adaptacji skali szumu pomiaru i jej granice
+ROBUST_GATE = 3.0
+ROBUST_HUBER_K = 2.0
+ROBUST_ADAPTATION_RATE = 0.01
+ROBUST_SCALE_LIMITS = (0.1, 1000.0)
+
+
+def robust_innovation_weight(y, S, gate=ROBUST_GATE, huber_k=ROBUST_HUBER_K):
+    """
+    Waga pomiaru z odległości Mahalanobisa innowacji d = |y| / sqrt(S), bez warunków
+    (działa tak samo dla liczb i tablic torów):
+    d <= huber_k - waga 1, huber_k < d <= gate - waga Huberowska huber_k / d,
+    d > gate lub brak pomiaru (NaN) - waga 0 (pomiar odrzucony)
+    :param y: Innowacja z - x_pred
+    :param S: Wariancja innowacji
+    :param gate: Bramka odrzucania pomiarów
+    :param huber_k: Próg wag Huberowskich
+    :return: (w, nis) - waga pomiaru i znormalizowany kwadrat innowacji y^2 / S (NaN dla braku pomiaru)
+    """
+    nis = y * y / S
+    d = np.sqrt(nis)
+    w = np.where(d <= gate, huber_k / np.maximum(d, huber_k), 0.0)
+    return w, nis
+
+
+def robust_kalman_step(x, P, scale, z, Bv, R, Q1, Q2, gate=ROBUST_GATE, huber_k=ROBUST_HUBER_K,
+                       adaptation_rate=ROBUST_ADAPTATION_RATE, scale_limits=ROBUST_SCALE_LIMITS):
+    """
+    Krok filtru w trybie odpornym dla kalman_filter_batch (KalmanFilter wykonuje te same
+    działania na liczbach w kalmanKernels.robust_kalman_kernel).
+    Waga Huberowska działa jak zwiększenie szumu pomiaru do (R + Q) * scale / w,
+    a skala szumu adaptuje się tak, by średnie y^2 / S dążyło do 1 (przy odrzuceniu
+    pomiaru skala rośnie o udział ograniczony bramką - filtr nie blokuje się na trwałej zmianie szumu).
+    Brak pomiaru (NaN) - sama predykcja, jak w filtrze podstawowym.
+    :param x, P: Stan i niepewność (liczby lub tablice torów)
+    :param scale: Adaptacyjna skala szumu pomiaru R + Q
+    :param z: Pomiar
+    :param Bv, R: Wpływ prędkości i szum pomiarowy
+    :param Q1, Q2: Szum procesu dla wysokości <= 152.4m i > 152.4m
+    :return: (x, P, scale, estymata) - nowy stan, niepewność, skala i wartość wyjściowa
+    """
+    x_pred = x + Bv
+    P_pred = P + R
+    noise = scale * (R + np.where(z <= 152.4, Q1, Q2))
+    y = z - x_pred
+    w, nis = robust_innovation_weight(y, P_pred + noise, gate, huber_k)
+    K = w * P_pred / (w * P_pred + noise)
+    x_new = x_pred + K * np.where(w > 0, y, 0.0)
+    P_new = (1 - K) * P_pred
+
+    observed = ~np.isnan(nis)
+    scale_new = np.clip(scale * (1 + adaptation_rate * (np.minimum(nis, gate * gate) - 1)), *scale_limits)
+    # Powyżej 762 m pomiar przechodzi bez zmian tylko po przejściu bramki; stan jest nadal
+    # aktualizowany, żeby bramka miała bieżącą predykcję (impuls nie zamraża filtru)
+    passthrough = (z > 762) & (w > 0)
+    return x_new, P_new, np.where(observed, scale_new, scale), np.where(passthrough, z, x_new)
+
 
 class KalmanFilter:
-    def __init__(self, v: float, noised_signals_height, Q1=4.572, Q2=38.1):
+    def __init__(self, v: float, noised_signals_height, Q1=4.572, Q2=38.1, steady_state=False, backend="auto",
+                 R=None, robust=False):
         """
         Inicjalizacja filtru Kalmana
         :param v: Stała prędkość (m/s)
         :param noised_signals_height: Zaszumione pomiary wysokości
         :param Q1: Szum procesu dla wysokości <= 152.4m
         :param Q2: Szum procesu dla wysokości > 152.4m
+        :param steady_state: Czy run() ma używać szybkiej ścieżki ze stałym wzmocnieniem
+        :param backend: Implementacja pętli run(): "auto" (Numba, jeśli zainstalowana), "python" lub "numba"
+        :param R: Szum pomiarowy (domyślnie z progów prędkości)
+        :param robust: Tryb odporny (run_robust): bramkowanie innowacji, wagi Huberowskie
+                       i adaptacyjna skala szumu; ma pierwszeństwo przed steady_state
         """
         self.v = v  # Stała prędkość obiektu
         self.noised_signals_height = noised_signals_height  # Zaszumione sygnały wejściowe
@@ -21,17 +111,30 @@ class KalmanFilter:
         self.Q2 = Q2  # Szum procesu dla wysokich wysokości
         
         # Dobieranie szumu pomiarowego w zależności od prędkości
-        if v <= 3:
-            self.R = 0.1  # Niski szum pomiarowy
-        elif v <= 7:
-            self.R = 0.3  # Umiarkowany szum pomiarowy
-        elif v <= 12:
-            self.R = 0.6  # Zwiększony szum pomiarowy
-        else: self.R = 1  # Wysoki szum pomiarowy
+        self.R = measurement_noise_for_speed(v) if R is None else R
             
-        self.x = noised_signals_height[0]  # Początkowa wysokość
+        # Początkowa wysokość (pierwszy dostępny pomiar - uszkodzony czujnik może zwracać NaN)
+        self.x = next((z for z in noised_signals_height if z == z), noised_signals_height[0])
         self.P = 1  # Początkowa niepewność estymacji
 
+        self.steady_state = steady_state  # Tryb stałego wzmocnienia po zbieżności
+        self.steady_state_report = None  # Raport z ostatniego przebiegu w trybie ustalonym
+        self.backend = backend  # Implementacja pętli filtracji
+        self.robust = robust  # Tryb odporny na impulsy i zmiany szumu
+        self.noise_scale = 1.0  # Adaptacyjna skala szumu pomiaru (tryb odporny)
+
+    @classmethod
+    def from_tuning_table(cls, v: float, noised_signals_height, table, **kwargs):
+        """
+        Filtr z parametrami szumu z tabeli strojenia (tuning.tune_speed_buckets)
+        :param v: Stała prędkość (m/s)
+        :param noised_signals_height: Zaszumione pomiary wysokości
+        :param table: Tabela strojenia lub ścieżka pliku JSON z tabelą
+        :param kwargs: Pozostałe argumenty konstruktora (steady_state, backend)
+        """
+        from tuning import noise_parameters_for_speed
+        return cls(v, noised_signals_height, **noise_parameters_for_speed(table, v), **kwargs)
+
     def prediction(self):
         """
         Faza predykcji filtru Kalmana
@@ -58,6 +161,11 @@ class KalmanFilter:
         if z > 762:
             return z
 
+        # Brak pomiaru (NaN) - pomijamy aktualizację i przyjmujemy predykcję
+        if z != z:
+            self.x, self.P = x_pred, P_pred
+            return self.x
+
         # Obliczanie innowacji (różnica między pomiarem a predykcją)
         y = z - self.H * x_pred
 
@@ -78,23 +186,480 @@ class KalmanFilter:
         
         return self.x
 
-    def run(self):
+    def steady_state_gain(self, szum_procesu):
+        """
+        Punkt stały niepewności i wzmocnienia dla danego szumu procesu
+        :param szum_procesu: Q1 lub Q2
+        Zwraca:
+            P_ss: Ustalona niepewność po aktualizacji
+            K_ss: Ustalone wzmocnienie Kalmana
+        """
+        # P = (P + R)(R + Q) / (P + 2R + Q)  =>  P^2 + R*P - R*(R + Q) = 0
+        c = self.R + szum_procesu
+        P_ss = (-self.R + np.sqrt(self.R ** 2 + 4 * self.R * c)) / 2
+        K_ss = (P_ss + self.R) / (P_ss + 2 * self.R + szum_procesu)
+        return P_ss, K_ss
+
+    def run_steady_state(self, tol=1e-9, min_segment=32, validate=False, return_P_trajectory=False):
+        """
+        Filtracja ze stałym wzmocnieniem po osiągnięciu zbieżności P.
+        Na każdym ciągłym odcinku jednego reżimu szumu wzmocnienia liczone są
+        dokładnie, dopóki P nie zbiegnie do punktu stałego tego reżimu, a resztę
+        odcinka filtruje rekursja IIR ze stałym wzmocnieniem (lfilter).
+        :param tol: Względna tolerancja zbieżności P do punktu stałego
+        :param min_segment: Minimalna długość odcinka filtrowanego stałym wzmocnieniem
+        :param validate: Czy porównać wynik z dokładnym filtrem (max_deviation)
+        :param return_P_trajectory: Czy zwrócić także niepewność po każdej próbce
+        Zwraca:
+            x_estimates: Lista wyestymowanych wartości
+            P: Końcowa wartość niepewności
+            P_trajectory: Tablica niepewności po każdej próbce (tylko gdy return_P_trajectory)
+        """
+        from scipy.signal import lfilter
+
+        z = np.asarray(self.noised_signals_height, dtype=float)
+        n = len(z)
+        Bv = self.B * self.v
+
+        # Reżim każdej próbki: 0 - przerwanie filtracji, 1 - Q1, 2 - Q2, 3 - brak pomiaru
+        regime = np.where(np.isnan(z), 3, np.where(z > 762, 0, np.where(z <= 152.4, 1, 2)))
+        P_ss1, K_ss1 = map(float, self.steady_state_gain(self.Q1))
+        P_ss2, K_ss2 = map(float, self.steady_state_gain(self.Q2))
+        szum_procesu = (None, self.Q1, self.Q2)
+        P_ss = (None, P_ss1, P_ss2)
+        K_ss = (None, K_ss1, K_ss2)
+
+        z_list = z.tolist()  # Szybszy dostęp do pojedynczych próbek w pętli dokładnej
+        x_estimates = np.empty(n)
+        P_trajectory = np.empty(n)
+        x, P = self.x, self.P
+        x_initial, P_initial = x, P
+        convergence_step = None
+        fixed_gain_samples = 0
+
+        boundaries = np.flatnonzero(np.diff(regime)) + 1
+        for start, stop in zip(np.r_[0, boundaries], np.r_[boundaries, n]):
+            r = int(regime[start])
+            if r == 0:
+                # Przerwanie filtracji powyżej 762 metrów - stan pozostaje bez zmian
+                x_estimates[start:stop] = z[start:stop]
+                P_trajectory[start:stop] = P
+                continue
+            if r == 3:
+                # Brak pomiarów - same predykcje
+                steps = np.arange(1, stop - start + 1)
+                x_estimates[start:stop] = x + Bv * steps
+                P_trajectory[start:stop] = P + self.R * steps
+                x, P = float(x_estimates[stop - 1]), float(P_trajectory[stop - 1])
+                continue
+
+            # Dokładna rekursja, dopóki P nie osiągnie punktu stałego reżimu
+            # (krótkie odcinki, np. przy oscylacjach wokół 152.4 m, liczone są w całości dokładnie)
+            k = start
+            while k < stop and (stop - k < min_segment or abs(P - P_ss[r]) > tol * P_ss[r]):
+                x_pred, P_pred = self.F * x + Bv, self.F * P * self.F + self.R
+                K = P_pred / (P_pred + self.R + szum_procesu[r])
+                x = x_pred + K * (z_list[k] - x_pred)
+                P = (1 - K) * P_pred
+                x_estimates[k] = x
+                P_trajectory[k] = P
+                k += 1
+
+            if k == stop:
+                continue
+            if convergence_step is None:
+                convergence_step = k
+
+            # Stałe wzmocnienie: x_k = (1 - K) * x_{k-1} + K * z_k + (1 - K) * B * v
+            a = 1 - K_ss[r]
+            u = K_ss[r] * z[k:stop] + a * Bv
+            x_estimates[k:stop], _ = lfilter([1.0], [1.0, -a], u, zi=[a * x])
+            P_trajectory[k:stop] = P_ss[r]
+            x, P = float(x_estimates[stop - 1]), P_ss[r]
+            fixed_gain_samples += stop - k
+
+        self.x, self.P = x, P
+
+        max_deviation = None
+        if validate:
+            # Dokładny filtr z tymi samymi parametrami (także R z tabeli strojenia) i stanem początkowym
+            exact = KalmanFilter(self.v, self.noised_signals_height, self.Q1, self.Q2, backend=self.backend, R=self.R)
+            exact.x, exact.P = x_initial, P_initial
+            max_deviation = float(np.max(np.abs(np.asarray(exact.run()[0]) - x_estimates))) if n else 0.0
+
+        self.steady_state_report = {
+            "convergence_step": None if convergence_step is None else int(convergence_step),
+            "fixed_gain_samples": int(fixed_gain_samples),
+            "P_ss": {"Q1": P_ss1, "Q2": P_ss2},
+            "K_ss": {"Q1": K_ss1, "Q2": K_ss2},
+            "max_deviation": max_deviation
+        }
+        if return_P_trajectory:
+            return x_estimates.tolist(), self.P, P_trajectory
+        return x_estimates.tolist(), self.P
+
+    def run_robust(self, return_P_trajectory=False):
+        """
+        Filtracja w trybie odpornym - jądro kalmanKernels.robust_kalman_kernel (Numba według backend)
+        z tymi samymi działaniami co robust_kalman_step w kalman_filter_batch.
+        Przy czystych danych tryb odporny może być nieco mniej dokładny niż podstawowy, gdy
+        rzeczywisty szum znacznie przekracza R + Q (np. szum 5% tuż poniżej 762 m): bramka odrzuca
+        wtedy poprawne pomiary, dopóki skala szumu się nie dostosuje (start na 700 m przy 12 m/s:
+        średnie RMSE toru 1.38 zamiast 1.23; powyżej 762 m oba tryby przepuszczają bezszumowe
+        pomiary, więc cała różnica pochodzi z odcinka poniżej 762 m).
+        :param return_P_trajectory: Czy zwrócić także niepewność po każdej próbce
+        Zwraca:
+            x_estimates: Lista wyestymowanych wartości
+            P: Końcowa wartość niepewności
+            P_trajectory: Tablica niepewności po każdej próbce (tylko gdy return_P_trajectory)
+        """
+        from kalmanKernels import resolve_backend, run_robust_kalman
+        backend = resolve_backend(self.backend)
+        with stage(f"filter.run[robust-{backend}]", samples=len(self.noised_signals_height)):
+            x_estimates, P_trajectory, self.x, self.P, self.noise_scale = run_robust_kalman(
+                self.noised_signals_height, self.x, self.P, self.noise_scale, self.B * self.v, self.R,
+                self.Q1, self.Q2, ROBUST_GATE, ROBUST_HUBER_K, ROBUST_ADAPTATION_RATE, ROBUST_SCALE_LIMITS,
+                backend=backend)
+
+        if return_P_trajectory:
+            return x_estimates.tolist(), self.P, P_trajectory
+        return x_estimates.tolist(), self.P
+
+    def run(self, return_P_trajectory=False):
         """
         Główna pętla filtracji Kalmana
+        :param return_P_trajectory: Czy zwrócić także niepewność po każdej próbce
         Zwraca:
             x_estimates: Lista wyestymowanych wartości
             P: Końcowa wartość niepewności
+            P_trajectory: Tablica niepewności po każdej próbce (tylko gdy return_P_trajectory)
         """
-        x_estimates = []
-        
-        # Przetwarzanie wszystkich pomiarów
-        for z in self.noised_signals_height:
+        if self.robust:
+            return self.run_robust(return_P_trajectory=return_P_trajectory)
+        if self.steady_state:
+            return self.run_steady_state(return_P_trajectory=return_P_trajectory)
+
+        from kalmanKernels import resolve_backend, run_scalar_kalman
+        backend = resolve_backend(self.backend)
+        with stage(f"filter.run[{backend}]", samples=len(self.noised_signals_height)):
+            if backend == "numba":
+                # Skompilowane jądro z tą samą rekursją co prediction/update
+                x_estimates, P_trajectory, self.x, self.P = run_scalar_kalman(
+                    self.noised_signals_height, self.x, self.P, self.B * self.v, self.R, self.Q1, self.Q2)
+                if return_P_trajectory:
+                    return x_estimates.tolist(), self.P, P_trajectory
+                return x_estimates.tolist(), self.P
+
+            x_estimates = []
+            P_trajectory = []
+
+            # Przetwarzanie wszystkich pomiarów
+            for z in self.noised_signals_height:
+                # Faza predykcji
+                x_pred, P_pred = self.prediction()
+
+                # Faza aktualizacji
+                x = self.update(z=z, x_pred=x_pred, P_pred=P_pred)
+
+                x_estimates.append(x)
+                P_trajectory.append(self.P)
+
+        if return_P_trajectory:
+            return x_estimates, self.P, np.array(P_trajectory, dtype=float)
+        return x_estimates, self.P
+
+
+
+class KalmanState:
+    """
+    Stan filtru pojedynczego toru: tylko estymata i jej niepewność
+    """
+    __slots__ = ("x", "P")
+
+    def __init__(self, x=None, P=1):
+        self.x = x  # Aktualna estymata wysokości (None przed pierwszym pomiarem)
+        self.P = P  # Aktualna niepewność estymacji
+
+
+class StreamingKalmanFilter:
+    """
+    Filtr Kalmana przetwarzający pomiary na bieżąco, próbka po próbce.
+    Pamięć na tor jest stała - niezależna od długości lotu.
+    """
+    __slots__ = ("v", "Bv", "R", "Q1", "Q2", "state")
+
+    def __init__(self, v: float, Q1=4.572, Q2=38.1, state=None):
+        """
+        Inicjalizacja strumieniowego filtru Kalmana
+        :param v: Stała prędkość (m/s)
+        :param Q1: Szum procesu dla wysokości <= 152.4m
+        :param Q2: Szum procesu dla wysokości > 152.4m
+        :param state: Opcjonalny stan początkowy (KalmanState)
+        """
+        self.v = v
+        self.Bv = 0.05 * v  # Wpływ prędkości na pozycję (B * v)
+        self.R = measurement_noise_for_speed(v)
+        self.Q1 = Q1
+        self.Q2 = Q2
+        self.state = state if state is not None else KalmanState()
+
+    def step(self, z):
+        """
+        Przetwarza pojedynczy pomiar
+        :param z: Aktualny pomiar
+        :return: Wyestymowana wartość dla tego pomiaru
+        """
+        state = self.state
+        if state.x is None:
+            if z != z:
+                return z  # Brak estymaty przed pierwszym dostępnym pomiarem
+            state.x = z  # Początkowa wysokość z pierwszego pomiaru
+
+        # Przerwanie filtracji powyżej 762 metrów
+        if z > 762:
+            return z
+
+        # Faza predykcji
+        x_pred = state.x + self.Bv
+        P_pred = state.P + self.R
+
+        # Brak pomiaru (NaN) - pomijamy aktualizację
+        if z != z:
+            state.x, state.P = x_pred, P_pred
+            return state.x
+
+        # Faza aktualizacji
+        szum_procesu = self.Q1 if z <= 152.4 else self.Q2
+        K = P_pred / (P_pred + self.R + szum_procesu)
+        state.x = x_pred + K * (z - x_pred)
+        state.P = (1 - K) * P_pred
+        return state.x
+
+    def feed(self, measurements):
+        """
+        Generator estymat dla kolejnych pomiarów z dowolnego iterowalnego źródła
+        :param measurements: Iterowalne źródło pomiarów
+        """
+        for z in measurements:
+            yield self.step(z)
+
+    def checkpoint(self):
+        """
+        Zapisuje stan filtru
+        :return: Słownik {"x": ..., "P": ...} możliwy do serializacji w JSON
+        """
+        return {"x": self.state.x, "P": self.state.P}
+
+    def restore(self, checkpoint):
+        """
+        Przywraca stan filtru zapisany przez checkpoint()
+        :param checkpoint: Słownik {"x": ..., "P": ...}
+        """
+        self.state = KalmanState(checkpoint["x"], checkpoint["P"])
+
+
+class CentralizedKalmanFilter:
+    """
+    Scentralizowany filtr Kalmana dla wielu czujników jednego obiektu.
+    Jedna predykcja na krok i wspólna aktualizacja pomiarami wszystkich
+    czujników zastępują osobne filtry i późniejsze łączenie estymat.
+    """
+
+    def __init__(self, v: float, noised_signals_height, Q1=4.572, Q2=38.1, R=None):
+        """
+        Inicjalizacja scentralizowanego filtru Kalmana
+        :param v: Stała prędkość (m/s)
+        :param noised_signals_height: Zaszumione pomiary, tablica (czujniki x próbki)
+        :param Q1: Szum procesu dla wysokości <= 152.4m
+        :param Q2: Szum procesu dla wysokości > 152.4m
+        :param R: Szum pomiarowy każdego czujnika (domyślnie z progów prędkości)
+        """
+        self.v = v
+        self.noised_signals_height = np.atleast_2d(np.asarray(noised_signals_height, dtype=float))
+        self.B = 0.05  # Współczynnik wpływu prędkości na pozycję
+        self.Q1 = Q1
+        self.Q2 = Q2
+        self.R = measurement_noise_for_speed(v)  # Szum pomiarowy z progów prędkości
+        n_sensors = self.noised_signals_height.shape[0]
+        self.R_sensors = np.broadcast_to(np.asarray(self.R if R is None else R, dtype=float), (n_sensors,))
+
+        # Początkowa wysokość - średnia pomiarów z pierwszej próbki, w której jakikolwiek czujnik
+        # ma pomiar (bez żadnego pomiaru - 0, jak w kalman_filter_batch)
+        available = ~np.isnan(self.noised_signals_height).all(axis=0)
+        if available.any():
+            self.x = float(np.nanmean(self.noised_signals_height[:, np.argmax(available)]))
+        else:
+            self.x = 0.0
+        self.P = 1  # Początkowa niepewność estymacji
+
+    def run(self, return_P_trajectory=False):
+        """
+        Filtracja wszystkich próbek.
+        Aktualizacja sekwencyjna po czujnikach (każdy ze swoim S = P + R_i + Q)
+        jest równoważna postaci informacyjnej, więc sumy wag i ważonych pomiarów
+        liczone są wektorowo dla całej tablicy, a pętla po czasie jest skalarna.
+        :param return_P_trajectory: Czy zwrócić także niepewność po każdej próbce
+        Zwraca:
+            x_estimates: Tablica wyestymowanych wartości
+            P: Końcowa wartość niepewności
+            P_trajectory: Tablica niepewności po każdej próbce (tylko gdy return_P_trajectory)
+        """
+        Z = self.noised_signals_height
+        missing = np.isnan(Z)
+        passthrough = Z > 762
+        used = ~missing & ~passthrough
+
+        # Wagi informacyjne czujników: 1 / (R_i + Q), Q zależne od wysokości pomiaru
+        szum_procesu = np.where(Z <= 152.4, self.Q1, self.Q2)
+        weights = np.where(used, 1.0 / (self.R_sensors[:, None] + szum_procesu), 0.0)
+        information = weights.sum(axis=0).tolist()
+        weighted_z = (weights * np.where(used, Z, 0.0)).sum(axis=0).tolist()
+
+        # Gdy wszystkie dostępne pomiary są powyżej 762 m - przerwanie filtracji
+        passthrough_count = passthrough.sum(axis=0)
+        only_passthrough = ~used.any(axis=0) & (passthrough_count > 0)
+        passthrough_z = np.where(passthrough, Z, 0.0).sum(axis=0) / np.maximum(passthrough_count, 1)
+        passthrough_z = np.where(only_passthrough, passthrough_z, np.nan).tolist()
+
+        n_samples = Z.shape[1]
+        x_estimates = np.empty(n_samples)
+        P_trajectory = np.empty(n_samples)
+        x, P, Bv, R = self.x, self.P, self.B * self.v, self.R
+
+        for k in range(n_samples):
+            if passthrough_z[k] == passthrough_z[k]:
+                x_estimates[k] = passthrough_z[k]
+                P_trajectory[k] = P
+                continue
+
             # Faza predykcji
-            x_pred, P_pred = self.prediction()
-            
+            x_pred = x + Bv
+            P_pred = P + R
+
+            # Faza aktualizacji wszystkimi czujnikami (brak pomiarów - sama predykcja)
+            P = 1 / (1 / P_pred + information[k])
+            x = P * (x_pred / P_pred + weighted_z[k])
+
+            x_estimates[k] = x
+            P_trajectory[k] = P
+
+        self.x, self.P = x, P
+        if return_P_trajectory:
+            return x_estimates, self.P, P_trajectory
+        return x_estimates, self.P
+
+def kalman_filter_batch(noised_signals_height, v, Q1=4.572, Q2=38.1, return_P_trajectory=False,
+                        return_history=False, R=None, robust=False):
+    """
+    Wektorowa filtracja Kalmana wielu torów jednocześnie.
+    Odpowiada KalmanFilter.run wywołanemu osobno dla każdego toru,
+    ale predykcja i aktualizacja wykonywane są naraz dla wszystkich torów.
+    :param noised_signals_height: Zaszumione pomiary, tablica (tory x próbki)
+    :param v: Stała prędkość każdego toru (liczba lub tablica o długości liczby torów)
+    :param Q1: Szum procesu dla wysokości <= 152.4m (liczba lub tablica)
+    :param Q2: Szum procesu dla wysokości > 152.4m (liczba lub tablica)
+    :param return_P_trajectory: Czy zwrócić także niepewność po każdej próbce
+    :param return_history: Czy zwrócić także stany po predykcji i po aktualizacji (dla wygładzania RTS)
+    :param R: Szum pomiarowy (liczba lub tablica, domyślnie z progów prędkości)
+    :param robust: Tryb odporny - krok robust_kalman_step (jak KalmanFilter(robust=True))
+    Zwraca:
+        x_estimates: Tablica wyestymowanych wartości (tory x próbki)
+        P: Tablica końcowych niepewności dla każdego toru
+        P_trajectory: Niepewności po każdej próbce (tory x próbki, tylko gdy return_P_trajectory)
+        history: Słownik tablic x_pred, P_pred, x_filtered, P_filtered (tory x próbki, tylko gdy
+                 return_history); przy przerwaniu filtracji predykcja równa jest poprzedniemu stanowi
+    """
+    Z = np.atleast_2d(np.asarray(noised_signals_height, dtype=float))
+    n_tracks, n_samples = Z.shape
+
+    v = np.broadcast_to(np.asarray(v, dtype=float), (n_tracks,))
+    Q1 = np.broadcast_to(np.asarray(Q1, dtype=float), (n_tracks,))
+    Q2 = np.broadcast_to(np.asarray(Q2, dtype=float), (n_tracks,))
+    B = 0.05  # Współczynnik wpływu prędkości na pozycję
+    R = measurement_noise_for_speed(v) if R is None else np.broadcast_to(np.asarray(R, dtype=float), (n_tracks,))
+    Bv = B * v
+
+    # Maski zamiast warunków: wybór szumu procesu, przerwanie filtracji powyżej 762 m
+    # oraz pominięcie aktualizacji dla brakujących pomiarów (NaN, wzmocnienie 0)
+    missing = np.isnan(Z)
+    Q = np.where(Z <= 152.4, Q1[:, None], Q2[:, None])
+    passthrough = Z > 762
+    update_weight = (~missing).astype(float)
+    Z_filled = np.where(missing, 0.0, Z)
+
+    # Początkowa wysokość - pierwszy dostępny pomiar toru
+    x = Z_filled[np.arange(n_tracks), np.argmax(~missing, axis=1)] if n_samples else np.zeros(n_tracks)
+    P = np.ones(n_tracks)  # Początkowa niepewność estymacji
+    x_estimates = np.empty_like(Z)
+    P_trajectory = np.empty_like(Z) if return_P_trajectory else None
+    if return_history:
+        history = {name: np.empty_like(Z) for name in ("x_pred", "P_pred", "x_filtered", "P_filtered")}
+
+    scale = np.ones(n_tracks)  # Adaptacyjna skala szumu pomiaru (tryb odporny)
+    for k in range(n_samples):
+        z = Z_filled[:, k]
+        keep = passthrough[:, k]
+
+        # Faza predykcji
+        x_pred = x + Bv
+        P_pred = P + R
+
+        if robust:
+            # Bramkowanie, wagi Huberowskie i adaptacja szumu tym samym krokiem co w KalmanFilter
+            x, P, scale, x_estimates[:, k] = robust_kalman_step(x, P, scale, Z[:, k], Bv, R, Q1, Q2)
+        else:
             # Faza aktualizacji
-            x = self.update(z=z, x_pred=x_pred, P_pred=P_pred)
-            
-            x_estimates.append(x)
-            
-        return x_estimates, self.P
\ No newline at end of file
+            S = P_pred + R + Q[:, k]
+            K = P_pred / S * update_weight[:, k]
+            x = np.where(keep, x, x_pred + K * (z - x_pred))
+            P = np.where(keep, P, (1 - K) * P_pred)
+
+            x_estimates[:, k] = np.where(keep, Z[:, k], x)
+        if return_P_trajectory:
+            P_trajectory[:, k] = P
+        if return_history:
+            # Przerwanie filtracji: stan bez zmian, więc x i P są tu równe stanowi poprzedniemu
+            # (w trybie odpornym stan jest aktualizowany także powyżej 762 m)
+            frozen = keep & (not robust)
+            history["x_pred"][:, k] = np.where(frozen, x, x_pred)
+            history["P_pred"][:, k] = np.where(frozen, P, P_pred)
+            history["x_filtered"][:, k] = x
+            history["P_filtered"][:, k] = P
+
+    result = (x_estimates, P)
+    if return_P_trajectory:
+        result += (P_trajectory,)
+    if return_history:
+        result += (history,)
+    return result
+
+
+# Od tej liczby torów wektorowy kalman_filter_batch jest szybszy niż osobne KalmanFilter.run
+BATCH_MIN_TRACKS = 16
+
+
+def kalman_filter_tracks(noised_signals_height, v, Q1=4.572, Q2=38.1, robust=False, backend="auto"):
+    """
+    Filtracja kilku torów o wspólnych parametrach najszybszą ścieżką: poniżej BATCH_MIN_TRACKS
+    torów osobne KalmanFilter.run (pętla Pythona lub jądro Numba), a od tej liczby kalman_filter_batch.
+    Obie ścieżki dają identyczne wyniki.
+    :param noised_signals_height: Zaszumione pomiary, tablica (tory x próbki)
+    :param v: Stała prędkość (m/s)
+    :param Q1: Szum procesu dla wysokości <= 152.4m
+    :param Q2: Szum procesu dla wysokości > 152.4m
+    :param robust: Tryb odporny (jak KalmanFilter(robust=True))
+    :param backend: Implementacja pętli KalmanFilter.run ("auto", "python" lub "numba")
+    Zwraca:
+        x_estimates, P, P_trajectory: Jak kalman_filter_batch(return_P_trajectory=True)
+    """
+    Z = np.atleast_2d(np.asarray(noised_signals_height, dtype=float))
+    if Z.shape[0] >= BATCH_MIN_TRACKS or Z.shape[1] == 0:
+        return kalman_filter_batch(Z, v, Q1, Q2, return_P_trajectory=True, robust=robust)
+
+    runs = [KalmanFilter(v, z.tolist(), Q1, Q2, backend=backend, robust=robust).run(return_P_trajectory=True)
+            for z in Z]
+    x_estimates = np.array([x for x, _, _ in runs], dtype=float).reshape(Z.shape)
+    P = np.array([P for _, P, _ in runs], dtype=float)
+    P_trajectory = np.array([P_trajectory for _, _, P_trajectory in runs], dtype=float).reshape(Z.shape)
+    return x_estimates, P, P_trajectory
+
@@ -0,0 +1,45 @@
+import numpy as np
+
+
+def fuse_estimates(estimates, variances, axis=0):
+    """
+    Łączy estymaty dowolnej liczby czujników ważąc je odwrotnością wariancji.
+    Obliczenia są wektorowe - pętla przebiega tylko po czujnikach, a każdy
+    czujnik dodawany jest do akumulatorów w miejscu (bez kopii całych tablic).
+    Brakujące estymaty (NaN) mają wagę 0.
+
+    Parametry:
+    estimates (np.array): Estymaty, np. kształt (czujniki, próbki)
+    variances (np.array): Wariancje estymat po każdej próbce (kształt jak estimates)
+                          lub wariancje końcowe o kształcie (czujniki, 1)
+    axis (int): Oś czujników
+
+    Zwraca:
+    tuple: (fused, fused_variance) - połączone estymaty i ich wariancja;
+           NaN / inf tam, gdzie żaden czujnik nie dał estymaty
+    """
+    estimates = np.moveaxis(np.asarray(estimates, dtype=float), axis, 0)
+    variances = np.broadcast_to(np.moveaxis(np.asarray(variances, dtype=float), axis, 0)
+                                if np.ndim(variances) == estimates.ndim else variances,
+                                estimates.shape)
+
+    weight_sum = np.zeros(estimates.shape[1:])
+    weighted = np.zeros(estimates.shape[1:])
+    weight = np.empty(estimates.shape[1:])
+    term = np.empty(estimates.shape[1:])
+
+    for sensor_estimates, sensor_variances in zip(estimates, variances):
+        np.divide(1.0, sensor_variances, out=weight)
+        np.multiply(weight, sensor_estimates, out=term)
+        # Brak estymaty lub wariancji (NaN) - czujnik pomijany w tej próbce
+        missing = np.isnan(term)
+        if missing.any():
+            weight[missing] = 0.0
+            term[missing] = 0.0
+        weight_sum += weight
+        weighted += term
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fused = weighted / weight_sum
+        fused_variance = 1.0 / weight_sum
+    return fused, fused_variance
@@ -0,0 +1,365 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+import numpy as np
+import signalsGeneratingShowing as signals
+from trackBank import TrackBank
+from instrumentation import stage
+
+# Protokół (TCP, linie tekstowe zakończone "\n"):
+#   pomiar:    "<obiekt> <czujnik> <prędkość> <wysokość> <znacznik>"
+#   odpowiedź: "<obiekt> <połączona estymata> <wariancja> <znacznik>"
+# Tor to para (obiekt, czujnik); tworzony jest przy pierwszym pomiarze z podaną prędkością.
+# Znacznik jest odsyłany bez zmian - klient liczy z niego opóźnienie.
+
+
+class _Connection:
+    """
+    Stan połączenia klienta: kolejka odpowiedzi i liczba paczek w trakcie przetwarzania
+    """
+    __slots__ = ("writer", "outbox", "pending", "idle")
+
+    def __init__(self, writer, outbox_size):
+        self.writer = writer
+        self.outbox = asyncio.Queue(maxsize=outbox_size)  # Ograniczona - wolny klient spowalnia filtrację
+        self.pending = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+
+class IngestionService:
+    """
+    Serwis asyncio filtrujący strumienie pomiarów wysokości z wielu czujników.
+    Pomiary ze wszystkich połączeń trafiają do ograniczonej kolejki, skąd są
+    zbierane w paczki (micro-batching) i filtrowane jednym wektorowym krokiem
+    TrackBank. Dla każdego pomiaru odsyłana jest połączona (ważona odwrotnością
+    wariancji) estymata wszystkich czujników obiektu.
+
+    Przeciwciśnienie: pełna kolejka wejściowa wstrzymuje odczyt z gniazd
+    (TCP spowalnia nadawców), a pełna kolejka odpowiedzi wolnego klienta
+    wstrzymuje przetwarzanie kolejnych paczek.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, Q1=4.572, Q2=38.1, max_batch=8192,
+                 queue_size=256, outbox_size=256):
+        """
+        :param host: Adres nasłuchu
+        :param port: Port nasłuchu (0 - dowolny wolny)
+        :param Q1: Szum procesu dla wysokości <= 152.4m
+        :param Q2: Szum procesu dla wysokości > 152.4m
+        :param max_batch: Największa liczba pomiarów w jednej paczce
+        :param queue_size: Pojemność kolejki wejściowej (w fragmentach odczytanych z gniazd)
+        :param outbox_size: Pojemność kolejki odpowiedzi każdego połączenia
+        """
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        self.outbox_size = outbox_size
+        self.bank = TrackBank(Q1=Q1, Q2=Q2)
+        self.inbox = asyncio.Queue(maxsize=queue_size)
+        self.track_ids = {}  # (obiekt, czujnik) -> identyfikator toru
+        self.object_ids = {}  # obiekt -> numer obiektu
+        self.track_object = np.full(self.bank.capacity, -1, dtype=np.intp)  # Numer obiektu każdego toru
+        self.measurements = 0
+        self.batches = 0
+        self.rejected = 0  # Błędne linie (pomijane)
+        self._server = None
+        self._batcher = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port, limit=2**20)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._batcher = asyncio.create_task(self._batch_loop())
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def stats(self):
+        return {
+            "tracks": len(self.bank),
+            "objects": len(self.object_ids),
+            "measurements": self.measurements,
+            "batches": self.batches,
+            "rejected": self.rejected,
+            "mean_batch_size": self.measurements / self.batches if self.batches else 0.0
+        }
+
+    async def _handle_client(self, reader, writer):
+        connection = _Connection(writer, self.outbox_size)
+        sender = asyncio.create_task(self._send_loop(connection))
+        remainder = b""
+        try:
+            while True:
+                data = await reader.read(2**16)
+                if not data:
+                    break
+                lines = (remainder + data).split(b"\n")
+                remainder = lines.pop()
+                measurements = [m for m in map(self._parse, lines) if m is not None]
+                if measurements:
+                    connection.pending += 1
+                    connection.idle.clear()
+                    await self.inbox.put((connection, measurements))  # Czeka, gdy serwis nie nadąża
+            # Odpowiedzi na pomiary w kolejce muszą zostać wysłane przed zamknięciem
+            await connection.idle.wait()
+        finally:
+            await connection.outbox.put(None)
+            await sender
+            writer.close()
+
+    def _parse(self, line):
+        """
+        Pomiar z linii protokołu: ((obiekt, czujnik), prędkość, wysokość, znacznik) lub None dla błędnej linii
+        """
+        fields = line.split()
+        if len(fields) != 5:
+            if fields:
+                self.rejected += 1
+            return None
+        try:
+            return (fields[0], fields[1]), float(fields[2]), float(fields[3]), fields[4]
+        except ValueError:
+            self.rejected += 1
+            return None
+
+    @staticmethod
+    async def _send_loop(connection):
+        while (chunk := await connection.outbox.get()) is not None:
+            connection.writer.write(chunk)
+            await connection.writer.drain()
+
+    async def _batch_loop(self):
+        while True:
+            items = [await self.inbox.get()]
+            size = len(items[0][1])
+            while size < self.max_batch and not self.inbox.empty():
+                items.append(self.inbox.get_nowait())
+                size += len(items[-1][1])
+
+            replies = self.process_batch([measurements for _, measurements in items])
+            for (connection, _), reply in zip(items, replies):
+                await connection.outbox.put(reply)
+                connection.pending -= 1
+                if connection.pending == 0:
+                    connection.idle.set()
+
+    def _track_id(self, key, v):
+        track_id = self.track_ids.get(key)
+        if track_id is None:
+            track_id = self.track_ids[key] = self.bank.add_track(v)
+            if track_id >= len(self.track_object):
+                self.track_object = np.concatenate(
+                    [self.track_object, np.full(self.bank.capacity - len(self.track_object), -1, dtype=np.intp)])
+            self.track_object[track_id] = self.object_ids.setdefault(key[0], len(self.object_ids))
+        return track_id
+
+    def process_batch(self, chunks):
+        """
+        Filtruje paczkę pomiarów i buduje odpowiedzi (bez operacji sieciowych)
+        :param chunks: Lista fragmentów - list pomiarów ((obiekt, czujnik), prędkość, wysokość, znacznik)
+        :return: Lista odpowiedzi (bytes) - po jednej na fragment
+        """
+        measurements = [m for chunk in chunks for m in chunk]
+        n = len(measurements)
+        with stage("ingestion.batch", samples=n):
+            ids = np.fromiter((self._track_id(key, v) for key, v, _, _ in measurements), dtype=np.intp, count=n)
+            z = np.fromiter((z for _, _, z, _ in measurements), dtype=float, count=n)
+
+            # Tor może mieć kilka pomiarów w paczce - kolejne pomiary toru w kolejnych krokach
+            order = np.argsort(ids, kind="stable")
+            sorted_ids = ids[order]
+            position = np.arange(n)
+            run_start = np.maximum.accumulate(np.where(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]], position, 0))
+            rank = np.empty(n, dtype=np.intp)
+            rank[order] = position - run_start
+            for r in range(int(rank.max()) + 1 if n else 0):
+                selected = rank == r
+                self.bank.step(ids[selected], z[selected])
+            self.measurements += n
+            self.batches += 1
+
+            # Odpowiedź na każdy pomiar: połączona estymata obiektu po tej paczce
+            objects = self.track_object[ids]
+            updated = np.unique(objects)
+            fused_x, fused_P = self.fused_estimates(updated)
+            lookup = {o: f"{x:.3f} {P:.5f}".encode() for o, x, P in
+                      zip(updated.tolist(), fused_x.tolist(), fused_P.tolist())}
+            replies = []
+            start = 0
+            for chunk in chunks:
+                lines = [b"%s %s %s\n" % (key[0], lookup[o], stamp)
+                         for (key, _, _, stamp), o in zip(chunk, objects[start:start + len(chunk)].tolist())]
+                replies.append(b"".join(lines))
+                start += len(chunk)
+        return replies
+
+    def fused_estimates(self, objects):
+        """
+        Połączone estymaty obiektów - ważenie odwrotnością wariancji torów (jak fusion.fuse_estimates)
+        :param objects: Posortowane numery obiektów
+        :return: (x, P) - tablice połączonych estymat i wariancji (NaN / inf przed pierwszym pomiarem)
+        """
+        tracks = np.flatnonzero(self.bank.active & self.bank.initialized
+                                & np.isin(self.track_object[:self.bank.capacity], objects))
+        group = np.searchsorted(objects, self.track_object[tracks])
+        weight = 1.0 / self.bank.P[tracks]
+        weight_sum = np.bincount(group, weights=weight, minlength=len(objects))
+        weighted = np.bincount(group, weights=weight * self.bank.x[tracks], minlength=len(objects))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return weighted / weight_sum, 1.0 / weight_sum
+
+
+async def simulate_sensors(host, port, objects, sensors, rate_hz=20.0, duration=5.0, latencies=None):
+    """
+    Symulator czujników: wysyła pomiary z generate_noised_signals_on_sensor w stałym takcie
+    i zbiera opóźnienia odpowiedzi
+
+    Parametry:
+    host (str), port (int): Adres serwisu
+    objects (dict): {obiekt: (prędkość, wysokość początkowa)}
+    sensors (list): Pary (obiekt, czujnik) obsługiwane przez to połączenie
+    rate_hz (float): Częstotliwość pomiarów każdego czujnika [Hz]
+    duration (float): Czas trwania [s]
+    latencies (list): Lista, do której dopisywane są opóźnienia [s]
+
+    Zwraca:
+    int: Liczba odebranych odpowiedzi
+    """
+    latencies = [] if latencies is None else latencies
+    n_ticks = int(duration * rate_hz)
+    series = []
+    for obj, sensor in sensors:
+        speed, start_height = objects[obj]
+        _, signals_y = signals.generate_true_signal(
+            {"speed": speed, "start_height": start_height, "time_step": 1 / rate_hz, "flight_time": duration})
+        series.append(signals.generate_noised_signals_on_sensor(signals_y))
+    prefixes = [f"{obj} {sensor} {objects[obj][0]} " for obj, sensor in sensors]
+
+    reader, writer = await asyncio.open_connection(host, port, limit=2**20)
+    expected = n_ticks * len(sensors)
+
+    async def receive():
+        received = 0
+        remainder = b""
+        while received < expected:
+            data = await reader.read(2**16)
+            if not data:
+                break
+            now = time.monotonic()
+            lines = (remainder + data).split(b"\n")
+            remainder = lines.pop()
+            latencies.extend(now - float(line.rsplit(b" ", 1)[1]) for line in lines)
+            received += len(lines)
+        return received
+
+    receiver = asyncio.create_task(receive())
+    start = time.monotonic()
+    for tick in range(n_ticks):
+        delay = start + tick / rate_hz - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        sent = time.monotonic()
+        writer.write("".join(f"{prefix}{values[tick]} {sent}\n"
+                             for prefix, values in zip(prefixes, series)).encode())
+        await writer.drain()
+    received = await receiver
+    writer.close()
+    await writer.wait_closed()
+    return received
+
+
+async def run_load_test(n_objects=1000, sensors_per_object=2, rate_hz=20.0, duration=5.0,
+                        connections=8, seed=0, **service_kwargs):
+    """
+    Test obciążeniowy: serwis i symulatory czujników w jednej pętli zdarzeń
+
+    Parametry:
+    n_objects (int): Liczba obiektów
+    sensors_per_object (int): Liczba czujników na obiekt
+    rate_hz (float): Częstotliwość pomiarów każdego czujnika [Hz]
+    duration (float): Czas trwania [s]
+    connections (int): Liczba połączeń TCP (czujniki dzielone po równo)
+    seed (int): Ziarno prędkości i wysokości początkowych obiektów
+    service_kwargs: Parametry IngestionService
+
+    Zwraca:
+    dict: Liczby pomiarów i odpowiedzi, przepustowość [pomiary/s], opóźnienia p50/p99/max [ms]
+          oraz statystyki serwisu (średni rozmiar paczki)
+    """
+    rng = np.random.default_rng(seed)
+    objects = {f"obj{i}": (round(float(v), 2), round(float(h), 1))
+               for i, (v, h) in enumerate(zip(rng.uniform(1, 15, n_objects), rng.uniform(0, 300, n_objects)))}
+    sensors = [(obj, f"s{k}") for obj in objects for k in range(sensors_per_object)]
+
+    service = await IngestionService(port=0, **service_kwargs).start()
+    latencies = []
+    start = time.perf_counter()
+    try:
+        received = await asyncio.gather(*(
+            simulate_sensors(service.host, service.port, objects, sensors[c::connections],
+                             rate_hz, duration, latencies)
+            for c in range(connections)))
+    finally:
+        elapsed = time.perf_counter() - start
+        await service.close()
+
+    latency_ms = np.asarray(latencies) * 1e3
+    return {
+        "sensors": len(sensors),
+        "sent": int(duration * rate_hz) * len(sensors),
+        "received": int(sum(received)),
+        "wall_sec": elapsed,
+        "throughput_per_sec": sum(received) / elapsed,
+        "latency_p50_ms": float(np.percentile(latency_ms, 50)) if len(latency_ms) else np.nan,
+        "latency_p99_ms": float(np.percentile(latency_ms, 99)) if len(latency_ms) else np.nan,
+        "latency_max_ms": float(latency_ms.max()) if len(latency_ms) else np.nan,
+        "service": service.stats()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serwis filtracji strumieni pomiarów wysokości (TCP)")
+    parser.add_argument("--host", default="127.0.0.1", help="Adres nasłuchu")
+    parser.add_argument("--port", type=int, default=8765, help="Port nasłuchu")
+    parser.add_argument("--max-batch", type=int, default=8192, help="Największa paczka pomiarów")
+    parser.add_argument("--load-test", action="store_true", help="Test obciążeniowy zamiast serwisu")
+    parser.add_argument("--objects", type=int, default=1000, help="Liczba obiektów w teście")
+    parser.add_argument("--sensors-per-object", type=int, default=2, help="Liczba czujników na obiekt")
+    parser.add_argument("--rate", type=float, default=20.0, help="Częstotliwość pomiarów czujnika [Hz]")
+    parser.add_argument("--duration", type=float, default=5.0, help="Czas testu [s]")
+    parser.add_argument("--connections", type=int, default=8, help="Liczba połączeń w teście")
+    args = parser.parse_args(argv)
+
+    if args.load_test:
+        result = asyncio.run(run_load_test(args.objects, args.sensors_per_object, args.rate, args.duration,
+                                           args.connections, max_batch=args.max_batch))
+        print(json.dumps(result, indent=4, ensure_ascii=False))
+        return 0 if result["received"] == result["sent"] else 1
+
+    service = IngestionService(args.host, args.port, max_batch=args.max_batch)
+    print(f"Serwis nasłuchuje na {args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
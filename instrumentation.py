@@ -0,0 +1,254 @@
+import atexit
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Zmienne środowiskowe włączające pomiary bez zmian w kodzie:
+#   KALMAN_INSTRUMENT=1              - czasy etapów i liczby próbek
+#   KALMAN_INSTRUMENT_MEMORY=1       - dodatkowo szczytowe zużycie pamięci etapów (tracemalloc, wolniej)
+#   KALMAN_INSTRUMENT_REPORT=plik    - zapis raportu JSON przy zakończeniu programu
+#   KALMAN_CPROFILE=plik             - profil cProfile całego procesu (pstats)
+#   KALMAN_TRACEMALLOC=plik          - migawka tracemalloc przy zakończeniu (tracemalloc.Snapshot.load)
+ENV_ENABLE = "KALMAN_INSTRUMENT"
+ENV_MEMORY = "KALMAN_INSTRUMENT_MEMORY"
+ENV_REPORT = "KALMAN_INSTRUMENT_REPORT"
+ENV_CPROFILE = "KALMAN_CPROFILE"
+ENV_TRACEMALLOC = "KALMAN_TRACEMALLOC"
+
+_enabled = False
+_track_memory = False
+_stats = {}  # nazwa etapu -> [wywołania, czas [s], próbki, szczytowa pamięć [B]]
+_lock = threading.Lock()
+_local = threading.local()  # Stos otwartych etapów wątku (do pamięci etapów zagnieżdżonych)
+_profiler = None
+
+
+class _NullStage:
+    """
+    Etap przy wyłączonych pomiarach - jedna współdzielona instancja bez żadnej pracy
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add_samples(self, n):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "samples", "start", "memory_start", "memory_peak")
+
+    def __init__(self, name, samples):
+        self.name = name
+        self.samples = samples
+
+    def add_samples(self, n):
+        """Dolicza próbki znane dopiero w trakcie etapu (np. po wczytaniu pliku)"""
+        self.samples += n
+
+    def __enter__(self):
+        if _track_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            stack = _stage_stack()
+            if stack:
+                # Szczyt do tej pory należy do etapu nadrzędnego - licznik szczytu jest współdzielony
+                stack[-1].memory_peak = max(stack[-1].memory_peak, peak)
+            tracemalloc.reset_peak()
+            self.memory_start = current
+            self.memory_peak = current
+            stack.append(self)
+        else:
+            self.memory_start = None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        memory = 0
+        if self.memory_start is not None:
+            self.memory_peak = max(self.memory_peak, tracemalloc.get_traced_memory()[1])
+            memory = self.memory_peak - self.memory_start
+            stack = _stage_stack()
+            stack.pop()
+            if stack:
+                stack[-1].memory_peak = max(stack[-1].memory_peak, self.memory_peak)
+        with _lock:
+            record = _stats.setdefault(self.name, [0, 0.0, 0, 0])
+            record[0] += 1
+            record[1] += elapsed
+            record[2] += self.samples
+            record[3] = max(record[3], memory)
+        return False
+
+
+def _stage_stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def stage(name, samples=0):
+    """
+    Pomiar etapu potoku: with stage("filter", samples=n): ...
+    Przy wyłączonych pomiarach zwraca współdzielony pusty kontekst (narzut jednego wywołania).
+
+    Parametry:
+    name (str): Nazwa etapu (wyniki tej samej nazwy są sumowane)
+    samples (int): Liczba próbek przetwarzanych w etapie (można dodać później przez add_samples)
+    """
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name, samples)
+
+
+def enabled():
+    return _enabled
+
+
+def enable(memory=False):
+    """
+    Włącza pomiary etapów
+
+    Parametry:
+    memory (bool): Czy mierzyć szczytową pamięć etapów (uruchamia tracemalloc, spowalnia alokacje)
+    """
+    global _enabled, _track_memory
+    _enabled = True
+    _track_memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    global _enabled, _track_memory
+    _enabled = False
+    _track_memory = False
+
+
+def reset():
+    """Usuwa zebrane wyniki"""
+    with _lock:
+        _stats.clear()
+
+
+def report():
+    """
+    Raport zebranych pomiarów
+
+    Zwraca:
+    dict: {etap: {"calls", "wall_sec", "samples", "samples_per_sec", "peak_memory_bytes"}};
+          peak_memory_bytes jest None, gdy pamięć nie była mierzona
+    """
+    with _lock:
+        stats = {name: list(record) for name, record in _stats.items()}
+    return {
+        name: {
+            "calls": calls,
+            "wall_sec": wall,
+            "samples": samples,
+            "samples_per_sec": samples / wall if samples and wall > 0 else None,
+            "peak_memory_bytes": memory if _track_memory else None
+        }
+        for name, (calls, wall, samples, memory) in stats.items()
+    }
+
+
+def merge_reports(reports):
+    """
+    Łączy raporty (np. z procesów roboczych cli.run_batch) w jeden
+
+    Parametry:
+    reports (iterable): Raporty z funkcji report()
+
+    Zwraca:
+    dict: Raport w tym samym formacie; czasy i próbki zsumowane, pamięć - maksimum
+    """
+    merged = {}
+    for single in reports:
+        for name, stats in single.items():
+            record = merged.setdefault(name, {"calls": 0, "wall_sec": 0.0, "samples": 0,
+                                              "samples_per_sec": None, "peak_memory_bytes": None})
+            record["calls"] += stats["calls"]
+            record["wall_sec"] += stats["wall_sec"]
+            record["samples"] += stats["samples"]
+            if stats["peak_memory_bytes"] is not None:
+                record["peak_memory_bytes"] = max(record["peak_memory_bytes"] or 0, stats["peak_memory_bytes"])
+    for record in merged.values():
+        if record["samples"] and record["wall_sec"] > 0:
+            record["samples_per_sec"] = record["samples"] / record["wall_sec"]
+    return merged
+
+
+def format_report(stage_report=None):
+    """
+    Tabela tekstowa raportu (etapy od najdłuższego)
+    """
+    stage_report = report() if stage_report is None else stage_report
+    lines = [f"{'Etap':<24} {'Wywołania':>9} {'Czas [s]':>10} {'Próbki':>14} {'Próbek/s':>14} {'Pamięć [MB]':>12}"]
+    for name, stats in sorted(stage_report.items(), key=lambda item: -item[1]["wall_sec"]):
+        rate = f"{stats['samples_per_sec']:,.0f}" if stats["samples_per_sec"] else "-"
+        memory = f"{stats['peak_memory_bytes'] / 2**20:.2f}" if stats["peak_memory_bytes"] is not None else "-"
+        lines.append(f"{name:<24} {stats['calls']:>9} {stats['wall_sec']:>10.4f} "
+                     f"{stats['samples']:>14,} {rate:>14} {memory:>12}")
+    return "\n".join(lines)
+
+
+def save_report(path, stage_report=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report() if stage_report is None else stage_report, f, indent=4, ensure_ascii=False)
+
+
+def start_profiling():
+    """
+    Uruchamia cProfile dla bieżącego wątku (profil zapisuje stop_profiling)
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def stop_profiling(path):
+    """
+    Zatrzymuje cProfile i zapisuje statystyki (python -m pstats plik)
+    """
+    global _profiler
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(path)
+        _profiler = None
+
+
+def dump_memory_snapshot(path):
+    """
+    Zapisuje migawkę alokacji tracemalloc (wymaga wcześniejszego tracemalloc.start())
+    """
+    if tracemalloc.is_tracing():
+        tracemalloc.take_snapshot().dump(path)
+
+
+def _configure_from_environment():
+    if os.environ.get(ENV_TRACEMALLOC) and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        atexit.register(dump_memory_snapshot, os.environ[ENV_TRACEMALLOC])
+    if os.environ.get(ENV_ENABLE, "0") not in ("", "0") or os.environ.get(ENV_MEMORY, "0") not in ("", "0"):
+        enable(memory=os.environ.get(ENV_MEMORY, "0") not in ("", "0"))
+        if os.environ.get(ENV_REPORT):
+            atexit.register(lambda: save_report(os.environ[ENV_REPORT]))
+    if os.environ.get(ENV_CPROFILE):
+        start_profiling()
+        atexit.register(stop_profiling, os.environ[ENV_CPROFILE])
+
+
+_configure_from_environment()
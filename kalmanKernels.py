@@ -0,0 +1,208 @@
+import math
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    njit = None
+    NUMBA_AVAILABLE = False
+
+# Dostępne implementacje pętli KalmanFilter.run
+BACKENDS = ("auto", "python", "numba")
+
+
+def scalar_kalman_kernel(z, x, P, Bv, R, Q1, Q2, x_estimates, P_trajectory):
+    """
+    Rekursja predykcja-aktualizacja filtru skalarnego na tablicach float64.
+    Wykonuje dokładnie te same działania co KalmanFilter.prediction/update
+    (w tej samej kolejności), więc wyniki są identyczne bit w bit.
+
+    Parametry:
+    z (np.ndarray): Pomiary (NaN - brak pomiaru)
+    x (float): Początkowa estymata wysokości
+    P (float): Początkowa niepewność estymacji
+    Bv (float): Wpływ prędkości na pozycję (B * v)
+    R (float): Szum pomiarowy
+    Q1 (float): Szum procesu dla wysokości <= 152.4m
+    Q2 (float): Szum procesu dla wysokości > 152.4m
+    x_estimates (np.ndarray): Bufor wyjściowy estymat (długość jak z)
+    P_trajectory (np.ndarray): Bufor wyjściowy niepewności (długość jak z)
+
+    Zwraca:
+    tuple: Końcowe (x, P)
+    """
+    for k in range(z.shape[0]):
+        zk = z[k]
+
+        # Przerwanie filtracji powyżej 762 metrów - stan bez zmian
+        if zk > 762:
+            x_estimates[k] = zk
+            P_trajectory[k] = P
+            continue
+
+        # Faza predykcji
+        x_pred = x + Bv
+        P_pred = P + R
+
+        if zk != zk:
+            # Brak pomiaru (NaN) - przyjmujemy predykcję
+            x = x_pred
+            P = P_pred
+        else:
+            # Faza aktualizacji
+            szum_procesu = Q1 if zk <= 152.4 else Q2
+            S = P_pred + R + szum_procesu
+            K = P_pred / S
+            x = x_pred + K * (zk - x_pred)
+            P = (1 - K) * P_pred
+
+        x_estimates[k] = x
+        P_trajectory[k] = P
+    return x, P
+
+
+def robust_kalman_kernel(z, x, P, scale, Bv, R, Q1, Q2, gate, huber_k, adaptation_rate, scale_min, scale_max,
+                         x_estimates, P_trajectory):
+    """
+    Rekursja trybu odpornego na liczbach zmiennoprzecinkowych - te same działania
+    (w tej samej kolejności) co filters.robust_kalman_step, więc wyniki są identyczne
+    bit w bit z kalman_filter_batch(robust=True), ale bez tablic 0-wymiarowych na próbkę.
+
+    Parametry:
+    z (np.ndarray lub list): Pomiary (NaN - brak pomiaru)
+    x, P (float): Początkowa estymata i niepewność
+    scale (float): Początkowa adaptacyjna skala szumu pomiaru
+    Bv, R, Q1, Q2 (float): Jak w scalar_kalman_kernel
+    gate, huber_k, adaptation_rate (float): Bramka, próg Huberowski i tempo adaptacji skali
+    scale_min, scale_max (float): Granice skali szumu
+    x_estimates (np.ndarray): Bufor wyjściowy estymat (długość jak z)
+    P_trajectory (np.ndarray): Bufor wyjściowy niepewności (długość jak z)
+
+    Zwraca:
+    tuple: Końcowe (x, P, scale)
+    """
+    for k in range(len(z)):
+        zk = z[k]
+
+        # Faza predykcji
+        x_pred = x + Bv
+        P_pred = P + R
+
+        if zk != zk:
+            # Brak pomiaru (NaN) - przyjmujemy predykcję, skala bez zmian
+            x = x_pred
+            P = P_pred
+            x_estimates[k] = x
+            P_trajectory[k] = P
+            continue
+
+        # Odległość Mahalanobisa innowacji przy szumie pomiaru powiększonym o skalę
+        noise = scale * (R + (Q1 if zk <= 152.4 else Q2))
+        y = zk - x_pred
+        nis = y * y / (P_pred + noise)
+        d = math.sqrt(nis)
+
+        accepted = d <= gate
+        if accepted:
+            # Waga Huberowska (1 do huber_k odchyleń)
+            w = huber_k / max(d, huber_k)
+            K = w * P_pred / (w * P_pred + noise)
+            x = x_pred + K * y
+            P = (1 - K) * P_pred
+        else:
+            # Pomiar odrzucony bramką - sama predykcja
+            x = x_pred
+            P = P_pred
+
+        scale = min(max(scale * (1 + adaptation_rate * (min(nis, gate * gate) - 1)), scale_min), scale_max)
+
+        # Powyżej 762 m pomiar przechodzi bez zmian tylko po przejściu bramki
+        x_estimates[k] = zk if zk > 762 and accepted else x
+        P_trajectory[k] = P
+    return x, P, scale
+
+
+_compiled_kernels = {}
+
+
+def compiled_kernel(kernel=scalar_kalman_kernel):
+    """
+    Skompilowana (Numba) wersja jądra (domyślnie scalar_kalman_kernel).
+    Kompilacja odbywa się przy pierwszym wywołaniu i jest zapisywana w pamięci podręcznej na dysku.
+
+    Zwraca:
+    function: Skompilowane jądro lub None, gdy Numba nie jest zainstalowana
+    """
+    if kernel not in _compiled_kernels and NUMBA_AVAILABLE:
+        _compiled_kernels[kernel] = njit(cache=True, nogil=True)(kernel)
+    return _compiled_kernels.get(kernel)
+
+
+def resolve_backend(backend):
+    """
+    Wybór implementacji pętli filtru
+
+    Parametry:
+    backend (str): "auto" (Numba, jeśli zainstalowana), "python" lub "numba"
+
+    Zwraca:
+    str: "numba" lub "python"
+
+    Wyjątki:
+    ImportError: Jawnie wybrany backend "numba", a Numba nie jest zainstalowana
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Nieznany backend filtru: {backend} (dostępne: {', '.join(BACKENDS)})")
+    if backend == "numba" and not NUMBA_AVAILABLE:
+        raise ImportError("Backend \"numba\" wymaga pakietu numba (pip install numba); "
+                          "backend \"auto\" używa wtedy pętli Pythona")
+    if backend == "python" or not NUMBA_AVAILABLE:
+        return "python"
+    return "numba"
+
+
+def run_scalar_kalman(z, x, P, Bv, R, Q1, Q2):
+    """
+    Filtracja całej serii skompilowanym jądrem
+
+    Parametry:
+    z: Pomiary (dowolna sekwencja liczb)
+    x, P, Bv, R, Q1, Q2: Jak w scalar_kalman_kernel
+
+    Zwraca:
+    tuple: (x_estimates, P_trajectory, x, P) - tablice po każdej próbce oraz stan końcowy
+    """
+    z = np.ascontiguousarray(z, dtype=np.float64)
+    x_estimates = np.empty_like(z)
+    P_trajectory = np.empty_like(z)
+    x, P = compiled_kernel()(z, float(x), float(P), float(Bv), float(R), float(Q1), float(Q2),
+                             x_estimates, P_trajectory)
+    return x_estimates, P_trajectory, x, P
+
+
+def run_robust_kalman(z, x, P, scale, Bv, R, Q1, Q2, gate, huber_k, adaptation_rate, scale_limits, backend="python"):
+    """
+    Filtracja całej serii w trybie odpornym (robust_kalman_kernel)
+
+    Parametry:
+    z: Pomiary (dowolna sekwencja liczb)
+    x, P, scale, Bv, R, Q1, Q2, gate, huber_k, adaptation_rate: Jak w robust_kalman_kernel
+    scale_limits (tuple): Granice skali szumu (scale_min, scale_max)
+    backend (str): "python" lub "numba" (wynik resolve_backend)
+
+    Zwraca:
+    tuple: (x_estimates, P_trajectory, x, P, scale) - tablice po każdej próbce oraz stan końcowy
+    """
+    z = np.ascontiguousarray(z, dtype=np.float64)
+    x_estimates = np.empty_like(z)
+    P_trajectory = np.empty_like(z)
+    arguments = (float(x), float(P), float(scale), float(Bv), float(R), float(Q1), float(Q2), float(gate),
+                 float(huber_k), float(adaptation_rate), float(scale_limits[0]), float(scale_limits[1]),
+                 x_estimates, P_trajectory)
+    if backend == "numba":
+        x, P, scale = compiled_kernel(robust_kalman_kernel)(z, *arguments)
+    else:
+        # Pętla Pythona jest szybsza na liście liczb niż na skalarach NumPy
+        x, P, scale = robust_kalman_kernel(z.tolist(), *arguments)
+    return x_estimates, P_trajectory, x, P, scale
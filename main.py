@@ -1,11 +1,17 @@
 import simulationBuilder as sim
-import signalsGeneratingShowing as signals
+from metrics import simulation_metrics
+import instrumentation
+from instrumentation import stage
+from simulationArchive import (save_simulation_data, write_simulation_details,
+                               load_simulation_archive, open_simulation_mmap)
 import json
+import os
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import numpy as np
 
 default_folder = r""
+# Folder z zapisanymi symulacjami obok programu (domyślny folder okna wczytywania)
+data_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataFolder")
 
 simulation_signal_dict = {
     "speed": 2,
@@ -39,7 +45,7 @@ def save_data_to_json(
     json_file_path = filedialog.asksaveasfilename(
         defaultextension=".json",
         initialfile = "symulacja",
-        filetypes=[("Pliki JSON", "*.json"), ("Wszystkie pliki", "*.*")],
+        filetypes=[("Pliki JSON", "*.json"), ("Archiwum binarne", "*.npz"), ("Wszystkie pliki", "*.*")],
         title="Zapisz plik JSON symulacji",
         parent=save_window,
         initialdir=default_folder
@@ -61,8 +67,7 @@ def save_data_to_json(
         "kalman_step": kalman_step
     }
 
-    with open(json_file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    save_simulation_data(json_file_path, data, simulation_signal_dict=simulation_signal_dict)
     
     print(f"Plik został zapisany: {json_file_path}")
 
@@ -74,24 +79,14 @@ def save_data_to_json(
         parent=save_window,
         # initialdir=default_folder
     )
-    std_noisy_sensor_1, std_filtred_sensor_1 = calculate_std_errors(signals_y,noised_signals_y_1,estimated_signals_y_1)
-    std_noisy_sensor_2, std_filtred_sensor_2 = calculate_std_errors(signals_y,noised_signals_y_2,estimated_signals_y_2)
-    std_noisy_sensor_combined, std_filtred_sensor_combined = calculate_std_errors(signals_y,combined_estimated_y,estimated_signals_y_1)
-    reduction_percentage = calculate_reduction_percentage(std_noisy_sensor_1, std_filtred_sensor_combined)
+    with stage("metrics", samples=2 * len(signals_y)):
+        metrics = simulation_metrics(signals_y, [noised_signals_y_1, noised_signals_y_2],
+                                     [estimated_signals_y_1, estimated_signals_y_2], combined_estimated_y,
+                                     kalman_step=kalman_step)
 
     if txt_file_path:
         try:
-            with open(txt_file_path, 'w', encoding='utf-8') as f:
-                for key, value in simulation_signal_dict.items():
-                    f.write(f"{key}: {value}\n")
-                f.write("Wyniki statystyczne:")
-                f.write(f"\nOdchylenie standardowe sygnałów zaszumowanych na pierwszym sensorze: {std_noisy_sensor_1}")
-                f.write(f"\nOdchylenie standardowe sygnałów odfiltrowanych na pierwszym sensorze: {std_filtred_sensor_1}")
-                f.write(f"\nOdchylenie standardowe sygnałów zaszumowanych na drugim sensorze: {std_noisy_sensor_2}")
-                f.write(f"\nOdchylenie standardowe sygnałów odfiltrowanych na drugim sensorze: {std_filtred_sensor_2}")
-                f.write(f"\nOdchylenie standardowe sygnałów odfiltrowanych na połączonych sensorach: {std_filtred_sensor_combined}")
-                f.write(f"\nProcentowa redukcja odchylenia standardowego: {reduction_percentage:.2f}%")
-
+            write_simulation_details(txt_file_path, simulation_signal_dict, metrics)
             print(f"Parametry zapisano do: {txt_file_path}")
         except Exception as e:
             messagebox.showerror("Błąd zapisu", f"Nie udało się zapisać parametrów: {str(e)}")
@@ -101,92 +96,19 @@ def save_data_to_json(
     save_window.destroy()
     parent_window.destroy()
 
-def combine_estimates(y1, P1, y2, P2):
-    y_combined = (P2 * y1 + P1 * y2) / (P1 + P2)
-    P_combined = (P1 * P2) / (P1 + P2)
-    return y_combined, P_combined
-
-def calculate_std_errors(real_values, noisy_values, filtered_values):
-    """
-Oblicza odchylenie standardowe błędów dla zaszumionego oraz odfiltrowanego sygnału.
-
-Parametry:
-    real_values (list lub np.array): Rzeczywiste wartości sygnału.
-    noisy_values (list lub np.array): Zaszumione wartości sygnału.
-    filtered_values (list lub np.array): Odfiltrowane wartości sygnału.
-
-Zwraca:
-    tuple: (std_noisy, std_filtered)
-        std_noisy    - odchylenie standardowe błędu zaszumionego sygnału,
-        std_filtered - odchylenie standardowe błędu odfiltrowanego sygnału.
-"""
-    real = np.array(real_values)
-    noisy = np.array(noisy_values)
-    filtered = np.array(filtered_values)
-    
-    error_noisy = noisy - real
-    
-    error_filtered = filtered - real
-
-    std_noisy = np.std(error_noisy)
-    std_filtered = np.std(error_filtered)
-
-    return std_noisy, std_filtered
-
-def calculate_reduction_percentage(std_noisy, std_filtered):
-    """
-    Oblicza procentową redukcję odchylenia standardowego błędu.
-
-    Parametry:
-        std_noisy (float): odchylenie standardowe błędu zaszumionego sygnału.
-        std_filtered (float): odchylenie standardowe błędu odfiltrowanego sygnału.
-
-    Zwraca:
-        float: procentowa redukcja odchylenia standardowego, obliczana jako:
-               ((std_noisy - std_filtered) / std_noisy) * 100.
-               Jeśli std_noisy wynosi 0, zwraca 0.
-    """
-    if std_noisy != 0:
-        reduction_percentage = ((std_noisy - std_filtered) / std_noisy) * 100
-    else:
-        reduction_percentage = 0
-    return reduction_percentage
-
 def show_random():
-    signals_x, signals_y = signals.generate_true_signal(simulation_signal_dict)
-    estimated_signals_y_1, P1, kalman_step_1, noised_signals_y_1 = sim.KalmanSimulation(
-        signals_dict=simulation_signal_dict, 
-        signals_x=signals_x, 
-        signals_y=signals_y, 
-        sensor_id=1
-    )
-    estimated_signals_y_2, P2, kalman_step_2, noised_signals_y_2 = sim.KalmanSimulation(
-        signals_dict=simulation_signal_dict, 
-        signals_x=signals_x, 
-        signals_y=signals_y, 
-        sensor_id=2
+    result = sim.run_simulation(
+        signals_dict=simulation_signal_dict,
+        observers=[sim.plot_simulation_result, show_save_window]
     )
 
-    combined_estimates_y = []
-    combined_P = []
-    for y1, y2 in zip(estimated_signals_y_1, estimated_signals_y_2):
-        y_combined, P_combined = combine_estimates(y1, P1, y2, P2)
-        combined_estimates_y.append(y_combined)
-        combined_P.append(P_combined)
+    print("Połączona wariancja:", result.combined_P[-1])
+    print("Średnia połączonych estymatów:", result.combined_estimated_y.mean())
 
-    print("Połączona wariancja:", combined_P[-1])
-    print("Średnia połączonych estymatów:", sum(combined_estimates_y)/len(combined_estimates_y))
-
-    signals.show_result(
-        signals_x=signals_x, 
-        signals_y=signals_y, 
-        noised_signals_y=signals.generate_noised_signals_on_sensor(signals_y),
-        # noised_signals_y=noised_signals_y_2,
-        taked_kalman_signals_x=signals_x[0::1], 
-        y_estimates_kalman=combined_estimates_y, 
-        sensor_id="Połączone"
-    )
-    
+def show_save_window(result):
+    """
+    Obserwator GUI: okno zapisu wyników symulacji
+    """
     save_root = tk.Toplevel()
     save_root.title("Zapisz symulację")
 
@@ -194,14 +116,14 @@ def show_random():
         save_root, 
         text="Zapisz", 
         command=lambda: save_data_to_json(
-            signals_x=signals_x,
-            signals_y=signals_y, 
-            noised_signals_y_1=noised_signals_y_1, 
-            noised_signals_y_2=noised_signals_y_2,
-            estimated_signals_y_1=estimated_signals_y_1,
-            estimated_signals_y_2=estimated_signals_y_2, 
-            combined_estimated_y=combined_estimates_y, 
-            kalman_step=kalman_step_1,
+            signals_x=result.signals_x.tolist(),
+            signals_y=result.signals_y.tolist(), 
+            noised_signals_y_1=result.noised_signals_y[0].tolist(), 
+            noised_signals_y_2=result.noised_signals_y[1].tolist(),
+            estimated_signals_y_1=result.estimated_signals_y[0].tolist(),
+            estimated_signals_y_2=result.estimated_signals_y[1].tolist(), 
+            combined_estimated_y=result.combined_estimated_y.tolist(), 
+            kalman_step=result.kalman_step,
             parent_window=save_root
         )
     )
@@ -213,16 +135,27 @@ def show_from_file():
 
     file_path = filedialog.askopenfilename(
         title="Wybierz plik JSON",
-        filetypes=[("Pliki JSON", "*.json")],
-        initialdir=r"C:\Users\yaros\PythonProjectrs\OurProjectNIDUC\dataFolder"
+        filetypes=[("Pliki symulacji", "*.json *.npz header.json"), ("Pliki JSON", "*.json"),
+                   ("Archiwum binarne", "*.npz"), ("Folder mapowany w pamięci", "header.json")],
+        initialdir=default_folder or data_folder
     )
         
     if file_path:
         print(f"Wybrano plik JSON: {file_path}")
         try:
-            with open(file_path, 'r') as file:
-                json_data = json.load(file)
-                sim.showSimulationFromFile(json_data)
+            # Archiwa binarne wczytują kolumny leniwie - ich odczyt liczy się do etapu wykresu
+            if os.path.basename(file_path) == "header.json":
+                with open_simulation_mmap(file_path) as archive, stage("plotting"):
+                    sim.showSimulationFromFile(archive)
+            elif file_path.endswith(".npz"):
+                with load_simulation_archive(file_path) as archive, stage("plotting"):
+                    sim.showSimulationFromFile(archive)
+            else:
+                with stage("io.load[json]") as load, open(file_path, 'r') as file:
+                    json_data = json.load(file)
+                    load.add_samples(sum(len(values) for values in json_data.values() if isinstance(values, list)))
+                with stage("plotting", samples=len(json_data["signals_y"])):
+                    sim.showSimulationFromFile(json_data)
         except Exception as e:
             print(f"Błąd odczytu pliku JSON: {e}")
     else:
@@ -296,6 +229,9 @@ def open_parameter_window():
 
 def main():
     main_screen()
+    # Raport etapów po zamknięciu okna (pomiary włączane zmienną KALMAN_INSTRUMENT=1)
+    if instrumentation.enabled():
+        print(instrumentation.format_report())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
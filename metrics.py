@@ -0,0 +1,266 @@
+import numpy as np
+
+# Pasma wysokości (według wysokości rzeczywistej): progi szumu procesu i przerwania filtracji
+ALTITUDE_BAND_LIMITS = (152.4, 762)
+ALTITUDE_BANDS = ("<=152.4", "152.4-762", ">762")
+
+
+def series_error_std(real_values, series):
+    """
+    Odchylenia standardowe błędów kilku serii względem tego samego sygnału rzeczywistego,
+    jednym wektorowym przebiegiem (bez osobnych kopii dla każdej serii)
+
+    Parametry:
+        real_values (list lub np.array): Rzeczywiste wartości sygnału.
+        series (list lub np.array): Serie wartości (serie x próbki).
+
+    Zwraca:
+        np.array: odchylenie standardowe błędu każdej serii (NaN pomijane).
+    """
+    errors = np.asarray(series, dtype=float) - np.asarray(real_values, dtype=float)
+    return np.nanstd(errors, axis=-1)
+
+def calculate_std_errors(real_values, noisy_values, filtered_values):
+    """
+Oblicza odchylenie standardowe błędów dla zaszumionego oraz odfiltrowanego sygnału.
+
+Parametry:
+    real_values (list lub np.array): Rzeczywiste wartości sygnału.
+    noisy_values (list lub np.array): Zaszumione wartości sygnału.
+    filtered_values (list lub np.array): Odfiltrowane wartości sygnału.
+
+Zwraca:
+    tuple: (std_noisy, std_filtered)
+        std_noisy    - odchylenie standardowe błędu zaszumionego sygnału,
+        std_filtered - odchylenie standardowe błędu odfiltrowanego sygnału.
+"""
+    real = np.asarray(real_values, dtype=float)
+
+    # Brakujące próbki uszkodzonego czujnika (NaN) są pomijane
+    std_noisy = np.nanstd(np.asarray(noisy_values, dtype=float) - real)
+    std_filtered = np.nanstd(np.asarray(filtered_values, dtype=float) - real)
+
+    return std_noisy, std_filtered
+
+def calculate_reduction_percentage(std_noisy, std_filtered):
+    """
+    Oblicza procentową redukcję odchylenia standardowego błędu.
+
+    Parametry:
+        std_noisy (float): odchylenie standardowe błędu zaszumionego sygnału.
+        std_filtered (float): odchylenie standardowe błędu odfiltrowanego sygnału.
+
+    Zwraca:
+        float: procentowa redukcja odchylenia standardowego, obliczana jako:
+               ((std_noisy - std_filtered) / std_noisy) * 100.
+               Jeśli std_noisy wynosi 0, zwraca 0.
+    """
+    if std_noisy != 0:
+        reduction_percentage = ((std_noisy - std_filtered) / std_noisy) * 100
+    else:
+        reduction_percentage = 0
+    return reduction_percentage
+
+
+def simulation_metrics(signals_y, noised_signals_y, estimated_signals_y, combined_estimated_y,
+                       combined_P=None, kalman_step=1):
+    """
+    Komplet statystyk symulacji (okno zapisu GUI, run_simulation, cli.py)
+
+    Parametry:
+        signals_y (list lub np.array): Idealne wartości wysokości.
+        noised_signals_y (list lub np.array): Zaszumione pomiary (czujniki x próbki).
+        estimated_signals_y (list lub np.array): Estymaty filtru (czujniki x próbki co kalman_step).
+        combined_estimated_y (list lub np.array): Połączona estymata.
+        combined_P (list lub np.array): Wariancja połączonej estymaty (opcjonalnie, do NEES).
+        kalman_step (int): Krok próbkowania filtracji.
+
+    Zwraca:
+        dict: std_noisy_i, std_filtered_i (i - numer czujnika od 1), std_filtered_combined,
+              reduction_percentage oraz combined_statistics (patrz error_statistics).
+    """
+    real = np.asarray(signals_y, dtype=float)[::kalman_step]
+    noised = np.asarray(noised_signals_y, dtype=float)[:, ::kalman_step]
+    estimated = np.asarray(estimated_signals_y, dtype=float)
+    combined = np.asarray(combined_estimated_y, dtype=float)
+
+    std_noisy = series_error_std(real, noised)
+    std_filtered = series_error_std(real, np.vstack([estimated, combined[None, :]]))
+
+    metrics = {}
+    for sensor in range(len(noised)):
+        metrics[f"std_noisy_{sensor + 1}"] = float(std_noisy[sensor])
+        metrics[f"std_filtered_{sensor + 1}"] = float(std_filtered[sensor])
+    metrics["std_filtered_combined"] = float(std_filtered[-1])
+    metrics["reduction_percentage"] = calculate_reduction_percentage(
+        metrics["std_noisy_1"], metrics["std_filtered_combined"])
+    metrics["combined_statistics"] = error_statistics(real, combined, combined_P)
+    return metrics
+
+
+class ErrorAccumulator:
+    """
+    Strumieniowe statystyki błędu estymacji (metoda Welforda w wersji dla paczek danych).
+    Przechowuje tylko sumy i momenty - nie całe serie - osobno dla całości i każdego
+    pasma wysokości. Akumulatory z równoległych procesów można łączyć metodą merge.
+    """
+    __slots__ = ("count", "mean", "M2", "max_abs", "nees_sum", "nees_count", "nis_sum", "nis_count")
+
+    def __init__(self):
+        groups = 1 + len(ALTITUDE_BANDS)  # Całość i pasma wysokości
+        self.count = np.zeros(groups)  # Liczba próbek
+        self.mean = np.zeros(groups)  # Średni błąd
+        self.M2 = np.zeros(groups)  # Suma kwadratów odchyleń od średniej
+        self.max_abs = np.zeros(groups)  # Największy błąd bezwzględny
+        self.nees_sum = np.zeros(groups)  # Suma błąd^2 / P
+        self.nees_count = np.zeros(groups)
+        self.nis_sum = 0.0  # Suma innowacja^2 / S
+        self.nis_count = 0
+
+    def _combine(self, count, mean, M2, max_abs):
+        """
+        Łączenie momentów (Chan i in.): średnia i M2 dwóch zbiorów bez ich przechowywania
+        """
+        total = self.count + count
+        delta = mean - self.mean
+        safe_total = np.where(total > 0, total, 1)
+        self.mean = self.mean + delta * count / safe_total
+        self.M2 = self.M2 + M2 + delta * delta * self.count * count / safe_total
+        self.count = total
+        self.max_abs = np.maximum(self.max_abs, max_abs)
+
+    def update(self, real_values, estimated_values, variances=None):
+        """
+        Dodaje paczkę próbek (dowolnej długości, także pojedynczą próbkę)
+
+        Parametry:
+            real_values (list lub np.array): Rzeczywiste wartości sygnału.
+            estimated_values (list lub np.array): Estymowane wartości sygnału.
+            variances (list lub np.array): Wariancje estymat P (opcjonalnie, do NEES).
+
+        Zwraca:
+            ErrorAccumulator: ten sam akumulator (do łączenia wywołań).
+        """
+        estimated = np.asarray(estimated_values, dtype=float)
+        shape = estimated.shape
+        real = np.ravel(np.broadcast_to(np.asarray(real_values, dtype=float), shape))
+        error = np.ravel(estimated) - real
+        valid = ~np.isnan(error)
+        error = error[valid]
+        real = real[valid]
+
+        # Grupa 0 - całość, 1.. - pasma wysokości
+        groups = np.digitize(real, ALTITUDE_BAND_LIMITS, right=True) + 1
+        n_groups = len(self.count)
+        count = np.bincount(groups, minlength=n_groups).astype(float)
+        count[0] = len(error)
+        sums = np.bincount(groups, weights=error, minlength=n_groups)
+        sums[0] = error.sum()
+        mean = sums / np.where(count > 0, count, 1)
+        deviation = error - mean[groups]
+        M2 = np.bincount(groups, weights=deviation * deviation, minlength=n_groups)
+        M2[0] = np.sum((error - mean[0]) ** 2)
+        max_abs = np.zeros(n_groups)
+        np.maximum.at(max_abs, groups, np.abs(error))
+        max_abs[0] = max_abs[1:].max()
+        self._combine(count, mean, M2, max_abs)
+
+        if variances is not None:
+            P = np.ravel(np.broadcast_to(np.asarray(variances, dtype=float), shape))[valid]
+            nees = error * error / P
+            used = np.isfinite(nees)
+            nees_sum = np.bincount(groups[used], weights=nees[used], minlength=n_groups)
+            nees_sum[0] = nees[used].sum()
+            nees_count = np.bincount(groups[used], minlength=n_groups).astype(float)
+            nees_count[0] = used.sum()
+            self.nees_sum += nees_sum
+            self.nees_count += nees_count
+        return self
+
+    def update_innovations(self, innovations, innovation_variances):
+        """
+        Dodaje innowacje filtru do statystyki NIS (nie wymaga sygnału rzeczywistego)
+
+        Parametry:
+            innovations (list lub np.array): Innowacje y = z - x_pred.
+            innovation_variances (list lub np.array): Wariancje innowacji S.
+
+        Zwraca:
+            ErrorAccumulator: ten sam akumulator.
+        """
+        y = np.ravel(np.asarray(innovations, dtype=float))
+        S = np.ravel(np.broadcast_to(np.asarray(innovation_variances, dtype=float), np.shape(innovations)))
+        nis = y * y / S
+        used = np.isfinite(nis)
+        self.nis_sum += float(nis[used].sum())
+        self.nis_count += int(used.sum())
+        return self
+
+    def merge(self, other):
+        """
+        Dołącza statystyki innego akumulatora (np. z innego procesu Monte-Carlo)
+
+        Parametry:
+            other (ErrorAccumulator): Akumulator do dołączenia.
+
+        Zwraca:
+            ErrorAccumulator: ten sam akumulator.
+        """
+        self._combine(other.count, other.mean, other.M2, other.max_abs)
+        self.nees_sum = self.nees_sum + other.nees_sum
+        self.nees_count = self.nees_count + other.nees_count
+        self.nis_sum += other.nis_sum
+        self.nis_count += other.nis_count
+        return self
+
+    def _group_result(self, group):
+        count = self.count[group]
+        if count == 0:
+            return {"count": 0, "bias": np.nan, "std": np.nan, "rmse": np.nan, "max_error": np.nan,
+                    "nees": np.nan}
+        variance = self.M2[group] / count
+        return {
+            "count": int(count),
+            "bias": float(self.mean[group]),
+            "std": float(np.sqrt(variance)),
+            "rmse": float(np.sqrt(variance + self.mean[group] ** 2)),
+            "max_error": float(self.max_abs[group]),
+            "nees": float(self.nees_sum[group] / self.nees_count[group]) if self.nees_count[group] else np.nan
+        }
+
+    def result(self):
+        """
+        Statystyki zebrane do tej pory
+
+        Zwraca:
+            dict: count, bias, std, rmse, max_error, nees (średnie błąd^2 / P, dla spójnego
+                  filtru ok. 1), nis (średnie y^2 / S) oraz "bands" - te same statystyki
+                  (bez nis) dla każdego pasma wysokości.
+        """
+        stats = self._group_result(0)
+        stats["nis"] = self.nis_sum / self.nis_count if self.nis_count else np.nan
+        stats["bands"] = {band: self._group_result(i + 1) for i, band in enumerate(ALTITUDE_BANDS)}
+        return stats
+
+
+def error_statistics(real_values, estimated_values, variances=None, innovations=None,
+                     innovation_variances=None):
+    """
+    Statystyki błędu estymacji jednym przebiegiem po tablicach: RMSE, błąd średni (bias),
+    odchylenie standardowe, błąd maksymalny, NEES/NIS oraz statystyki w pasmach wysokości
+    (<=152.4 m, 152.4-762 m, >762 m). Próbki NaN są pomijane.
+
+    Parametry:
+        real_values (list lub np.array): Rzeczywiste wartości sygnału.
+        estimated_values (list lub np.array): Estymowane wartości sygnału.
+        variances (list lub np.array): Wariancje estymat P (opcjonalnie, do NEES).
+        innovations (list lub np.array): Innowacje filtru (opcjonalnie, do NIS).
+        innovation_variances (list lub np.array): Wariancje innowacji S (wymagane z innovations).
+
+    Zwraca:
+        dict: jak ErrorAccumulator.result().
+    """
+    accumulator = ErrorAccumulator().update(real_values, estimated_values, variances)
+    if innovations is not None:
+        accumulator.update_innovations(innovations, innovation_variances)
+    return accumulator.result()
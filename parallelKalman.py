@@ -0,0 +1,216 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from filters import measurement_noise_for_speed
+
+
+def compose_mobius(later, earlier):
+    """
+    Złożenie przekształceń Möbiusa (iloczyn macierzy 2x2 later @ earlier).
+    Macierze są normalizowane - liczy się tylko ich stosunek, a wszystkie elementy są nieujemne.
+    """
+    a00, a01, a10, a11 = later
+    b00, b01, b10, b11 = earlier
+    c00 = a00 * b00 + a01 * b10
+    c01 = a00 * b01 + a01 * b11
+    c10 = a10 * b00 + a11 * b10
+    c11 = a10 * b01 + a11 * b11
+    norm = c00 + c01 + c10 + c11
+    return c00 / norm, c01 / norm, c10 / norm, c11 / norm
+
+
+def compose_affine(later, earlier):
+    """
+    Złożenie przekształceń afinicznych x -> a * x + b
+    """
+    a2, b2 = later
+    a1, b1 = earlier
+    return a2 * a1, a2 * b1 + b2
+
+
+MOBIUS_IDENTITY = (1.0, 0.0, 0.0, 1.0)
+AFFINE_IDENTITY = (1.0, 0.0)
+
+
+def associative_scan(parts, compose, identity, block=256):
+    """
+    Skan prefiksowy operatora łącznego w miejscu (praca O(n)).
+    Ciąg układany jest w tablicę (wiersze x block): rekursja biegnie wzdłuż kolumn
+    wektorowo dla wszystkich wierszy naraz, sumy wierszy skanowane są rekurencyjnie,
+    a na koniec każdy wiersz składany jest z prefiksem poprzednich wierszy.
+    Po skanie element k opisuje złożenie przekształceń 0..k.
+
+    Parametry:
+    parts (tuple): Tablice współczynników kolejnych przekształceń (modyfikowane w miejscu)
+    compose (function): Złożenie (późniejsze, wcześniejsze) -> współczynniki
+    identity (tuple): Współczynniki przekształcenia tożsamościowego (dopełnienie)
+    block (int): Długość wiersza
+    """
+    n = len(parts[0])
+    block = max(1, min(block, n))
+    rows = -(-n // block)
+    grid = []
+    for part, neutral in zip(parts, identity):
+        padded = np.full(rows * block, neutral)
+        padded[:n] = part
+        grid.append(padded.reshape(rows, block))
+
+    for j in range(1, block):
+        columns = compose(tuple(g[:, j] for g in grid), tuple(g[:, j - 1] for g in grid))
+        for g, column in zip(grid, columns):
+            g[:, j] = column
+
+    if rows > 1:
+        totals = tuple(g[:, -1].copy() for g in grid)
+        associative_scan(totals, compose, identity, block)
+        carried = compose(tuple(g[1:] for g in grid), tuple(t[:-1, None] for t in totals))
+        for g, values in zip(grid, carried):
+            g[1:] = values
+
+    for part, g in zip(parts, grid):
+        part[:] = g.reshape(-1)[:n]
+
+
+def _apply_mobius(m00, m01, m10, m11, P):
+    return (m00 * P + m01) / (m10 * P + m11)
+
+
+def _covariance_transforms(z, R, Q1, Q2):
+    """
+    Krok niepewności P filtru skalarnego jako przekształcenia Möbiusa dla każdej próbki
+
+    Parametry:
+    z (np.array): Pomiary (NaN - brak pomiaru)
+    R (float): Szum pomiarowy
+    Q1, Q2 (float): Szum procesu dla wysokości <= / > 152.4m
+
+    Zwraca:
+    tuple: Maski (missing, passthrough, update), c = R + Q oraz elementy macierzy m00, m01, m10, m11
+    """
+    # Reżimy próbek: przerwanie filtracji powyżej 762 m (tożsamość), brak pomiaru (sama predykcja),
+    # aktualizacja z szumem procesu zależnym od wysokości
+    missing = np.isnan(z)
+    passthrough = z > 762
+    update = ~missing & ~passthrough
+    c = R + np.where(z <= 152.4, Q1, Q2)
+
+    m00 = np.where(update, c, 1.0)
+    m01 = np.where(update, c * R, np.where(missing, R, 0.0))
+    m10 = np.where(update, 1.0, 0.0)
+    m11 = np.where(update, R + c, 1.0)
+    return missing, passthrough, update, c, m00, m01, m10, m11
+
+
+def covariance_trajectory(noised_signals_height, v: float, Q1=4.572, Q2=38.1, P0=1.0):
+    """
+    Niepewność P po każdej próbce bez przeliczania estymat.
+    P filtru skalarnego zależy tylko od reżimów próbek (brak pomiaru, 762 m, 152.4 m),
+    a nie od wartości estymat, więc jest liczona jednym skanem prefiksowym.
+
+    Parametry:
+    noised_signals_height: Zaszumione pomiary wysokości (NaN - brak pomiaru)
+    v (float): Stała prędkość (m/s)
+    Q1 (float): Szum procesu dla wysokości <= 152.4m
+    Q2 (float): Szum procesu dla wysokości > 152.4m
+    P0 (float): Początkowa niepewność estymacji
+
+    Zwraca:
+    np.array: Niepewności po każdej próbce (jak P_trajectory z KalmanFilter.run)
+    """
+    z = np.asarray(noised_signals_height, dtype=float)
+    _, _, _, _, m00, m01, m10, m11 = _covariance_transforms(z, measurement_noise_for_speed(v), Q1, Q2)
+    if len(z):
+        associative_scan((m00, m01, m10, m11), compose_mobius, MOBIUS_IDENTITY)
+    return _apply_mobius(m00, m01, m10, m11, P0)
+
+
+def kalman_filter_parallel(noised_signals_height, v: float, Q1=4.572, Q2=38.1,
+                           n_chunks=None, workers=None, return_P_trajectory=False):
+    """
+    Filtracja Kalmana jednego długiego toru równolegle w czasie.
+    Krok filtru skalarnego zapisany jest jako dwa operatory łączne:
+    niepewność P przekształceniem Möbiusa (macierz 2x2), a estymata x
+    przekształceniem afinicznym x -> (1 - K) * x + (1 - K) * B * v + K * z.
+    Tor dzielony jest na fragmenty liczone skanem prefiksowym w puli wątków;
+    stany na granicach fragmentów składane są sekwencyjnie (jedna operacja na fragment).
+    Wynik odpowiada KalmanFilter.run z dokładnością do błędów zaokrągleń.
+
+    Parametry:
+    noised_signals_height: Zaszumione pomiary wysokości (NaN - brak pomiaru)
+    v (float): Stała prędkość (m/s)
+    Q1 (float): Szum procesu dla wysokości <= 152.4m
+    Q2 (float): Szum procesu dla wysokości > 152.4m
+    n_chunks (int): Liczba fragmentów (domyślnie liczba wątków)
+    workers (int): Liczba wątków (domyślnie liczba rdzeni)
+    return_P_trajectory (bool): Czy zwrócić także niepewność po każdej próbce
+
+    Zwraca:
+    tuple: (x_estimates, P) lub (x_estimates, P, P_trajectory) - jak kalman_filter_batch dla jednego toru
+    """
+    z = np.asarray(noised_signals_height, dtype=float)
+    n = len(z)
+    if n == 0:
+        return (np.empty(0), 1.0, np.empty(0)) if return_P_trajectory else (np.empty(0), 1.0)
+    workers = workers or os.cpu_count() or 1
+    n_chunks = max(1, min(n_chunks or workers, n))
+    bounds = np.linspace(0, n, n_chunks + 1).astype(int)
+    chunks = list(zip(bounds[:-1], bounds[1:]))
+
+    R = measurement_noise_for_speed(v)
+    Bv = 0.05 * v
+    missing, passthrough, update, c, m00, m01, m10, m11 = _covariance_transforms(z, R, Q1, Q2)
+
+    # Początkowa wysokość - pierwszy dostępny pomiar
+    x0 = float(z[np.argmax(~missing)])
+    P0 = 1.0
+
+    P_trajectory = np.empty(n)
+    a = np.empty(n)
+    b = np.empty(n)
+
+    def scan_P(chunk):
+        start, stop = chunk
+        associative_scan((m00[start:stop], m01[start:stop], m10[start:stop], m11[start:stop]),
+                      compose_mobius, MOBIUS_IDENTITY)
+
+    def scan_x(chunk, P_start):
+        start, stop = chunk
+        cs = slice(start, stop)
+        P_trajectory[cs] = _apply_mobius(m00[cs], m01[cs], m10[cs], m11[cs], P_start)
+
+        # Wzmocnienie z niepewności przed próbką
+        P_prev = np.empty(stop - start)
+        P_prev[0] = P_start
+        P_prev[1:] = P_trajectory[start:stop - 1]
+        P_pred = P_prev + R
+        K = np.where(update[cs], P_pred / (P_pred + c[cs]), 0.0)
+        a[cs] = np.where(passthrough[cs], 1.0, 1.0 - K)
+        b[cs] = np.where(passthrough[cs], 0.0, (1.0 - K) * Bv + K * np.where(update[cs], z[cs], 0.0))
+        associative_scan((a[cs], b[cs]), compose_affine, AFFINE_IDENTITY)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Skan niepewności w każdym fragmencie, potem sekwencyjne przeniesienie między fragmentami
+        list(executor.map(scan_P, chunks))
+        P_starts = [P0]
+        for _, stop in chunks[:-1]:
+            P_starts.append(float(_apply_mobius(m00[stop - 1], m01[stop - 1],
+                                                m10[stop - 1], m11[stop - 1], P_starts[-1])))
+
+        # Skan estymat w każdym fragmencie, potem przeniesienie stanu x
+        list(executor.map(scan_x, chunks, P_starts))
+        x_starts = [x0]
+        for _, stop in chunks[:-1]:
+            x_starts.append(float(a[stop - 1] * x_starts[-1] + b[stop - 1]))
+
+        x_estimates = np.empty(n)
+
+        def finish(chunk, x_start):
+            cs = slice(*chunk)
+            x_estimates[cs] = np.where(passthrough[cs], z[cs], a[cs] * x_start + b[cs])
+
+        list(executor.map(finish, chunks, x_starts))
+
+    P = float(P_trajectory[-1])
+    if return_P_trajectory:
+        return x_estimates, P, P_trajectory
+    return x_estimates, P
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
+import signalsGeneratingShowing as signals
+from sensorFaults import inject_sensor_faults
+from simulationArchive import save_simulation_archive, load_simulation_archive
+
+SCENARIO_CACHE_VERSION = 1
+
+# Parametry sygnału z wartościami domyślnymi generate_true_signal_array (część klucza)
+SCENARIO_SIGNAL_DEFAULTS = {"speed": 2, "start_height": 0, "time_step": 0.05, "flight_time": 600}
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    Wygenerowane dane scenariusza (tablice tylko do odczytu - są współdzielone przez pamięć podręczną)
+    """
+    signals_x: np.ndarray  # Wartości czasu
+    signals_y: np.ndarray  # Idealne wartości wysokości
+    noised_signals_y: np.ndarray  # Zaszumione pomiary (czujniki x próbki)
+
+    @property
+    def nbytes(self):
+        return self.signals_x.nbytes + self.signals_y.nbytes + self.noised_signals_y.nbytes
+
+
+def scenario_key(signals_dict: dict, n_sensors, seed, damage_rate=0.0):
+    """
+    Klucz scenariusza: SHA-256 parametrów sygnału, liczby czujników, stopnia uszkodzenia i ziarna
+
+    Parametry:
+    signals_dict (dict): Parametry symulacji (brakujące - wartości domyślne generatora)
+    n_sensors (int): Liczba czujników
+    seed (int lub tuple): Ziarno generatora liczb losowych
+    damage_rate (float): Stopień uszkodzenia czujników (0 - czujniki sprawne)
+
+    Zwraca:
+    str: Skrót szesnastkowy lub None, gdy ziarno jest None (scenariusz losowy nie jest zapamiętywany)
+    """
+    if seed is None:
+        return None
+    content = {
+        "version": SCENARIO_CACHE_VERSION,
+        "signal": {key: float(signals_dict.get(key, default)) for key, default in SCENARIO_SIGNAL_DEFAULTS.items()},
+        "n_sensors": int(n_sensors),
+        "damage_rate": float(damage_rate),
+        "seed": np.atleast_1d(seed).tolist()
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def generate_scenario(signals_dict: dict, n_sensors=2, seed=None, damage_rate=0.0):
+    """
+    Generuje sygnał idealny i zaszumione pomiary czujników
+    (ta sama kolejność losowania co w simulationBuilder.run_simulation)
+
+    Parametry:
+    signals_dict (dict): Parametry symulacji
+    n_sensors (int): Liczba czujników
+    seed (int lub tuple): Ziarno generatora liczb losowych
+    damage_rate (float): Stopień uszkodzenia czujników (0 - czujniki sprawne)
+
+    Zwraca:
+    Scenario: Dane scenariusza
+    """
+    rng = np.random.default_rng(seed)
+    signals_x, signals_y = signals.generate_true_signal_array(signals_dict)
+    noised_signals_y = signals.generate_noised_signals_array(signals_y, n_sensors=n_sensors, rng=rng)
+    if damage_rate > 0:
+        noised_signals_y = inject_sensor_faults(noised_signals_y, damage_rate, rng=rng)
+    return _read_only(Scenario(signals_x, signals_y, noised_signals_y))
+
+
+def _read_only(scenario):
+    for array in (scenario.signals_x, scenario.signals_y, scenario.noised_signals_y):
+        array.flags.writeable = False
+    return scenario
+
+
+class ScenarioCache:
+    """
+    Pamięć podręczna scenariuszy adresowana treścią (scenario_key).
+    W pamięci - LRU ograniczone liczbą wpisów i rozmiarem; opcjonalnie na dysku
+    jako archiwa binarne .npz (simulationArchive), współdzielone między procesami.
+    """
+
+    def __init__(self, max_entries=16, max_bytes=512 * 2**20, folder=None):
+        """
+        :param max_entries: Największa liczba scenariuszy w pamięci
+        :param max_bytes: Największy łączny rozmiar tablic w pamięci [B]
+        :param folder: Folder archiwów na dysku (None - tylko pamięć)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.folder = folder
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def stats(self):
+        return {"entries": len(self._entries), "nbytes": self._nbytes,
+                "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def get(self, signals_dict: dict, n_sensors=2, seed=None, damage_rate=0.0):
+        """
+        Scenariusz z pamięci, z dysku albo nowo wygenerowany (i zapamiętany)
+
+        Parametry:
+        signals_dict, n_sensors, seed, damage_rate: Jak w generate_scenario
+
+        Zwraca:
+        Scenario: Dane scenariusza (seed None - zawsze nowy, niezapamiętywany)
+        """
+        key = scenario_key(signals_dict, n_sensors, seed, damage_rate)
+        if key is None:
+            return generate_scenario(signals_dict, n_sensors, seed, damage_rate)
+
+        with self._lock:
+            scenario = self._entries.get(key)
+            if scenario is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return scenario
+
+        scenario = self._load(key)
+        if scenario is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            scenario = generate_scenario(signals_dict, n_sensors, seed, damage_rate)
+            self._save(key, scenario, signals_dict)
+        self._insert(key, scenario)
+        return scenario
+
+    def _insert(self, key, scenario):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = scenario
+            self._nbytes += scenario.nbytes
+            # Usuwanie najdawniej używanych (najnowszy wpis zostaje, nawet gdy sam przekracza limit)
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or
+                                              (self.max_bytes is not None and self._nbytes > self.max_bytes)):
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"scenariusz_{key}.npz")
+
+    def _load(self, key):
+        if self.folder is None or not os.path.exists(self._path(key)):
+            return None
+        with load_simulation_archive(self._path(key)) as archive:
+            return _read_only(Scenario(archive["signals_x"], archive["signals_y"], archive["noised_signals_y"]))
+
+    def _save(self, key, scenario, signals_dict):
+        if self.folder is None:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        # Zapis do pliku tymczasowego i podmiana - równoległe procesy nie widzą niepełnych archiwów
+        temporary = f"{self._path(key)}.{os.getpid()}.tmp"
+        save_simulation_archive(temporary, {"signals_x": scenario.signals_x, "signals_y": scenario.signals_y,
+                                            "noised_signals_y": scenario.noised_signals_y},
+                                simulation_signal_dict=dict(signals_dict), compress=False)
+        os.replace(temporary, self._path(key))
+
+
+_process_caches = {}
+
+
+def process_cache(folder=None):
+    """
+    Wspólna pamięć podręczna procesu (np. procesu roboczego przeglądu) dla danego folderu dyskowego
+    """
+    if folder not in _process_caches:
+        _process_caches[folder] = ScenarioCache(folder=folder)
+    return _process_caches[folder]
@@ -0,0 +1,90 @@
+import numpy as np
+
+# Domyślny udział poszczególnych typów uszkodzeń w całkowitym stopniu uszkodzenia
+default_fault_mix = {
+    "dropout": 0.35,  # Pojedyncze brakujące próbki (NaN)
+    "outage": 0.25,  # Seryjne przerwy w pomiarach (bloki NaN)
+    "spike": 0.2,  # Impulsowe zakłócenia
+    "stuck": 0.15,  # Zamrożona wartość pomiaru
+    "drift": 0.05  # Narastający dryf pomiaru
+}
+
+
+def _burst_mask(shape, share, mean_burst_length, rng):
+    """
+    Losuje odcinki uszkodzeń o geometrycznie rozłożonej długości
+
+    Parametry:
+    shape (tuple): Kształt (czujniki, próbki)
+    share (float): Docelowy udział próbek objętych uszkodzeniem
+    mean_burst_length (float): Średnia długość odcinka w próbkach
+    rng (np.random.Generator): Generator liczb losowych
+
+    Zwraca:
+    tuple: (mask, last_start) - maska uszkodzonych próbek oraz indeks
+           początku odcinka, do którego należy każda próbka
+    """
+    n_samples = shape[1]
+    starts = rng.random(shape) < share / mean_burst_length
+    lengths = rng.geometric(1 / mean_burst_length, shape)
+
+    # Różnicowa reprezentacja odcinków: +1 na początku, -1 za końcem
+    rows, cols = np.nonzero(starts)
+    coverage = np.zeros((shape[0], n_samples + 1), dtype=np.int32)
+    np.add.at(coverage, (rows, cols), 1)
+    np.add.at(coverage, (rows, np.minimum(cols + lengths[rows, cols], n_samples)), -1)
+    mask = np.cumsum(coverage[:, :n_samples], axis=1) > 0
+
+    start_index = np.where(starts, np.arange(n_samples), 0)
+    last_start = np.maximum.accumulate(start_index, axis=1)
+    return mask, last_start
+
+
+def inject_sensor_faults(noised_signals_y, damage_rate, rng=None, fault_mix=None,
+                         mean_burst_length=40, spike_amplitude=0.5, drift_rate=0.05):
+    """
+    Wektorowo wprowadza uszkodzenia czujnika do zaszumionych pomiarów.
+
+    Parametry:
+    noised_signals_y (list lub np.array): Pomiary, kształt (próbki,) lub (czujniki, próbki)
+    damage_rate (float): Stopień uszkodzenia - udział uszkodzonych próbek (0-1)
+    rng (np.random.Generator lub int): Generator liczb losowych lub ziarno
+    fault_mix (dict): Udział typów uszkodzeń (klucze jak w default_fault_mix)
+    mean_burst_length (float): Średnia długość przerw, zamrożeń i dryfu w próbkach
+    spike_amplitude (float): Względna amplituda impulsów (część mierzonej wysokości)
+    drift_rate (float): Przyrost dryfu na próbkę [m]
+
+    Zwraca:
+    np.array: Uszkodzone pomiary (brakujące próbki jako NaN), kształt jak na wejściu
+    """
+    rng = np.random.default_rng(rng)
+    fault_mix = default_fault_mix if fault_mix is None else fault_mix
+    signals = np.array(noised_signals_y, dtype=float)
+    single_sensor = signals.ndim == 1
+    signals = np.atleast_2d(signals)
+    shape = signals.shape
+
+    def share(fault):
+        return damage_rate * fault_mix.get(fault, 0.0)
+
+    # Dryf: przesunięcie narastające od początku odcinka, o losowym znaku
+    mask, last_start = _burst_mask(shape, share("drift"), mean_burst_length, rng)
+    direction = rng.choice([-1.0, 1.0], shape)
+    direction = np.take_along_axis(direction, last_start, axis=1)
+    signals += np.where(mask, direction * drift_rate * (np.arange(shape[1]) - last_start), 0.0)
+
+    # Zamrożenie: przez cały odcinek czujnik podaje wartość z jego początku
+    mask, last_start = _burst_mask(shape, share("stuck"), mean_burst_length, rng)
+    signals = np.where(mask, np.take_along_axis(signals, last_start, axis=1), signals)
+
+    # Impulsy: pojedyncze próbki odchylone o część mierzonej wysokości (min. 10 m)
+    mask = rng.random(shape) < share("spike")
+    magnitude = spike_amplitude * rng.uniform(0.5, 1.5, shape) * np.maximum(np.abs(signals), 10.0)
+    signals = np.where(mask, signals + rng.choice([-1.0, 1.0], shape) * magnitude, signals)
+
+    # Brakujące próbki: pojedyncze oraz seryjne przerwy
+    mask = rng.random(shape) < share("dropout")
+    mask |= _burst_mask(shape, share("outage"), mean_burst_length, rng)[0]
+    signals[mask] = np.nan
+
+    return signals[0] if single_sensor else signals
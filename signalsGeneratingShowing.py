@@ -1,6 +1,5 @@
 import numpy as np
-import random
-import matplotlib.pyplot as plt
+from sensorFaults import inject_sensor_faults
 
 
 
@@ -16,26 +15,31 @@ def generate_true_signal(signals_dict: dict):
         - time_step: krok czasowy [s]
         - flight_time: całkowity czas lotu [s]
     """
-    signals_x = []
-    signals_y = []
+    signals_x, signals_y = generate_true_signal_array(signals_dict)
+    return signals_x.tolist(), signals_y.tolist()
+
+def generate_true_signal_array(signals_dict: dict):
+    """
+    Wektorowa wersja generate_true_signal zwracająca tablice NumPy.
     
+    Parametry:
+    signals_dict (dict): Słownik parametrów symulacji (jak w generate_true_signal)
+    
+    Zwraca:
+    tuple: (signals_x, signals_y) - tablice czasu i idealnej wysokości
+    """
     height_changes_speed = signals_dict.get("speed", 2)
     start_height = signals_dict.get("start_height", 0)
     time_step = signals_dict.get("time_step", 0.05)
     flight_time = signals_dict.get("flight_time", 600)
 
     max_steps = int(flight_time / time_step)
+
+    signals_x = np.round(time_step * np.arange(max_steps), 3)
+    calculated_y = start_height + height_changes_speed * signals_x
     
-    
-    for i in range(max_steps):
-        current_time = round(time_step * i, 3)
-        calculated_y = start_height + height_changes_speed * current_time
-        
-        # Obcinamy wartości ujemne do zera
-        current_y = max(calculated_y, 0.0)
-        
-        signals_y.append(round(current_y, 3))
-        signals_x.append(current_time)
+    # Obcinamy wartości ujemne do zera
+    signals_y = np.round(np.maximum(calculated_y, 0.0), 3)
 
     return signals_x, signals_y
 
@@ -49,40 +53,108 @@ def generate_noised_signals_on_sensor(signals_y):
     Zwraca:
     list: Zaszumione pomiary wysokości
     """
-    noised_signals_y = []
+    return generate_noised_signals_array(signals_y).tolist()
+
+def generate_noised_signals_array(signals_y, n_sensors=None, rng=None):
+    """
+    Wektorowo generuje zaszumione pomiary radarowe dla jednego lub wielu czujników.
+    
+    Parametry:
+    signals_y (list lub np.array): Idealne wartości wysokości
+    n_sensors (int): Liczba niezależnych czujników; None - jeden czujnik (tablica 1-D)
+    rng (np.random.Generator lub int): Generator liczb losowych lub ziarno
+    
+    Zwraca:
+    np.array: Zaszumione pomiary, kształt (próbki,) lub (n_sensors, próbki)
+    """
+    rng = np.random.default_rng(rng)
+    signals_y = np.asarray(signals_y, dtype=float)
     radar_noise_under_152_4m = 0.03  # Szum poniżej 152.4 m (3%)
     radar_noise_higher_152_4m = 0.05  # Szum powyżej 152.4 m (5%)
 
-    for signal in signals_y:
-        if signal <= 152.4:
-            noise = random.uniform(-radar_noise_under_152_4m, radar_noise_under_152_4m)
-        elif 152.4 < signal <= 762:
-            noise = random.uniform(-radar_noise_higher_152_4m, radar_noise_higher_152_4m)
-        else:
-            noise = 0  # Brak szumu powyżej 762 m
-        noised_signal = round(signal + signal * noise, 3)
-        noised_signals_y.append(noised_signal)
+    # Amplituda szumu wybierana maskami; brak szumu powyżej 762 m
+    amplitude = np.where(signals_y <= 152.4, radar_noise_under_152_4m,
+                         np.where(signals_y <= 762, radar_noise_higher_152_4m, 0.0))
 
-    return noised_signals_y
+    shape = signals_y.shape if n_sensors is None else (n_sensors,) + signals_y.shape
+    noise = rng.uniform(-1.0, 1.0, shape) * amplitude
+    return np.round(signals_y + signals_y * noise, 3)
 
 
-def generate_noised_signals_on_damaged_sensor(signals_y):
-    noised_signals_y = []
-    radar_noise_under_152_4m = 0.03  # Szum poniżej 152.4 m (3%)
-    radar_noise_higher_152_4m = 0.05  # Szum powyżej 152.4 m (5%)
-
-    for signal in signals_y:
-        if signal <= 152.4:
-            noise = random.uniform(-radar_noise_under_152_4m, radar_noise_under_152_4m)
-        elif 152.4 < signal <= 762:
-            noise = random.uniform(-radar_noise_higher_152_4m, radar_noise_higher_152_4m)
-        else:
-            noise = 0  # Brak szumu powyżej 762 m
-        noised_signal = round(signal + signal * noise, 3)
-        noised_signals_y.append(noised_signal)
+def generate_noised_signals_on_damaged_sensor(signals_y, damage_rate=0.25, rng=None):
+    """
+    Generuje zaszumione pomiary uszkodzonego czujnika (braki, impulsy, zamrożenia, dryf).
+    
+    Parametry:
+    signals_y (list): Lista idealnych wartości wysokości
+    damage_rate (float): Stopień uszkodzenia czujnika (0-1)
+    rng (np.random.Generator lub int): Generator liczb losowych lub ziarno
+    
+    Zwraca:
+    list: Zaszumione pomiary wysokości (brakujące próbki jako NaN)
+    """
+    rng = np.random.default_rng(rng)
+    noised_signals_y = generate_noised_signals_array(signals_y, rng=rng)
+    return inject_sensor_faults(noised_signals_y, damage_rate, rng=rng).tolist()
 
-    return noised_signals_y
 
+def minmax_decimation_indices(signals_y, max_points=5000, chunk_samples=1_000_000):
+    """
+    Indeksy próbek pozostających po decymacji min/max: z każdego przedziału
+    zostają wartość minimalna i maksymalna (w kolejności wystąpienia), więc
+    kształt i skoki sygnału są zachowane. Dane przetwarzane są blokami, co
+    ogranicza zużycie pamięci także dla tablic mapowanych w pamięci.
+    
+    Parametry:
+    signals_y (list lub np.array): Wartości sygnału
+    max_points (int): Maksymalna liczba punktów wynikowych
+    chunk_samples (int): Przybliżona liczba próbek przetwarzanych w jednym bloku
+    
+    Zwraca:
+    np.array: Rosnące indeksy wybranych próbek
+    """
+    n = len(signals_y)
+    if n <= max_points:
+        return np.arange(n)
+
+    bin_size = -(-n // (max_points // 2))
+    n_full = n // bin_size
+    chunk_bins = max(1, chunk_samples // bin_size)
+    indices = []
+    for first_bin in range(0, n_full, chunk_bins):
+        last_bin = min(first_bin + chunk_bins, n_full)
+        block = np.asarray(signals_y[first_bin * bin_size:last_bin * bin_size], dtype=float)
+        block = block.reshape(-1, bin_size)
+        # NaN (brak pomiaru) nie może wygrać ani minimum, ani maksimum
+        nan = np.isnan(block)
+        offsets = np.arange(first_bin, last_bin) * bin_size
+        i_min = np.argmin(np.where(nan, np.inf, block), axis=1) + offsets
+        i_max = np.argmax(np.where(nan, -np.inf, block), axis=1) + offsets
+        indices.append(np.sort(np.stack([i_min, i_max], axis=1), axis=1).ravel())
+
+    # Niepełny ostatni przedział
+    if n_full * bin_size < n:
+        tail = np.asarray(signals_y[n_full * bin_size:], dtype=float)
+        nan = np.isnan(tail)
+        tail_indices = [np.argmin(np.where(nan, np.inf, tail)), np.argmax(np.where(nan, -np.inf, tail))]
+        indices.append(np.sort(tail_indices) + n_full * bin_size)
+
+    return np.concatenate(indices)
+
+def minmax_decimate(signals_x, signals_y, max_points=5000):
+    """
+    Decymacja min/max sygnału do wykresu (patrz minmax_decimation_indices)
+    
+    Parametry:
+    signals_x (list lub np.array): Wartości czasu
+    signals_y (list lub np.array): Wartości sygnału
+    max_points (int): Maksymalna liczba punktów wynikowych
+    
+    Zwraca:
+    tuple: (x, y) - tablice po decymacji
+    """
+    indices = minmax_decimation_indices(signals_y, max_points)
+    return np.asarray(signals_x)[indices], np.asarray(signals_y)[indices]
 
 def show_signal(signals_x, signals_y, 
                 xlabel="Czas (s)", 
@@ -95,6 +167,8 @@ def show_signal(signals_x, signals_y,
     signals_x (list): Wartości czasu
     signals_y (list): Wartości wysokości
     """
+    import matplotlib.pyplot as plt  # Import leniwy - generowanie sygnałów nie wymaga matplotlib
+
     plt.plot(signals_x, signals_y)
     plt.xlabel(xlabel)
     plt.ylabel(ylabel)
@@ -111,6 +185,8 @@ def show_result(signals_x, signals_y, noised_signals_y,
     Parametry:
     sensor_id (str): Identyfikator czujnika
     """
+    import matplotlib.pyplot as plt
+
     plt.plot(signals_x, signals_y, label="Sygnał idealny")
     plt.plot(signals_x, noised_signals_y, label="Sygnał zaszumiony")
     plt.plot(taked_kalman_signals_x, y_estimates_kalman, label="Sygnał przefiltrowany")
@@ -122,13 +198,18 @@ def show_result(signals_x, signals_y, noised_signals_y,
     plt.show()
 
 def show_result_json(signals_x, signals_y, noised_signals_y, 
-                    taked_kalman_signals_x, y_estimates_kalman):
+                    taked_kalman_signals_x, y_estimates_kalman, y_smoothed=None):
     """
     Wizualizacja wyników z pliku JSON
+    (y_smoothed - opcjonalne estymaty wygładzone, w tych samych chwilach co y_estimates_kalman)
     """
+    import matplotlib.pyplot as plt
+
     plt.plot(signals_x, signals_y, label="Sygnał idealny")
     plt.plot(signals_x, noised_signals_y, label="Sygnał zaszumiony")
     plt.plot(taked_kalman_signals_x, y_estimates_kalman, label="Sygnał przefiltrowany")
+    if y_smoothed is not None:
+        plt.plot(taked_kalman_signals_x, y_smoothed, label="Sygnał wygładzony (RTS)")
     plt.xlabel("Czas (s)")
     plt.ylabel("Wysokość (m)")
     plt.title("Połączone przefiltrowane sygnały")
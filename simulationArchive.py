@@ -0,0 +1,336 @@
+import json
+import os
+import numpy as np
+from instrumentation import stage
+
+ARCHIVE_FORMAT_VERSION = 1
+HEADER_KEY = "__header__"  # Nazwa elementu archiwum z nagłówkiem JSON
+
+# Kolumny zapisywane przez main.save_data_to_json
+SIMULATION_COLUMNS = (
+    "signals_y",
+    "signals_x",
+    "noised_signals_y_1",
+    "noised_signals_y_2",
+    "estimated_signals_y_1",
+    "estimated_signals_y_2",
+    "combined_estimated_y"
+)
+
+# Parametry symulacji zapisywane w pliku szczegóły_symulacji.txt
+SIMULATION_PARAMETERS = ("speed", "start_height", "time_step", "flight_time")
+
+
+def save_simulation_archive(path, data: dict, simulation_signal_dict=None,
+                            dtype=np.float64, compress=True):
+    """
+    Zapisuje symulację w kolumnowym formacie binarnym (.npz)
+
+    Parametry:
+    path (str): Ścieżka pliku .npz
+    data (dict): Kolumny symulacji (jak w pliku JSON) oraz opcjonalnie kalman_step
+    simulation_signal_dict (dict): Parametry symulacji zapisywane w nagłówku
+    dtype: Typ kolumn (np.float64 lub np.float32)
+    compress (bool): Czy kompresować kolumny (zip deflate)
+    """
+    columns = {name: np.asarray(values, dtype=dtype)
+               for name, values in data.items() if name != "kalman_step"}
+    header = {
+        "format_version": ARCHIVE_FORMAT_VERSION,
+        "simulation_signal_dict": simulation_signal_dict,
+        "kalman_step": data.get("kalman_step", 1),
+        "columns": list(columns),
+        "dtype": np.dtype(dtype).name
+    }
+    columns[HEADER_KEY] = np.frombuffer(json.dumps(header, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+
+    savez = np.savez_compressed if compress else np.savez
+    with open(path, "wb") as f:
+        savez(f, **columns)
+
+
+class SimulationArchive:
+    """
+    Symulacja wczytana z archiwum binarnego.
+    Kolumny wczytywane są leniwie - dopiero przy pierwszym odwołaniu.
+    Obsługuje ten sam dostęp po kluczach co słownik z pliku JSON.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Ścieżka pliku .npz
+        """
+        self.path = path
+        self._npz = np.load(path, allow_pickle=False)
+        self.header = json.loads(self._npz[HEADER_KEY].tobytes().decode("utf-8"))
+        self._cache = {}
+
+    @property
+    def columns(self):
+        return list(self.header["columns"])
+
+    @property
+    def kalman_step(self):
+        return self.header["kalman_step"]
+
+    @property
+    def simulation_signal_dict(self):
+        return self.header["simulation_signal_dict"]
+
+    def __getitem__(self, name):
+        if name == "kalman_step":
+            return self.kalman_step
+        if name not in self._cache:
+            if name not in self.header["columns"]:
+                raise KeyError(name)
+            self._cache[name] = self._npz[name]
+        return self._cache[name]
+
+    def __contains__(self, name):
+        return name == "kalman_step" or name in self.header["columns"]
+
+    def keys(self):
+        return self.columns + ["kalman_step"]
+
+    def close(self):
+        self._npz.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_simulation_archive(path):
+    """
+    Otwiera archiwum binarne symulacji
+
+    Parametry:
+    path (str): Ścieżka pliku .npz
+
+    Zwraca:
+    SimulationArchive: Archiwum z leniwie wczytywanymi kolumnami
+    """
+    return SimulationArchive(path)
+
+
+def write_simulation_details(txt_path, simulation_signal_dict: dict, metrics: dict):
+    """
+    Zapisuje parametry i wyniki statystyczne symulacji do pliku szczegóły_symulacji.txt
+
+    Parametry:
+    txt_path (str): Ścieżka pliku tekstowego
+    simulation_signal_dict (dict): Parametry symulacji
+    metrics (dict): Statystyki z metrics.simulation_metrics
+    """
+    ordinals = {1: "pierwszym sensorze", 2: "drugim sensorze"}
+    n_sensors = sum(1 for key in metrics if key.startswith("std_noisy_"))
+    combined_statistics = metrics.get("combined_statistics")
+
+    with open(txt_path, 'w', encoding='utf-8') as f:
+        for key, value in simulation_signal_dict.items():
+            f.write(f"{key}: {value}\n")
+        f.write("Wyniki statystyczne:")
+        for sensor in range(1, n_sensors + 1):
+            name = ordinals.get(sensor, f"sensorze nr {sensor}")
+            f.write(f"\nOdchylenie standardowe sygnałów zaszumowanych na {name}: {metrics[f'std_noisy_{sensor}']}")
+            f.write(f"\nOdchylenie standardowe sygnałów odfiltrowanych na {name}: {metrics[f'std_filtered_{sensor}']}")
+        f.write(f"\nOdchylenie standardowe sygnałów odfiltrowanych na połączonych sensorach: {metrics['std_filtered_combined']}")
+        f.write(f"\nProcentowa redukcja odchylenia standardowego: {metrics['reduction_percentage']:.2f}%")
+        if combined_statistics:
+            f.write(f"\nBłąd średniokwadratowy (RMSE) połączonych sensorów: {combined_statistics['rmse']}")
+            f.write(f"\nBłąd średni (bias) połączonych sensorów: {combined_statistics['bias']}")
+            f.write(f"\nBłąd maksymalny połączonych sensorów: {combined_statistics['max_error']}")
+            for band, band_statistics in combined_statistics["bands"].items():
+                f.write(f"\nOdchylenie standardowe połączonych sensorów dla wysokości {band} m: "
+                        f"{band_statistics['std']}")
+
+
+def save_simulation_data(path, data: dict, simulation_signal_dict=None):
+    """
+    Zapisuje kolumny symulacji jako JSON lub archiwum binarne - według rozszerzenia pliku
+
+    Parametry:
+    path (str): Ścieżka pliku (.json lub .npz)
+    data (dict): Kolumny symulacji oraz kalman_step
+    simulation_signal_dict (dict): Parametry symulacji (nagłówek archiwum binarnego)
+    """
+    samples = sum(len(values) for name, values in data.items() if name != "kalman_step")
+    file_format = "npz" if path.endswith(".npz") else "json"
+    with stage(f"io.save[{file_format}]", samples=samples):
+        if file_format == "npz":
+            save_simulation_archive(path, data, simulation_signal_dict=simulation_signal_dict)
+        else:
+            data = {name: values.tolist() if isinstance(values, np.ndarray) else values
+                    for name, values in data.items()}
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+def read_simulation_details(txt_path):
+    """
+    Odczytuje parametry symulacji z pliku szczegóły_symulacji.txt
+
+    Parametry:
+    txt_path (str): Ścieżka pliku tekstowego
+
+    Zwraca:
+    dict: Parametry symulacji (speed, start_height, time_step, flight_time)
+    """
+    parameters = {}
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key.strip() in SIMULATION_PARAMETERS:
+                parameters[key.strip()] = float(value)
+    return parameters
+
+
+def convert_json_to_archive(json_path, archive_path=None, dtype=np.float64, compress=True, layout="npz"):
+    """
+    Konwertuje zapisany plik symulacja.json do archiwum binarnego.
+    Parametry symulacji pobierane są z pliku szczegóły_symulacji.txt
+    w tym samym folderze, jeśli istnieje.
+
+    Parametry:
+    json_path (str): Ścieżka pliku JSON
+    archive_path (str): Ścieżka wynikowa (domyślnie ta sama nazwa z rozszerzeniem .npz)
+    dtype: Typ kolumn (np.float64 lub np.float32)
+    compress (bool): Czy kompresować kolumny (tylko układ "npz")
+    layout (str): "npz" - pojedynczy plik, "folder" - folder do mapowania w pamięci
+
+    Zwraca:
+    str: Ścieżka utworzonego archiwum
+    """
+    if archive_path is None:
+        archive_path = os.path.splitext(json_path)[0] + (".npz" if layout == "npz" else "")
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    details_path = os.path.join(os.path.dirname(json_path), "szczegóły_symulacji.txt")
+    simulation_signal_dict = read_simulation_details(details_path) if os.path.exists(details_path) else None
+
+    if layout == "npz":
+        save_simulation_archive(archive_path, data, simulation_signal_dict, dtype=dtype, compress=compress)
+    elif layout == "folder":
+        save_simulation_folder(archive_path, data, simulation_signal_dict, dtype=dtype)
+    else:
+        raise ValueError(f"Nieznany układ archiwum: {layout}")
+    return archive_path
+
+
+def save_simulation_folder(path, data: dict, simulation_signal_dict=None, dtype=np.float64):
+    """
+    Zapisuje symulację jako folder z nagłówkiem header.json i jednym plikiem .npy
+    na kolumnę. Ten układ można otwierać jako tablice mapowane w pamięci.
+
+    Parametry:
+    path (str): Ścieżka folderu (zostanie utworzony)
+    data (dict): Kolumny symulacji oraz opcjonalnie kalman_step
+    simulation_signal_dict (dict): Parametry symulacji zapisywane w nagłówku
+    dtype: Typ kolumn (np.float64 lub np.float32)
+    """
+    os.makedirs(path, exist_ok=True)
+    columns = [name for name in data if name != "kalman_step"]
+    for name in columns:
+        np.save(os.path.join(path, f"{name}.npy"), np.asarray(data[name], dtype=dtype))
+
+    header = {
+        "format_version": ARCHIVE_FORMAT_VERSION,
+        "simulation_signal_dict": simulation_signal_dict,
+        "kalman_step": data.get("kalman_step", 1),
+        "columns": columns,
+        "dtype": np.dtype(dtype).name
+    }
+    with open(os.path.join(path, "header.json"), 'w', encoding='utf-8') as f:
+        json.dump(header, f, indent=4, ensure_ascii=False)
+
+
+class MappedSimulation(SimulationArchive):
+    """
+    Symulacja z folderu otwarta jako tablice mapowane w pamięci.
+    Odczyt zakresu czasu dotyka tylko potrzebnego fragmentu plików.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Ścieżka folderu utworzonego przez save_simulation_folder
+        """
+        self.path = path
+        with open(os.path.join(path, "header.json"), 'r', encoding='utf-8') as f:
+            self.header = json.load(f)
+        self._cache = {}
+
+    def __getitem__(self, name):
+        if name == "kalman_step":
+            return self.kalman_step
+        if name not in self._cache:
+            if name not in self.header["columns"]:
+                raise KeyError(name)
+            self._cache[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return self._cache[name]
+
+    def time_range(self, t_start=None, t_end=None):
+        """
+        Zakres indeksów próbek dla przedziału czasu [t_start, t_end].
+        Wyszukiwanie binarne po signals_x czyta tylko kilka stron pliku.
+
+        Zwraca:
+        slice: Wycinek indeksów próbek
+        """
+        signals_x = self["signals_x"]
+        start = 0 if t_start is None else int(np.searchsorted(signals_x, t_start, side="left"))
+        stop = len(signals_x) if t_end is None else int(np.searchsorted(signals_x, t_end, side="right"))
+        return slice(start, stop)
+
+    def kalman_range(self, t_start=None, t_end=None):
+        """
+        Zakres indeksów kroków filtru (jedna estymata na kalman_step próbek) dla przedziału czasu -
+        estymaty próbek z time_range, tak jak w simulationBuilder.showSimulationFromFile
+
+        Zwraca:
+        slice: Wycinek indeksów kolumn estymat
+        """
+        selected = self.time_range(t_start, t_end)
+        kalman_step = self.kalman_step
+        return slice(-(-selected.start // kalman_step), -(-selected.stop // kalman_step))
+
+    def window(self, t_start=None, t_end=None, columns=None):
+        """
+        Widoki kolumn dla przedziału czasu (bez kopiowania danych).
+        Kolumny z jedną wartością na próbkę wycinane są według time_range, a kolumny
+        estymat (jedna wartość na kalman_step próbek) - według kalman_range.
+
+        Parametry:
+        t_start (float): Początek przedziału [s] (None - od początku)
+        t_end (float): Koniec przedziału [s] (None - do końca)
+        columns (list): Wybrane kolumny (domyślnie wszystkie)
+
+        Zwraca:
+        dict: {kolumna: widok tablicy mapowanej}
+        """
+        selected = self.time_range(t_start, t_end)
+        kalman_selected = self.kalman_range(t_start, t_end)
+        n_samples = len(self["signals_x"])
+        return {name: self[name][selected if len(self[name]) == n_samples else kalman_selected]
+                for name in (columns or self.columns)}
+
+    def close(self):
+        self._cache.clear()
+
+
+def open_simulation_mmap(path):
+    """
+    Otwiera folder symulacji jako tablice mapowane w pamięci
+
+    Parametry:
+    path (str): Ścieżka folderu (lub pliku header.json w tym folderze)
+
+    Zwraca:
+    MappedSimulation: Symulacja z leniwie mapowanymi kolumnami
+    """
+    if os.path.basename(path) == "header.json":
+        path = os.path.dirname(path)
+    return MappedSimulation(path)
@@ -1,9 +1,125 @@
-from filters import KalmanFilter as KF
+from dataclasses import dataclass, field
+import numpy as np
+from filters import KalmanFilter as KF, kalman_filter_tracks
 import signalsGeneratingShowing as signals
-import pandas as pd
-import json
+from fusion import fuse_estimates
+from metrics import simulation_metrics
+from smoothers import smooth_estimates
+from instrumentation import stage
+from scenarioCache import generate_scenario
 
-def KalmanSimulation(signals_dict: dict, signals_x, signals_y, sensor_id, Q1=4.572, Q2=38.1, sensor_damaged=False):
+
+@dataclass
+class SimulationResult:
+    """
+    Wynik bezobsługowej symulacji (bez wykresów i okien)
+    """
+    signals_dict: dict  # Parametry symulacji
+    signals_x: np.ndarray  # Wartości czasu
+    signals_y: np.ndarray  # Idealne wartości wysokości
+    noised_signals_y: np.ndarray  # Zaszumione pomiary (czujniki x próbki)
+    estimated_signals_y: np.ndarray  # Estymaty filtru (czujniki x próbki)
+    P: np.ndarray  # Końcowa niepewność dla każdego czujnika
+    P_trajectory: np.ndarray  # Niepewność po każdej próbce (czujniki x próbki)
+    combined_estimated_y: np.ndarray  # Połączone estymaty czujników
+    combined_P: np.ndarray  # Wariancja połączonej estymaty po każdej próbce
+    kalman_step: int = 1  # Krok próbkowania dla filtracji
+    metrics: dict = field(default_factory=dict)  # Statystyki błędów
+
+
+def run_simulation(signals_dict: dict, n_sensors=2, Q1=4.572, Q2=38.1,
+                   sensor_damaged=False, damage_rate=0.25, seed=None, observers=(), cache=None, robust=False):
+    """
+    Bezobsługowy przebieg symulacji: generowanie -> szum -> filtracja -> łączenie -> metryki.
+    Nie importuje matplotlib ani tkinter; wykresy i GUI można dołączyć jako obserwatorów.
+    
+    Parametry:
+    signals_dict (dict): Słownik parametrów symulacji
+    n_sensors (int): Liczba czujników
+    Q1 (float): Szum procesu dla niskich wysokości
+    Q2 (float): Szum procesu dla wysokich wysokości
+    sensor_damaged (bool): Czy symulować uszkodzone czujniki
+    damage_rate (float): Stopień uszkodzenia czujników (0-1)
+    seed (int): Ziarno generatora liczb losowych (None - losowe)
+    observers (iterable): Funkcje wywoływane z gotowym SimulationResult
+    cache (scenarioCache.ScenarioCache): Pamięć podręczna sygnałów idealnych i zaszumionych
+                                         (używana, gdy podano seed; wyniki jak bez niej)
+    robust (bool): Tryb odporny filtru (bramkowanie, wagi Huberowskie, adaptacja szumu)
+    
+    Zwraca:
+    SimulationResult: Wyniki symulacji
+    """
+    kalman_step = 1  # Krok próbkowania dla filtracji
+
+    with stage("generation") as generation:
+        generate = generate_scenario if cache is None else cache.get
+        scenario = generate(signals_dict, n_sensors=n_sensors, seed=seed,
+                            damage_rate=damage_rate if sensor_damaged else 0.0)
+        signals_x, signals_y, noised_signals_y = scenario.signals_x, scenario.signals_y, scenario.noised_signals_y
+        generation.add_samples(noised_signals_y.size)
+
+    with stage("filter", samples=noised_signals_y[:, 0::kalman_step].size):
+        # Kilka czujników - osobne pętle filtru skalarnego, wiele - filtr wektorowy
+        estimated_signals_y, P, P_trajectory = kalman_filter_tracks(
+            noised_signals_y[:, 0::kalman_step], v=signals_dict["speed"], Q1=Q1, Q2=Q2, robust=robust)
+
+    # Łączenie czujników ważone odwrotnością wariancji z każdej próbki
+    with stage("fusion", samples=estimated_signals_y.size):
+        combined_estimated_y, combined_P = fuse_estimates(estimated_signals_y, P_trajectory)
+
+    with stage("metrics", samples=noised_signals_y.size):
+        metrics = simulation_metrics(signals_y, noised_signals_y, estimated_signals_y,
+                                     combined_estimated_y, combined_P, kalman_step=kalman_step)
+
+    result = SimulationResult(
+        signals_dict=dict(signals_dict),
+        signals_x=signals_x,
+        signals_y=signals_y,
+        noised_signals_y=noised_signals_y,
+        estimated_signals_y=estimated_signals_y,
+        P=P,
+        P_trajectory=P_trajectory,
+        combined_estimated_y=combined_estimated_y,
+        combined_P=combined_P,
+        kalman_step=kalman_step,
+        metrics=metrics
+    )
+    for observer in observers:
+        with stage(f"observer.{getattr(observer, '__name__', 'observer')}"):
+            observer(result)
+    return result
+
+
+def plot_simulation_result(result: SimulationResult):
+    """
+    Obserwator wizualizujący wynik symulacji (jak dotychczasowy przebieg w GUI)
+    
+    Parametry:
+    result (SimulationResult): Wynik z run_simulation
+    """
+    step = result.kalman_step
+    taked_kalman_signals_x = result.signals_x[0::step]
+    for sensor, (noised, estimated) in enumerate(zip(result.noised_signals_y, result.estimated_signals_y), start=1):
+        signals.show_signal(taked_kalman_signals_x, noised[0::step],
+                            title=f"Surowe sygnały wejściowe [{sensor}]")
+        signals.show_signal(taked_kalman_signals_x, estimated,
+                            title=f"Przefiltrowane sygnały [{sensor}]")
+        signals.show_result(signals_x=result.signals_x,
+                            signals_y=result.signals_y,
+                            noised_signals_y=noised,
+                            taked_kalman_signals_x=taked_kalman_signals_x,
+                            y_estimates_kalman=estimated,
+                            sensor_id=sensor)
+
+    signals.show_result(signals_x=result.signals_x,
+                        signals_y=result.signals_y,
+                        noised_signals_y=result.noised_signals_y[0],
+                        taked_kalman_signals_x=taked_kalman_signals_x,
+                        y_estimates_kalman=result.combined_estimated_y,
+                        sensor_id="Połączone")
+
+
+def KalmanSimulation(signals_dict: dict, signals_x, signals_y, sensor_id, Q1=4.572, Q2=38.1, sensor_damaged=False, damage_rate=0.25, show_plots=True, robust=False):
     """
     Przeprowadza pełną symulację filtracji Kalmana dla jednego czujnika
     
@@ -14,6 +130,10 @@ def KalmanSimulation(signals_dict: dict, signals_x, signals_y, sensor_id, Q1=4.5
     sensor_id (str/num): Identyfikator czujnika
     Q1 (float): Szum procesu dla niskich wysokości
     Q2 (float): Szum procesu dla wysokich wysokości
+    sensor_damaged (bool): Czy symulować uszkodzony czujnik
+    damage_rate (float): Stopień uszkodzenia czujnika (0-1)
+    show_plots (bool): Czy wyświetlać wykresy (False - tryb bezobsługowy)
+    robust (bool): Tryb odporny filtru (bramkowanie, wagi Huberowskie, adaptacja szumu)
     
     Zwraca:
     tuple: (wyestymowane wartości, wariancja, krok Kalmana, zaszumione sygnały)
@@ -21,69 +141,142 @@ def KalmanSimulation(signals_dict: dict, signals_x, signals_y, sensor_id, Q1=4.5
     kalman_step = 1  # Krok próbkowania dla filtracji
     
     # Generowanie zaszumionych sygnałów
-    if sensor_damaged:
-        noised_signals_y = signals.generate_noised_signals_on_damaged_sensor(signals_y)
-    else:
-        noised_signals_y = signals.generate_noised_signals_on_sensor(signals_y)
+    with stage("generation", samples=len(signals_y)):
+        if sensor_damaged:
+            noised_signals_y = signals.generate_noised_signals_on_damaged_sensor(signals_y, damage_rate=damage_rate)
+        else:
+            noised_signals_y = signals.generate_noised_signals_on_sensor(signals_y)
     
     # Pobieranie sygnałów z odpowiednim krokiem
     taked_kalman_signals_x = signals_x[0::kalman_step]
     taked_kalman_signals_y = noised_signals_y[0::kalman_step]
     
     # Wizualizacja surowych danych wejściowych
-    signals.show_signal(taked_kalman_signals_x, taked_kalman_signals_y, 
-                      title=f"Surowe sygnały wejściowe [{sensor_id}]")
+    if show_plots:
+        with stage("plotting"):
+            signals.show_signal(taked_kalman_signals_x, taked_kalman_signals_y, 
+                              title=f"Surowe sygnały wejściowe [{sensor_id}]")
     
     # Inicjalizacja i uruchomienie filtru Kalmana
     kalman_filter = KF(v=signals_dict["speed"], 
                       noised_signals_height=taked_kalman_signals_y, 
-                      Q1=Q1, Q2=Q2)
+                      Q1=Q1, Q2=Q2, robust=robust)
     y_estimates_kalman, P = kalman_filter.run()
     
-    # Wizualizacja wyników filtracji
-    signals.show_signal(taked_kalman_signals_x, y_estimates_kalman, 
-                      title=f"Przefiltrowane sygnały [{sensor_id}]")
-    
-    # Porównanie wszystkich sygnałów
-    signals.show_result(signals_x=signals_x,
-                      signals_y=signals_y,
-                      noised_signals_y=noised_signals_y,
-                      taked_kalman_signals_x=taked_kalman_signals_x,
-                      y_estimates_kalman=y_estimates_kalman,
-                      sensor_id=sensor_id)
+    if show_plots:
+        with stage("plotting"):
+            # Wizualizacja wyników filtracji
+            signals.show_signal(taked_kalman_signals_x, y_estimates_kalman, 
+                              title=f"Przefiltrowane sygnały [{sensor_id}]")
+        
+            # Porównanie wszystkich sygnałów
+            signals.show_result(signals_x=signals_x,
+                              signals_y=signals_y,
+                              noised_signals_y=noised_signals_y,
+                              taked_kalman_signals_x=taked_kalman_signals_x,
+                              y_estimates_kalman=y_estimates_kalman,
+                              sensor_id=sensor_id)
     
     return y_estimates_kalman, P, kalman_step, noised_signals_y
 
-def showSimulationFromFile(json_data):
+def simulation_speed(json_data):
+    """
+    Prędkość zapisanej symulacji: z nagłówka archiwum, a gdy go brak (pliki JSON),
+    z nachylenia sygnału idealnego
+
+    Parametry:
+    json_data (dict): Wczytane dane z pliku JSON (lub archiwum z simulationArchive)
+
+    Zwraca:
+    float: Prędkość (m/s)
+    """
+    details = getattr(json_data, "simulation_signal_dict", None)
+    if details and "speed" in details:
+        return float(details["speed"])
+
+    signals_x = np.asarray(json_data['signals_x'])
+    signals_y = np.asarray(json_data['signals_y'])
+    # Sygnał idealny jest obcinany do zera - nachylenie tylko z części dodatniej
+    positive = np.flatnonzero(signals_y > 0)
+    if len(positive) < 2:
+        return 0.0
+    first, last = positive[0], positive[-1]
+    return float((signals_y[last] - signals_y[first]) / (signals_x[last] - signals_x[first]))
+
+
+def smooth_saved_simulation(json_data, speed=None, Q1=4.572, Q2=38.1):
+    """
+    Wygładzanie RTS estymat zapisanej symulacji (bez ponownej filtracji)
+    i połączenie wygładzonych czujników ważone odwrotnością wariancji
+
+    Parametry:
+    json_data (dict): Wczytane dane z pliku JSON (lub archiwum z simulationArchive)
+    speed (float): Prędkość symulacji (domyślnie simulation_speed(json_data))
+    Q1 (float): Szum procesu dla wysokości <= 152.4m
+    Q2 (float): Szum procesu dla wysokości > 152.4m
+
+    Zwraca:
+    tuple: (smoothed_combined_y, smoothed_combined_P) - jedna próbka na kalman_step pomiarów
+    """
+    speed = simulation_speed(json_data) if speed is None else speed
+    kalman_step = json_data['kalman_step']
+    noised = np.stack([np.asarray(json_data[f'noised_signals_y_{sensor}'])[::kalman_step] for sensor in (1, 2)])
+    estimates = np.stack([np.asarray(json_data[f'estimated_signals_y_{sensor}']) for sensor in (1, 2)])
+    smoothed, smoothed_P = smooth_estimates(noised, estimates, speed, Q1, Q2)
+    return fuse_estimates(smoothed, smoothed_P)
+
+
+def showSimulationFromFile(json_data, t_start=None, t_end=None, max_points=20000, smooth=False, speed=None):
     """
     Wczytuje i wizualizuje zapisaną symulację z pliku JSON
     
     Parametry:
-    json_data (dict): Wczytane dane z pliku JSON
+    json_data (dict): Wczytane dane z pliku JSON (lub archiwum z simulationArchive)
+    t_start (float): Początek wyświetlanego przedziału czasu [s] (None - od początku)
+    t_end (float): Koniec wyświetlanego przedziału czasu [s] (None - do końca)
+    max_points (int): Maksymalna liczba punktów na serię (decymacja min/max)
+    smooth (bool): Czy dodać do wykresu estymaty wygładzone (RTS) całego lotu
+    speed (float): Prędkość symulacji dla wygładzania (domyślnie simulation_speed(json_data))
     """
-    # Ekstrakcja danych z formatu JSON
-    signals_x = json_data['signals_x']
-    signals_y = json_data['signals_y']
-    noised_signals_y_1 = json_data['noised_signals_y_1']
-    noised_signals_y_2 = json_data['noised_signals_y_2']
-    estimated_signals_y_1 = json_data['estimated_signals_y_1']
-    estimated_signals_y_2 = json_data['estimated_signals_y_2']
-    combined_estimated_y = json_data['combined_estimated_y']
+    # Ekstrakcja danych z formatu JSON (tablice mapowane w pamięci nie są kopiowane)
+    signals_x = np.asarray(json_data['signals_x'])
     kalman_step = json_data['kalman_step']
+
+    # Wycinek przedziału czasu; estymaty mają jedną próbkę na kalman_step pomiarów
+    start = 0 if t_start is None else int(np.searchsorted(signals_x, t_start, side="left"))
+    stop = len(signals_x) if t_end is None else int(np.searchsorted(signals_x, t_end, side="right"))
+    window = slice(start, stop)
+    kalman_window = slice(-(-start // kalman_step), -(-stop // kalman_step))
+
+    def series(name):
+        return np.asarray(json_data[name])
+
+    signals_x = signals_x[window]
+    taked_kalman_signals_x = signals_x[-start % kalman_step::kalman_step]
     
-    # Wizualizacja danych z pierwszego czujnika
-    signals.show_signal(signals_x=signals_x[0::kalman_step], 
-                      signals_y=noised_signals_y_1[0::kalman_step],
-                      title="Surowe sygnały wejściowe [Czujnik 1]")
-    
-    # Wizualizacja danych z drugiego czujnika
-    signals.show_signal(signals_x=signals_x[0::kalman_step], 
-                      signals_y=noised_signals_y_2[0::kalman_step],
-                      title="Surowe sygnały wejściowe [Czujnik 2]")
+    # Wizualizacja danych z pierwszego i drugiego czujnika
+    for sensor in (1, 2):
+        noised = series(f'noised_signals_y_{sensor}')[window]
+        signals.show_signal(*signals.minmax_decimate(taked_kalman_signals_x,
+                                                     noised[-start % kalman_step::kalman_step],
+                                                     max_points),
+                          title=f"Surowe sygnały wejściowe [Czujnik {sensor}]")
     
-    # Wyświetlenie połączonych wyników
-    signals.show_result_json(signals_x=signals_x,
-                           signals_y=signals_y,
-                           noised_signals_y=noised_signals_y_1,
-                           y_estimates_kalman=combined_estimated_y,
-                           taked_kalman_signals_x=signals_x[0::kalman_step])
\ No newline at end of file
+    # Wyświetlenie połączonych wyników (decymacja według najbardziej zmiennego sygnału zaszumionego)
+    noised = series('noised_signals_y_1')[window]
+    indices = signals.minmax_decimation_indices(noised, max_points)
+    estimates = series('combined_estimated_y')[kalman_window]
+    kalman_indices = signals.minmax_decimation_indices(estimates, max_points)
+
+    # Wygładzanie wymaga całego lotu (przejście wstecz), wyświetlany jest tylko wycinek
+    decimated_smoothed = None
+    if smooth:
+        smoothed, _ = smooth_saved_simulation(json_data, speed=speed)
+        decimated_smoothed = smoothed[kalman_window][kalman_indices]
+
+    signals.show_result_json(signals_x=signals_x[indices],
+                           signals_y=series('signals_y')[window][indices],
+                           noised_signals_y=noised[indices],
+                           y_estimates_kalman=estimates[kalman_indices],
+                           taked_kalman_signals_x=taked_kalman_signals_x[kalman_indices],
+                           y_smoothed=decimated_smoothed)
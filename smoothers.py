@@ -0,0 +1,209 @@
+from collections import deque
+import numpy as np
+from filters import measurement_noise_for_speed
+from parallelKalman import associative_scan, compose_affine, covariance_trajectory, AFFINE_IDENTITY
+
+
+def rts_smoother(x_pred, P_pred, x_filtered, P_filtered):
+    """
+    Wygładzanie Rauch-Tung-Striebel (przejście wstecz) na zapisanych stanach filtru.
+    Dla F = 1:  C_k = P_k / P_pred_{k+1},
+                x_s_k = x_k + C_k * (x_s_{k+1} - x_pred_{k+1}),
+                P_s_k = P_k + C_k^2 * (P_s_{k+1} - P_pred_{k+1}).
+    Oba wzory są przekształceniami afinicznymi x_s_{k+1} -> x_s_k, więc przejście wstecz
+    liczone jest skanem prefiksowym naraz dla wszystkich torów i próbek (ostatnia próbka
+    toru ma współczynnik 0 i rozdziela tory w spłaszczonym ciągu).
+
+    Parametry:
+    x_pred, P_pred (np.array): Stan i niepewność po predykcji (tory x próbki lub próbki)
+    x_filtered, P_filtered (np.array): Stan i niepewność po aktualizacji (ten sam kształt)
+
+    Zwraca:
+    tuple: (x_smoothed, P_smoothed) - tablice o kształcie wejścia
+    """
+    shape = np.shape(x_filtered)
+    x_pred, P_pred, x_filtered, P_filtered = (np.atleast_2d(np.asarray(a, dtype=float))
+                                              for a in (x_pred, P_pred, x_filtered, P_filtered))
+    if x_filtered.size == 0:
+        return x_filtered.reshape(shape).copy(), P_filtered.reshape(shape).copy()
+
+    # Współczynniki kroku wstecz (ostatnia próbka: wygładzony = przefiltrowany)
+    C = np.zeros_like(P_filtered)
+    C[:, :-1] = P_filtered[:, :-1] / P_pred[:, 1:]
+    b_x = x_filtered.copy()
+    b_x[:, :-1] -= C[:, :-1] * x_pred[:, 1:]
+    C2 = C * C
+    b_P = P_filtered.copy()
+    b_P[:, :-1] -= C2[:, :-1] * P_pred[:, 1:]
+
+    # Odwrócenie czasu i spłaszczenie torów do jednego ciągu
+    smoothed = []
+    for a, b in ((C, b_x), (C2, b_P)):
+        a = a[:, ::-1].ravel()
+        b = b[:, ::-1].ravel()
+        associative_scan((a, b), compose_affine, AFFINE_IDENTITY)
+        smoothed.append(b.reshape(x_filtered.shape)[:, ::-1].reshape(shape))
+    return smoothed[0], smoothed[1]
+
+
+def history_from_estimates(noised_signals_height, estimates, v, Q1=4.572, Q2=38.1):
+    """
+    Odtwarza stany filtru potrzebne do wygładzania z zapisanych estymat (np. symulacja.json),
+    bez ponownej filtracji: stan po aktualizacji to estymata (przy przerwaniu filtracji
+    powyżej 762 m - poprzedni stan), a niepewność zależy tylko od reżimów próbek.
+
+    Parametry:
+    noised_signals_height (np.array): Pomiary, na których działał filtr (tory x próbki lub próbki)
+    estimates (np.array): Zapisane estymaty filtru (ten sam kształt)
+    v (float): Stała prędkość (m/s)
+    Q1 (float): Szum procesu dla wysokości <= 152.4m
+    Q2 (float): Szum procesu dla wysokości > 152.4m
+
+    Zwraca:
+    dict: Tablice x_pred, P_pred, x_filtered, P_filtered (jak kalman_filter_batch(return_history=True))
+    """
+    shape = np.shape(estimates)
+    Z = np.atleast_2d(np.asarray(noised_signals_height, dtype=float))
+    X = np.atleast_2d(np.asarray(estimates, dtype=float))
+    R = measurement_noise_for_speed(v)
+    Bv = 0.05 * v
+    n_tracks, n_samples = Z.shape
+
+    passthrough = Z > 762
+    missing = np.isnan(Z)
+
+    # Stan po aktualizacji: przy przerwaniu filtracji ostatni stan sprzed przerwania
+    x0 = Z[np.arange(n_tracks), np.argmax(~missing, axis=1)][:, None]
+    last = np.where(passthrough, -1, np.arange(n_samples))
+    np.maximum.accumulate(last, axis=1, out=last)
+    x_filtered = np.where(last >= 0, np.take_along_axis(X, np.maximum(last, 0), axis=1), x0)
+
+    P_filtered = np.stack([covariance_trajectory(z, v, Q1, Q2) for z in Z])
+
+    x_prev = np.concatenate([x0, x_filtered[:, :-1]], axis=1)
+    P_prev = np.concatenate([np.ones((n_tracks, 1)), P_filtered[:, :-1]], axis=1)
+    history = {
+        "x_pred": np.where(passthrough, x_prev, x_prev + Bv),
+        "P_pred": np.where(passthrough, P_prev, P_prev + R),
+        "x_filtered": x_filtered,
+        "P_filtered": P_filtered
+    }
+    return {name: values.reshape(shape) for name, values in history.items()}
+
+
+def smooth_estimates(noised_signals_height, estimates, v, Q1=4.572, Q2=38.1):
+    """
+    Wygładzanie RTS zapisanych estymat filtru
+
+    Parametry:
+    noised_signals_height, estimates, v, Q1, Q2: Jak w history_from_estimates
+
+    Zwraca:
+    tuple: (x_smoothed, P_smoothed); przy przerwaniu filtracji powyżej 762 m zwracany jest pomiar
+    """
+    history = history_from_estimates(noised_signals_height, estimates, v, Q1, Q2)
+    x_smoothed, P_smoothed = rts_smoother(**history)
+    z = np.asarray(noised_signals_height, dtype=float)
+    return np.where(z > 762, z, x_smoothed), P_smoothed
+
+
+class FixedLagSmoother:
+    """
+    Strumieniowe wygładzanie RTS ze stałym opóźnieniem.
+    Estymata próbki k wydawana jest po nadejściu próbki k + lag, więc opóźnienie
+    i pamięć (bufor lag + 1 stanów) są ograniczone niezależnie od długości lotu.
+    """
+
+    def __init__(self, v: float, lag=40, Q1=4.572, Q2=38.1):
+        """
+        Inicjalizacja wygładzania
+        :param v: Stała prędkość (m/s)
+        :param lag: Opóźnienie w próbkach
+        :param Q1: Szum procesu dla wysokości <= 152.4m
+        :param Q2: Szum procesu dla wysokości > 152.4m
+        """
+        self.v = v
+        self.Bv = 0.05 * v  # Wpływ prędkości na pozycję (B * v)
+        self.R = measurement_noise_for_speed(v)
+        self.Q1 = Q1
+        self.Q2 = Q2
+        self.lag = lag
+        self.x = None  # Estymata filtru (None przed pierwszym pomiarem)
+        self.P = 1  # Niepewność estymacji filtru
+        # Bufor (x_pred, P_pred, x, P, wartość wydawana bez wygładzania lub None)
+        self.buffer = deque(maxlen=lag + 1)
+
+    def _filter_step(self, z):
+        """
+        Krok filtru jak w StreamingKalmanFilter.step, z zapisem stanu do bufora
+        """
+        if self.x is None:
+            if z != z:
+                self.buffer.append((None, None, None, None, z))  # Brak estymaty przed pierwszym pomiarem
+                return
+            self.x = z
+
+        if z > 762:
+            # Przerwanie filtracji - stan bez zmian, wydawany jest pomiar
+            self.buffer.append((self.x, self.P, self.x, self.P, z))
+            return
+
+        x_pred, P_pred = self.x + self.Bv, self.P + self.R
+        if z != z:
+            self.x, self.P = x_pred, P_pred
+        else:
+            szum_procesu = self.Q1 if z <= 152.4 else self.Q2
+            K = P_pred / (P_pred + self.R + szum_procesu)
+            self.x = x_pred + K * (z - x_pred)
+            self.P = (1 - K) * P_pred
+        self.buffer.append((x_pred, P_pred, self.x, self.P, None))
+
+    def _smoothed_oldest(self):
+        """
+        Przejście RTS wstecz przez bufor; zwraca wygładzoną estymatę najstarszej próbki
+        """
+        entries = self.buffer
+        x_s, P_s = entries[-1][2], entries[-1][3]
+        for j in range(len(entries) - 2, -1, -1):
+            _, _, x, P, _ = entries[j]
+            x_pred_next, P_pred_next = entries[j + 1][0], entries[j + 1][1]
+            if x is None:
+                break
+            C = P / P_pred_next
+            x_s = x + C * (x_s - x_pred_next)
+        oldest = entries[0]
+        return oldest[4] if oldest[4] is not None else x_s
+
+    def step(self, z):
+        """
+        Przetwarza pojedynczy pomiar
+        :param z: Aktualny pomiar
+        :return: Wygładzona estymata próbki sprzed lag kroków lub None, gdy bufor jest jeszcze niepełny
+        """
+        self._filter_step(z)
+        if len(self.buffer) <= self.lag:
+            return None
+        value = self._smoothed_oldest()
+        self.buffer.popleft()
+        return value
+
+    def feed(self, measurements):
+        """
+        Generator wygładzonych estymat dla kolejnych pomiarów (z opóźnieniem lag próbek)
+        :param measurements: Iterowalne źródło pomiarów
+        """
+        for z in measurements:
+            value = self.step(z)
+            if value is not None:
+                yield value
+
+    def flush(self):
+        """
+        Wydaje wygładzone estymaty próbek pozostałych w buforze (koniec strumienia)
+        :return: Lista estymat
+        """
+        values = []
+        while self.buffer:
+            values.append(self._smoothed_oldest())
+            self.buffer.popleft()
+        return values
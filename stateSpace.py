@@ -0,0 +1,255 @@
+import numpy as np
+from filters import measurement_noise_for_speed
+
+
+def constant_velocity_model(time_step=0.05, process_noise=1.0, measurement_noise=25.0):
+    """
+    Model stałej prędkości: stan [wysokość, prędkość pionowa], pomiar wysokości.
+    Prędkość jest estymowana, a nie podawana na wejściu.
+
+    Parametry:
+    time_step (float): Krok czasowy [s]
+    process_noise (float): Gęstość widmowa przyspieszenia (szum procesu) [m^2/s^3]
+    measurement_noise (float): Wariancja pomiaru wysokości [m^2]
+
+    Zwraca:
+    dict: Macierze F, H, Q, R oraz niepewność początkowa P0 (argumenty LinearKalmanFilter)
+    """
+    dt = time_step
+    return {
+        "F": np.array([[1.0, dt], [0.0, 1.0]]),
+        "H": np.array([[1.0, 0.0]]),
+        # Biały szum przyspieszenia (dyskretyzacja modelu ciągłego)
+        "Q": process_noise * np.array([[dt ** 3 / 3, dt ** 2 / 2], [dt ** 2 / 2, dt]]),
+        "R": np.array([[measurement_noise]]),
+        "P0": np.diag([measurement_noise, 100.0])  # Nieznana prędkość początkowa (10 m/s)
+    }
+
+
+def scalar_model(v: float, szum_procesu=4.572):
+    """
+    Filtr skalarny z filters.KalmanFilter jako przypadek szczególny 1-D:
+    F = H = 1, sterowanie B * v, przyrost niepewności R oraz wariancja innowacji
+    P + R + Q. Przełączanie Q1/Q2 i przerwanie filtracji powyżej 762 m obsługuje
+    tylko KalmanFilter - tutaj szum procesu jest stały.
+
+    Parametry:
+    v (float): Stała prędkość (m/s)
+    szum_procesu (float): Q1 lub Q2
+
+    Zwraca:
+    dict: Macierze F, B, H, Q, R, P0 (argumenty LinearKalmanFilter); sterowanie u = v
+    """
+    R = measurement_noise_for_speed(v)
+    return {
+        "F": np.array([[1.0]]),
+        "B": np.array([[0.05]]),
+        "H": np.array([[1.0]]),
+        "Q": np.array([[R]]),
+        "R": np.array([[R + szum_procesu]]),
+        "P0": np.array([[1.0]])
+    }
+
+
+class LinearKalmanFilter:
+    """
+    Ogólny liniowy filtr Kalmana z konfigurowalnymi macierzami F, B, H, Q, R.
+    Wszystkie macierze i bufory robocze są alokowane z góry; dla pomiarów
+    skalarnych (m = 1) pętla główna nie alokuje pamięci.
+    """
+
+    def __init__(self, F, H, Q, R, B=None, x0=None, P0=None):
+        """
+        Inicjalizacja filtru
+        :param F: Macierz przejścia stanu (n x n)
+        :param H: Macierz obserwacji (m x n)
+        :param Q: Kowariancja szumu procesu (n x n)
+        :param R: Kowariancja szumu pomiarowego (m x m)
+        :param B: Macierz sterowania (n x l), opcjonalna
+        :param x0: Stan początkowy (domyślnie H^T z pierwszego pomiaru)
+        :param P0: Niepewność początkowa (domyślnie macierz jednostkowa)
+        """
+        self.F = np.atleast_2d(np.asarray(F, dtype=float))
+        self.H = np.atleast_2d(np.asarray(H, dtype=float))
+        self.Q = np.atleast_2d(np.asarray(Q, dtype=float))
+        self.R = np.atleast_2d(np.asarray(R, dtype=float))
+        self.B = None if B is None else np.atleast_2d(np.asarray(B, dtype=float))
+        n, m = self.F.shape[0], self.H.shape[0]
+        self.n, self.m = n, m
+
+        self.x0 = None if x0 is None else np.asarray(x0, dtype=float)
+        self.P0 = np.eye(n) if P0 is None else np.atleast_2d(np.asarray(P0, dtype=float))
+
+        # Macierze pomocnicze i bufory robocze
+        self.FT = np.ascontiguousarray(self.F.T)
+        self.HT = np.ascontiguousarray(self.H.T)
+        self.I = np.eye(n)
+        self.x = np.zeros(n)
+        self.P = np.zeros((n, n))
+        self._x_pred = np.zeros(n)
+        self._P_pred = np.zeros((n, n))
+        self._FP = np.zeros((n, n))
+        self._PHT = np.zeros((n, m))
+        self._S = np.zeros((m, m))
+        self._K = np.zeros((n, m))
+        self._y = np.zeros(m)
+        self._Hx = np.zeros(m)
+        self._Ky = np.zeros(n)
+        self._IKH = np.zeros((n, n))
+        self._Bu = np.zeros(n)
+
+    def run(self, measurements, controls=None, return_P_trajectory=False):
+        """
+        Filtracja całej serii pomiarów
+        :param measurements: Pomiary, tablica (próbki,) lub (próbki x m); NaN - brak pomiaru
+        :param controls: Sterowanie - stały wektor (l,) lub tablica (próbki x l), opcjonalne
+        :param return_P_trajectory: Czy zwrócić kowariancję po każdej próbce
+        Zwraca:
+            x_estimates: Tablica estymat stanu (próbki x n)
+            P: Końcowa kowariancja (n x n)
+            P_trajectory: Kowariancje po każdej próbce (próbki x n x n, tylko gdy return_P_trajectory)
+        """
+        Z = np.asarray(measurements, dtype=float).reshape(len(measurements), self.m)
+        n_samples = Z.shape[0]
+        U = None
+        if controls is not None and self.B is not None:
+            U = np.asarray(controls, dtype=float)
+            U = np.broadcast_to(U if U.ndim == 2 else U.reshape(1, -1), (n_samples, self.B.shape[1]))
+        missing = np.isnan(Z).any(axis=1)
+
+        x_estimates = np.empty((n_samples, self.n))
+        P_trajectory = np.empty((n_samples, self.n, self.n)) if return_P_trajectory else None
+
+        x, P = self.x, self.P
+        if self.x0 is not None:
+            x[:] = self.x0
+        elif n_samples:
+            first = np.argmax(~missing)
+            np.dot(self.HT, Z[first], out=x)
+        P[:] = self.P0
+
+        F, FT, H, HT, Q, R = self.F, self.FT, self.H, self.HT, self.Q, self.R
+        x_pred, P_pred, FP, PHT = self._x_pred, self._P_pred, self._FP, self._PHT
+        S, K, y, Hx, Ky, IKH, Bu = self._S, self._K, self._y, self._Hx, self._Ky, self._IKH, self._Bu
+        scalar_measurement = self.m == 1
+
+        for k in range(n_samples):
+            # Faza predykcji: x = F x + B u,  P = F P F^T + Q
+            np.dot(F, x, out=x_pred)
+            if U is not None:
+                np.dot(self.B, U[k], out=Bu)
+                x_pred += Bu
+            np.dot(F, P, out=FP)
+            np.dot(FP, FT, out=P_pred)
+            P_pred += Q
+
+            if missing[k]:
+                # Brak pomiaru - pomijamy aktualizację
+                x[:] = x_pred
+                P[:] = P_pred
+            else:
+                # Faza aktualizacji
+                np.dot(H, x_pred, out=Hx)
+                np.subtract(Z[k], Hx, out=y)
+                np.dot(P_pred, HT, out=PHT)
+                np.dot(H, PHT, out=S)
+                S += R
+                if scalar_measurement:
+                    np.divide(PHT, S[0, 0], out=K)
+                else:
+                    np.dot(PHT, np.linalg.inv(S), out=K)
+                np.dot(K, y, out=Ky)
+                np.add(x_pred, Ky, out=x)
+                np.dot(K, H, out=IKH)
+                np.subtract(self.I, IKH, out=IKH)
+                np.dot(IKH, P_pred, out=P)
+
+            x_estimates[k] = x
+            if return_P_trajectory:
+                P_trajectory[k] = P
+
+        if return_P_trajectory:
+            return x_estimates, P.copy(), P_trajectory
+        return x_estimates, P.copy()
+
+
+def batch_linear_kalman(measurements, F, H, Q, R, B=None, controls=None, x0=None, P0=None):
+    """
+    Liniowy filtr Kalmana dla wielu torów naraz (wspólny model, stosy macierzy).
+    Predykcja i aktualizacja wykonywane są mnożeniem stosów macierzy (matmul/einsum).
+    :param measurements: Pomiary, tablica (tory x próbki) lub (tory x próbki x m); NaN - brak pomiaru
+    :param F, H, Q, R, B: Macierze modelu jak w LinearKalmanFilter
+    :param controls: Sterowanie (tory x l), stałe w czasie, opcjonalne
+    :param x0: Stany początkowe (tory x n), domyślnie H^T z pierwszego pomiaru
+    :param P0: Niepewność początkowa (n x n), domyślnie macierz jednostkowa
+    Zwraca:
+        x_estimates: Estymaty stanu (tory x próbki x n)
+        P: Końcowe kowariancje (tory x n x n)
+    """
+    F = np.atleast_2d(np.asarray(F, dtype=float))
+    H = np.atleast_2d(np.asarray(H, dtype=float))
+    Q = np.atleast_2d(np.asarray(Q, dtype=float))
+    R = np.atleast_2d(np.asarray(R, dtype=float))
+    n, m = F.shape[0], H.shape[0]
+
+    Z = np.asarray(measurements, dtype=float)
+    Z = Z.reshape(Z.shape[0], Z.shape[1], m)
+    n_tracks, n_samples, _ = Z.shape
+    missing = np.isnan(Z).any(axis=2)
+    Z_filled = np.where(np.isnan(Z), 0.0, Z)
+
+    Bu = np.zeros((n_tracks, n))
+    if B is not None and controls is not None:
+        Bu = np.einsum("ij,tj->ti", np.atleast_2d(np.asarray(B, dtype=float)),
+                       np.asarray(controls, dtype=float).reshape(n_tracks, -1))
+
+    if x0 is not None:
+        x = np.array(x0, dtype=float).reshape(n_tracks, n)
+    else:
+        first = np.argmax(~missing, axis=1) if n_samples else np.zeros(n_tracks, dtype=int)
+        x = np.einsum("ij,tj->ti", H.T, Z_filled[np.arange(n_tracks), first])
+    P = np.broadcast_to(np.eye(n) if P0 is None else np.asarray(P0, dtype=float), (n_tracks, n, n)).copy()
+
+    # Bufory robocze dla stosów macierzy
+    x_pred = np.empty((n_tracks, n))
+    P_pred = np.empty((n_tracks, n, n))
+    FP = np.empty((n_tracks, n, n))
+    PHT = np.empty((n_tracks, n, m))
+    S = np.empty((n_tracks, m, m))
+    K = np.empty((n_tracks, n, m))
+    KH = np.empty((n_tracks, n, n))
+    Hx = np.empty((n_tracks, m))
+    y = np.empty((n_tracks, m, 1))
+    Ky = np.empty((n_tracks, n, 1))
+    x_estimates = np.empty((n_tracks, n_samples, n))
+    I = np.eye(n)
+
+    for k in range(n_samples):
+        # Faza predykcji
+        np.matmul(x, F.T, out=x_pred)
+        x_pred += Bu
+        np.matmul(F, P, out=FP)
+        np.matmul(FP, F.T, out=P_pred)
+        P_pred += Q
+
+        # Faza aktualizacji (brak pomiaru - wzmocnienie 0)
+        np.matmul(P_pred, H.T, out=PHT)
+        np.matmul(H, PHT, out=S)
+        S += R
+        if m == 1:
+            np.divide(PHT, S, out=K)
+        else:
+            np.matmul(PHT, np.linalg.inv(S), out=K)
+        K[missing[:, k]] = 0.0
+
+        np.matmul(x_pred, H.T, out=Hx)
+        np.subtract(Z_filled[:, k], Hx, out=y[:, :, 0])
+        np.matmul(K, y, out=Ky)
+        np.add(x_pred, Ky[:, :, 0], out=x)
+        np.matmul(K, H, out=KH)
+        np.subtract(I, KH, out=KH)
+        np.matmul(KH, P_pred, out=P)
+
+        x_estimates[:, k] = x
+
+    return x_estimates, P
@@ -0,0 +1,204 @@
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from filters import kalman_filter_batch
+from scenarioCache import generate_scenario, process_cache, scenario_key
+from fusion import fuse_estimates
+from metrics import calculate_std_errors, calculate_reduction_percentage, ErrorAccumulator
+
+# Parametry filtru - punkty różniące się tylko nimi współdzielą scenariusz (sygnały i szum)
+FILTER_PARAMETERS = ("Q1", "Q2", "robust")
+
+# Wersja schematu ziaren przeglądu (część klucza punktu w pliku wznowienia);
+# 2 - ziarno (seed, numer scenariusza) wspólne dla punktów scenariusza
+SWEEP_SEEDING_VERSION = 2
+SIGNAL_PARAMETERS = ("speed", "start_height", "time_step", "flight_time")
+
+# Domyślne wartości parametrów przeglądu (jak w main.simulation_signal_dict)
+default_sweep_point = {
+    "speed": 2,
+    "start_height": 0,
+    "time_step": 0.05,
+    "flight_time": 600,
+    "Q1": 4.572,
+    "Q2": 38.1,
+    "damage_rate": 0.0,
+    "robust": False
+}
+
+
+def expand_grid(grid: dict):
+    """
+    Rozwija siatkę parametrów do listy punktów
+
+    Parametry:
+    grid (dict): Słownik {parametr: lista wartości}; brakujące parametry
+                 przyjmują wartości z default_sweep_point
+
+    Zwraca:
+    list: Lista słowników z pełnym zestawem parametrów
+    """
+    unknown = set(grid) - set(default_sweep_point)
+    if unknown:
+        raise ValueError(f"Nieznane parametry przeglądu: {sorted(unknown)}")
+
+    keys = list(default_sweep_point)
+    values = [list(grid.get(key, [default_sweep_point[key]])) for key in keys]
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values)]
+
+
+def run_grid_point(point: dict, n_trials: int, seed, n_sensors=2, cache=None):
+    """
+    Przeprowadza n_trials realizacji Monte-Carlo dla jednego punktu siatki.
+    Wszystkie realizacje i czujniki filtrowane są jednym wywołaniem filtru wsadowego.
+
+    Parametry:
+    point (dict): Parametry punktu (jak w default_sweep_point)
+    n_trials (int): Liczba realizacji
+    seed (int lub tuple): Ziarno generatora liczb losowych scenariusza punktu
+    n_sensors (int): Liczba czujników łączonych w estymatę
+    cache (scenarioCache.ScenarioCache): Pamięć podręczna scenariuszy (None - generowanie za każdym razem)
+
+    Zwraca:
+    dict: Parametry punktu oraz średnie i odchylenia statystyk z realizacji
+    """
+    signals_dict = {key: point[key] for key in SIGNAL_PARAMETERS}
+    generate = generate_scenario if cache is None else cache.get
+    scenario = generate(signals_dict, n_sensors=n_trials * n_sensors, seed=seed, damage_rate=point["damage_rate"])
+    signals_y, noised = scenario.signals_y, scenario.noised_signals_y
+
+    estimates, _, P_trajectory = kalman_filter_batch(
+        noised, point["speed"], point["Q1"], point["Q2"], return_P_trajectory=True, robust=point["robust"])
+    noised = noised.reshape(n_trials, n_sensors, -1)
+    estimates = estimates.reshape(n_trials, n_sensors, -1)
+    P_trajectory = P_trajectory.reshape(n_trials, n_sensors, -1)
+
+    # Łączenie czujników ważone odwrotnością wariancji z każdej próbki
+    combined, combined_P = fuse_estimates(estimates, P_trajectory, axis=1)
+
+    # Statystyki błędu estymaty połączonej zbierane strumieniowo po realizacjach
+    accumulator = ErrorAccumulator()
+    stats = []
+    for trial in range(n_trials):
+        accumulator.update(signals_y, combined[trial], combined_P[trial])
+        row = {}
+        for sensor in range(n_sensors):
+            std_noisy, std_filtered = calculate_std_errors(
+                signals_y, noised[trial, sensor], estimates[trial, sensor])
+            row[f"std_noisy_{sensor + 1}"] = std_noisy
+            row[f"std_filtered_{sensor + 1}"] = std_filtered
+        _, row["std_filtered_combined"] = calculate_std_errors(signals_y, noised[trial, 0], combined[trial])
+        row["reduction_percentage"] = calculate_reduction_percentage(
+            row["std_noisy_1"], row["std_filtered_combined"])
+        stats.append(row)
+
+    stats = pd.DataFrame(stats)
+    summary = dict(point, n_trials=n_trials)
+    for column in stats:
+        summary[f"{column}_mean"] = float(stats[column].mean())
+        summary[f"{column}_std"] = float(stats[column].std(ddof=0))
+    combined_statistics = accumulator.result()
+    for key in ("rmse", "bias", "max_error", "nees"):
+        summary[f"combined_{key}"] = combined_statistics[key]
+    for band, band_statistics in combined_statistics["bands"].items():
+        summary[f"combined_std_{band}"] = band_statistics["std"]
+    return summary
+
+
+def run_cached_point(point: dict, n_trials: int, seed, n_sensors=2, cache_folder=None):
+    """
+    Punkt siatki w procesie roboczym przeglądu - scenariusz brany z pamięci podręcznej
+    procesu (process_cache), więc punkty o wspólnym scenariuszu liczone w tym samym
+    procesie lub po zapisie na dysk nie generują go ponownie
+
+    Parametry:
+    point, n_trials, seed, n_sensors: Jak w run_grid_point
+    cache_folder (str): Folder dyskowej pamięci podręcznej scenariuszy (None - tylko pamięć procesu)
+
+    Zwraca:
+    dict: Podsumowanie punktu (run_grid_point)
+    """
+    return run_grid_point(point, n_trials, seed, n_sensors, cache=process_cache(cache_folder))
+
+
+def run_sweep(grid: dict, n_trials=20, seed=0, workers=None, checkpoint_path=None, cache_folder=None):
+    """
+    Równoległy przegląd Monte-Carlo po siatce parametrów symulacji.
+    Każdy punkt jest osobnym zadaniem puli procesów. Punkty różniące się tylko parametrami
+    filtru (Q1, Q2, robust) współdzielą scenariusz: liczone są na tych samych sygnałach
+    i szumie (wspólne liczby losowe) z ziarnem (seed, numer scenariusza), więc wyniki
+    nie zależą od kolejności wykonania ani od procesu, który liczy punkt. Scenariusz
+    generowany jest raz na proces, a z cache_folder raz na cały przegląd.
+
+    Parametry:
+    grid (dict): Słownik {parametr: lista wartości}, patrz expand_grid
+    n_trials (int): Liczba realizacji na punkt siatki
+    seed (int): Główne ziarno przeglądu
+    workers (int): Liczba procesów (domyślnie liczba rdzeni)
+    checkpoint_path (str): Plik JSONL z ukończonymi punktami (wiersz dopisywany zaraz
+                           po ukończeniu punktu); pozwala wznowić przerwany przegląd
+    cache_folder (str): Folder archiwów scenariuszy (.npz) współdzielonych między
+                        procesami i kolejnymi przeglądami (None - bez zapisu na dysk)
+
+    Zwraca:
+    pd.DataFrame: Tabela z jednym wierszem na punkt siatki
+    """
+    points = expand_grid(grid)
+    n_sensors = 2
+
+    # Grupy punktów o wspólnym scenariuszu (numer scenariusza w kolejności pierwszego wystąpienia)
+    scenarios = {}
+    for i, point in enumerate(points):
+        scenario = tuple(value for key, value in point.items() if key not in FILTER_PARAMETERS)
+        scenarios.setdefault(scenario, []).append(i)
+
+    # Klucz punktu zawiera schemat ziaren i klucz scenariusza (zależny od numeru scenariusza),
+    # więc wznowienie nie miesza wierszy z innego schematu ani innej kolejności siatki
+    keys = [None] * len(points)
+    numbers = [None] * len(points)
+    for number, group in enumerate(scenarios.values()):
+        for i in group:
+            numbers[i] = number
+            key = scenario_key({name: points[i][name] for name in SIGNAL_PARAMETERS}, n_trials * n_sensors,
+                               (seed, number), points[i]["damage_rate"])
+            keys[i] = json.dumps(dict(points[i], n_trials=n_trials, seed=seed, seeding=SWEEP_SEEDING_VERSION,
+                                      scenario=key), sort_keys=True)
+
+    # Wczytanie punktów ukończonych w poprzednim uruchomieniu
+    results = {}
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    results[entry["key"]] = entry["summary"]
+
+    # Kolejne punkty scenariusza trafiają do puli obok siebie
+    pending = [i for group in scenarios.values() for i in group if keys[i] not in results]
+    if pending:
+        checkpoint = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(run_cached_point, points[i], n_trials, (seed, numbers[i]), n_sensors,
+                                    cache_folder): i
+                    for i in pending
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    results[keys[i]] = future.result()
+                    if checkpoint:
+                        checkpoint.write(json.dumps({"key": keys[i], "summary": results[keys[i]]}) + "\n")
+                        checkpoint.flush()
+        finally:
+            if checkpoint:
+                checkpoint.close()
+
+    return pd.DataFrame([results[key] for key in keys])
+
+
+if __name__ == "__main__":
+    table = run_sweep({"speed": [2, 5, 10], "Q1": [1, 4.572], "Q2": [10, 38.1]}, n_trials=10)
+    print(table.to_string())
@@ -0,0 +1,31 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# Moduły projektu leżą płasko w katalogu głównym repozytorium
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import signalsGeneratingShowing as signals  # noqa: E402
+from sensorFaults import inject_sensor_faults  # noqa: E402
+
+
+def make_measurements(speed=2, start_height=0, flight_time=60, n_sensors=3, damage_rate=0.0, seed=0):
+    """
+    Powtarzalny scenariusz testowy: sygnał idealny i pomiary (czujniki x próbki)
+    """
+    rng = np.random.default_rng(seed)
+    _, signals_y = signals.generate_true_signal_array(
+        {"speed": speed, "start_height": start_height, "time_step": 0.05, "flight_time": flight_time})
+    noised = signals.generate_noised_signals_array(signals_y, n_sensors=n_sensors, rng=rng)
+    if damage_rate > 0:
+        noised = inject_sensor_faults(noised, damage_rate, rng=rng)
+    return signals_y, noised
+
+
+# Scenariusze obejmujące oba reżimy szumu (próg 152.4 m) i przerwanie filtracji powyżej 762 m
+SCENARIOS = [
+    pytest.param(2, 0, 60, id="low"),
+    pytest.param(5, 100, 40, id="across-152m"),
+    pytest.param(12, 700, 20, id="across-762m"),
+]
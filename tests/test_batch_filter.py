@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from conftest import SCENARIOS, make_measurements
+from filters import KalmanFilter, kalman_filter_batch, kalman_filter_tracks
+
+
+def scalar_reference(noised, speed, **kwargs):
+    """
+    Filtr skalarny (pętla Pythona) osobno dla każdego toru
+    """
+    runs = [KalmanFilter(speed, list(z), backend="python", **kwargs).run(return_P_trajectory=True)
+            for z in noised]
+    return (np.array([np.asarray(x) for x, _, _ in runs]), np.array([P for _, P, _ in runs]),
+            np.array([P_trajectory for _, _, P_trajectory in runs]))
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+def test_batch_matches_scalar(speed, start_height, flight_time):
+    _, noised = make_measurements(speed, start_height, flight_time, n_sensors=4)
+    x_ref, P_ref, P_trajectory_ref = scalar_reference(noised, speed)
+
+    x, P, P_trajectory = kalman_filter_batch(noised, speed, return_P_trajectory=True)
+
+    np.testing.assert_array_equal(x, x_ref)
+    np.testing.assert_array_equal(P, P_ref)
+    np.testing.assert_array_equal(P_trajectory, P_trajectory_ref)
+
+
+def test_batch_per_track_parameters():
+    _, noised = make_measurements(5, 100, 30, n_sensors=3)
+    speeds = np.array([2.0, 5.0, 12.0])
+    Q1 = np.array([1.0, 4.572, 10.0])
+    Q2 = np.array([10.0, 38.1, 50.0])
+
+    x, P = kalman_filter_batch(noised, speeds, Q1, Q2, R=0.25)
+
+    for track in range(3):
+        x_ref, P_ref = KalmanFilter(speeds[track], list(noised[track]), Q1[track], Q2[track], backend="python",
+                                    R=0.25).run()
+        np.testing.assert_array_equal(x[track], x_ref)
+        assert P[track] == P_ref
+
+
+def test_batch_single_track_input():
+    _, noised = make_measurements(n_sensors=1)
+    x, P = kalman_filter_batch(noised[0], 2)
+    assert x.shape == (1, noised.shape[1])
+    np.testing.assert_array_equal(x[0], KalmanFilter(2, list(noised[0]), backend="python").run()[0])
+
+
+@pytest.mark.parametrize("n_tracks", [1, 2, 20])
+@pytest.mark.parametrize("robust", [False, True])
+def test_track_dispatch_matches_batch(n_tracks, robust):
+    _, noised = make_measurements(5, 100, 30, n_sensors=n_tracks, damage_rate=0.2)
+
+    x, P, P_trajectory = kalman_filter_tracks(noised, 5, robust=robust, backend="python")
+    x_ref, P_ref, P_trajectory_ref = kalman_filter_batch(noised, 5, return_P_trajectory=True, robust=robust)
+
+    np.testing.assert_array_equal(x, x_ref)
+    np.testing.assert_array_equal(P, P_ref)
+    np.testing.assert_array_equal(P_trajectory, P_trajectory_ref)
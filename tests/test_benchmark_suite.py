@@ -0,0 +1,38 @@
+import pytest
+import benchmarkSuite
+
+
+def timings(**median_sec):
+    return {case: {"median_sec": value} for case, value in median_sec.items()}
+
+
+def test_compare_results_threshold():
+    baseline = {"results": timings(slower=1.0, edge=1.0, same=1.0, faster=1.0, dropped=1.0)}
+    results = timings(slower=1.25, edge=1.2, same=0.9, faster=0.8, added=0.5)
+
+    report = {row["case"]: row for row in benchmarkSuite.compare_results(results, baseline, threshold=0.2)}
+
+    assert {case: row["status"] for case, row in report.items()} == {
+        "slower": "REGRESJA", "edge": "OK", "same": "OK", "faster": "POPRAWA", "added": "NOWY"}
+    assert report["slower"]["ratio"] == pytest.approx(1.25)
+    assert report["added"]["baseline_sec"] is None and report["added"]["ratio"] is None
+
+
+def test_exit_code_reports_regression(tmp_path, monkeypatch, capsys):
+    baseline = str(tmp_path / "baseline.json")
+    current = {}
+    monkeypatch.setattr(benchmarkSuite, "run_suite", lambda *args, **kwargs: current)
+
+    # Bez punktu odniesienia - informacja o --save-baseline, bez błędu
+    current.update(timings(filter_batch=1.0))
+    assert benchmarkSuite.main(["--baseline", baseline]) == 0
+    assert "--save-baseline" in capsys.readouterr().out
+
+    assert benchmarkSuite.main(["--baseline", baseline, "--save-baseline"]) == 0
+    assert benchmarkSuite.load_baseline(baseline)["results"] == current
+
+    current.update(timings(filter_batch=1.1))
+    assert benchmarkSuite.main(["--baseline", baseline]) == 0
+    current.update(timings(filter_batch=1.5))
+    assert benchmarkSuite.main(["--baseline", baseline]) == 1
+    assert benchmarkSuite.main(["--baseline", baseline, "--threshold", "0.6"]) == 0
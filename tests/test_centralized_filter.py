@@ -0,0 +1,64 @@
+import warnings
+import numpy as np
+import pytest
+from conftest import SCENARIOS, make_measurements
+from filters import CentralizedKalmanFilter, measurement_noise_for_speed
+
+
+def sequential_reference(Z, v, Q1=4.572, Q2=38.1, R_sensors=None):
+    """
+    Jedna predykcja na krok i kolejne aktualizacje skalarne pomiarami czujników
+    """
+    R = measurement_noise_for_speed(v)
+    R_sensors = np.full(Z.shape[0], R) if R_sensors is None else np.asarray(R_sensors, dtype=float)
+    available = ~np.isnan(Z).all(axis=0)
+    x = float(np.nanmean(Z[:, np.argmax(available)])) if available.any() else 0.0
+    P = 1.0
+    x_estimates, P_trajectory = [], []
+    for z in Z.T:
+        used = [(zi, Ri) for zi, Ri in zip(z, R_sensors) if zi == zi and zi <= 762]
+        passthrough = [zi for zi in z if zi > 762]
+        if not used and passthrough:
+            x_estimates.append(np.mean(passthrough))
+            P_trajectory.append(P)
+            continue
+        x, P = x + 0.05 * v, P + R
+        for zi, Ri in used:
+            K = P / (P + Ri + (Q1 if zi <= 152.4 else Q2))
+            x, P = x + K * (zi - x), (1 - K) * P
+        x_estimates.append(x)
+        P_trajectory.append(P)
+    return np.array(x_estimates), P, np.array(P_trajectory)
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+@pytest.mark.parametrize("damage_rate", [0.0, 0.3])
+def test_centralized_matches_sequential_updates(speed, start_height, flight_time, damage_rate):
+    _, noised = make_measurements(speed, start_height, flight_time, n_sensors=3, damage_rate=damage_rate)
+
+    x, P, P_trajectory = CentralizedKalmanFilter(speed, noised).run(return_P_trajectory=True)
+    x_ref, P_ref, P_trajectory_ref = sequential_reference(noised, speed)
+
+    np.testing.assert_allclose(x, x_ref, rtol=1e-10, atol=1e-8)
+    np.testing.assert_allclose(P_trajectory, P_trajectory_ref, rtol=1e-10)
+    assert P == pytest.approx(P_ref, rel=1e-10)
+
+
+def test_centralized_per_sensor_noise():
+    _, noised = make_measurements(5, 100, 20, n_sensors=2, seed=3)
+    R_sensors = [0.2, 1.5]
+    x, _ = CentralizedKalmanFilter(5, noised, R=R_sensors).run()
+    np.testing.assert_allclose(x, sequential_reference(noised, 5, R_sensors=R_sensors)[0], rtol=1e-10, atol=1e-8)
+
+
+def test_centralized_start_without_measurements():
+    Z = np.array([[np.nan, np.nan, 1.0, 2.0], [np.nan, np.nan, np.nan, 2.1]])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        x, _ = CentralizedKalmanFilter(2, Z).run()
+        all_missing, _ = CentralizedKalmanFilter(2, np.full((2, 5), np.nan)).run()
+
+    np.testing.assert_allclose(x, sequential_reference(Z, 2)[0], rtol=1e-12)
+    assert not np.isnan(x).any()
+    # Bez żadnego pomiaru - same predykcje od 0, jak kalman_filter_batch
+    np.testing.assert_allclose(all_missing, 0.1 * np.arange(1, 6))
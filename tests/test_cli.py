@@ -0,0 +1,55 @@
+import json
+import os
+import pytest
+import cli
+
+
+def test_cli_overrides_apply_to_listed_scenarios():
+    config = {"scenarios": [{"speed": 2}, {"speed": 5, "Q1": 1.0}]}
+
+    cli.apply_cli_grid(config, {"robust": [True], "damage_rate": [0.0, 0.2]})
+    scenarios = cli.load_scenarios(config)
+
+    assert "grid" not in config
+    assert [(s["speed"], s["damage_rate"]) for s in scenarios] == [(2, 0.0), (2, 0.2), (5, 0.0), (5, 0.2)]
+    assert all(s["robust"] for s in scenarios)
+    assert [s["Q1"] for s in scenarios][2:] == [1.0, 1.0]
+
+
+def test_cli_overrides_replace_grid_values():
+    config = {"grid": {"speed": [2, 5], "Q1": [1.0]}}
+    cli.apply_cli_grid(config, {"speed": [10]})
+    assert config["grid"] == {"speed": [10], "Q1": [1.0]}
+    assert len(cli.load_scenarios(config)) == 1
+
+
+def test_load_scenarios_requires_scenarios_or_grid():
+    with pytest.raises(ValueError):
+        cli.load_scenarios({"trials": 2})
+    assert len(cli.load_scenarios({"grid": {"speed": [2, 5]}, "trials": 3})) == 6
+
+
+def test_load_scenarios_rejects_unknown_parameters():
+    with pytest.raises(ValueError, match="sped"):
+        cli.load_scenarios({"scenarios": [{"speed": 2}, {"sped": 5}]})
+    with pytest.raises(ValueError, match="sped"):
+        cli.load_scenarios({"grid": {"sped": [5]}})
+
+
+def test_robust_flag_keeps_config_scenarios(tmp_path):
+    # Regresja: --robust zastępował listę scenariuszy z pliku domyślną siatką
+    config_path = tmp_path / "scenarios.json"
+    config_path.write_text(json.dumps({"scenarios": [{"speed": 2, "flight_time": 5},
+                                                     {"speed": 5, "flight_time": 5}]}))
+    output = tmp_path / "wyniki"
+    summary_path = tmp_path / "summary.json"
+
+    assert cli.main(["--config", str(config_path), "--robust", "--output", str(output), "--workers", "1",
+                     "--summary", str(summary_path)]) == 0
+
+    summary = json.loads(summary_path.read_text())
+    assert summary["simulations"] == 2
+    assert summary["samples"] == 2 * 2 * 100  # Scenariusze z pliku: 5 s lotu, 2 czujniki
+    assert sorted(os.listdir(output)) == ["Symulacja_1", "Symulacja_2"]
+    for folder in output.iterdir():
+        assert (folder / "symulacja.json").exists()
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from metrics import ErrorAccumulator, error_statistics
+
+
+def assert_same_statistics(actual, expected):
+    for key in ("count", "bias", "std", "rmse", "max_error", "nees", "nis"):
+        assert actual[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-12, nan_ok=True), key
+    for band, statistics in expected["bands"].items():
+        for key, value in statistics.items():
+            assert actual["bands"][band][key] == pytest.approx(value, rel=1e-9, abs=1e-12, nan_ok=True), (band, key)
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    real = np.linspace(0.0, 900.0, 3000)
+    estimated = real + rng.normal(0.5, 3.0, real.shape)
+    estimated[::13] = np.nan
+    variances = rng.uniform(1.0, 10.0, real.shape)
+    innovations = rng.normal(0.0, 2.0, real.shape)
+    innovation_variances = rng.uniform(2.0, 6.0, real.shape)
+    return real, estimated, variances, innovations, innovation_variances
+
+
+def test_merge_matches_single_pass(series):
+    real, estimated, variances, innovations, innovation_variances = series
+    expected = error_statistics(real, estimated, variances, innovations, innovation_variances)
+
+    # Paczki różnej długości, w tym puste i takie, które nie obejmują wszystkich pasm
+    bounds = [0, 1, 500, 500, 1700, 2999, 3000]
+    parts = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        part = ErrorAccumulator().update(real[start:stop], estimated[start:stop], variances[start:stop])
+        parts.append(part.update_innovations(innovations[start:stop], innovation_variances[start:stop]))
+
+    merged = ErrorAccumulator()
+    for part in parts[::-1]:
+        merged.merge(part)
+    assert_same_statistics(merged.result(), expected)
+
+    sequential = ErrorAccumulator()
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        sequential.update(real[start:stop], estimated[start:stop], variances[start:stop])
+    sequential.update_innovations(innovations, innovation_variances)
+    assert_same_statistics(sequential.result(), expected)
+
+
+def test_single_pass_against_numpy(series):
+    real, estimated, variances, _, _ = series
+    result = ErrorAccumulator().update(real, estimated, variances).result()
+    error = (estimated - real)[~np.isnan(estimated)]
+    assert result["count"] == len(error)
+    assert result["bias"] == pytest.approx(error.mean())
+    assert result["std"] == pytest.approx(error.std())
+    assert result["rmse"] == pytest.approx(np.sqrt(np.mean(error ** 2)))
+    assert result["max_error"] == pytest.approx(np.abs(error).max())
+    assert sum(band["count"] for band in result["bands"].values()) == len(error)
+
+
+def test_empty_accumulator():
+    result = ErrorAccumulator().merge(ErrorAccumulator()).result()
+    assert result["count"] == 0 and np.isnan(result["rmse"]) and np.isnan(result["nis"])
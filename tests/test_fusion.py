@@ -0,0 +1,57 @@
+import warnings
+import numpy as np
+from fusion import fuse_estimates
+
+
+def reference_fusion(estimates, variances):
+    """
+    Łączenie próbka po próbce: średnia ważona odwrotnością wariancji czujników z estymatą
+    """
+    fused, fused_variance = [], []
+    for x, P in zip(np.transpose(estimates), np.transpose(variances)):
+        used = ~np.isnan(x) & ~np.isnan(P)
+        weights = 1.0 / P[used]
+        fused.append(np.sum(weights * x[used]) / np.sum(weights) if used.any() else np.nan)
+        fused_variance.append(1.0 / np.sum(weights) if used.any() else np.inf)
+    return np.array(fused), np.array(fused_variance)
+
+
+def test_fusion_matches_per_sample_weighting():
+    rng = np.random.default_rng(0)
+    estimates = rng.normal(100.0, 5.0, (4, 50))
+    variances = rng.uniform(0.5, 3.0, (4, 50))
+    estimates[1, ::7] = np.nan
+    variances[2, ::11] = np.nan
+
+    fused, fused_variance = fuse_estimates(estimates, variances)
+    expected, expected_variance = reference_fusion(estimates, variances)
+    np.testing.assert_allclose(fused, expected, rtol=1e-12)
+    np.testing.assert_allclose(fused_variance, expected_variance, rtol=1e-12)
+
+    # Oś czujników w środku (realizacje x czujniki x próbki) i wariancje końcowe (czujniki, 1)
+    stacked, stacked_variance = fuse_estimates(np.stack([estimates, estimates]), np.stack([variances, variances]),
+                                               axis=1)
+    np.testing.assert_allclose(stacked, np.stack([expected, expected]), rtol=1e-12)
+    np.testing.assert_allclose(stacked_variance[0], expected_variance, rtol=1e-12)
+    final_variances = variances[:, -1:]
+    np.testing.assert_allclose(fuse_estimates(estimates, final_variances)[0],
+                               reference_fusion(estimates, np.broadcast_to(final_variances, estimates.shape))[0],
+                               rtol=1e-12)
+
+
+def test_single_sensor_passes_through():
+    estimates = np.array([[1.0, np.nan, 3.0]])
+    variances = np.array([[0.5, 0.5, 2.0]])
+    fused, fused_variance = fuse_estimates(estimates, variances)
+    np.testing.assert_array_equal(fused, estimates[0])
+    np.testing.assert_array_equal(fused_variance, [0.5, np.inf, 2.0])
+
+
+def test_samples_without_any_estimate():
+    estimates = np.array([[np.nan, 2.0], [np.nan, 4.0]])
+    variances = np.ones_like(estimates)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        fused, fused_variance = fuse_estimates(estimates, variances)
+    assert np.isnan(fused[0]) and fused_variance[0] == np.inf
+    assert fused[1] == 3.0 and fused_variance[1] == 0.5
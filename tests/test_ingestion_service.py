@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from conftest import make_measurements
+from filters import KalmanFilter
+from ingestionService import IngestionService
+from trackBank import TrackBank
+
+OBJECTS = {b"A": (2, 0, 20), b"B": (12, 700, 20)}
+
+
+def sensor_streams(n_sensors=2):
+    """
+    {(obiekt, czujnik): (prędkość, pomiary)} - bajtowe nazwy jak po odczycie z gniazda
+    """
+    streams = {}
+    for seed, (name, (speed, start_height, flight_time)) in enumerate(OBJECTS.items()):
+        _, noised = make_measurements(speed, start_height, flight_time, n_sensors=n_sensors, damage_rate=0.1,
+                                      seed=seed)
+        for sensor, z in enumerate(noised):
+            streams[(name, b"%d" % sensor)] = (speed, z)
+    return streams
+
+
+def batches(streams, per_batch=3, chunk_size=5):
+    """
+    Pomiary wszystkich czujników przeplatane i dzielone na paczki, w których
+    każdy tor ma kilka kolejnych pomiarów, a paczka kilka fragmentów
+    """
+    n_samples = len(next(iter(streams.values()))[1])
+    for start in range(0, n_samples, per_batch):
+        measurements = [(key, float(v), float(z[k]), b"%d" % k)
+                        for k in range(start, min(start + per_batch, n_samples)) for key, (v, z) in streams.items()]
+        yield [measurements[i:i + chunk_size] for i in range(0, len(measurements), chunk_size)]
+
+
+def test_batches_match_track_bank_and_scalar_filter():
+    streams = sensor_streams()
+    service = IngestionService()
+    reference = TrackBank()
+    reference_ids = {key: reference.add_track(v) for key, (v, _) in streams.items()}
+
+    replies = []
+    for chunks in batches(streams):
+        replies.append(b"".join(service.process_batch(chunks)))
+        # Ten sam przebieg krok po kroku w osobnym TrackBank
+        steps = {}
+        for chunk in chunks:
+            for key, _, z, _ in chunk:
+                steps.setdefault(key, []).append(z)
+        for r in range(max(len(values) for values in steps.values())):
+            keys = [key for key, values in steps.items() if r < len(values)]
+            reference.step(np.array([reference_ids[key] for key in keys]), np.array([steps[key][r] for key in keys]))
+
+    for key, (v, z) in streams.items():
+        track = service.track_ids[key]
+        assert service.bank.x[track] == reference.x[reference_ids[key]]
+        assert service.bank.P[track] == reference.P[reference_ids[key]]
+        scalar = KalmanFilter(v, z.tolist(), backend="python")
+        _, P = scalar.run()
+        assert service.bank.x[track] == pytest.approx(scalar.x, rel=1e-12)
+        assert service.bank.P[track] == pytest.approx(P, rel=1e-12)
+
+    # Ostatnia odpowiedź każdego obiektu: połączona estymata jego czujników
+    n_samples = len(next(iter(streams.values()))[1])
+    last = {}
+    for line in replies[-1].splitlines():
+        name, x, P, stamp = line.split()
+        assert int(stamp) < n_samples
+        last[name] = (float(x), float(P))
+    for name in OBJECTS:
+        tracks = [service.track_ids[key] for key in streams if key[0] == name]
+        weights = 1.0 / service.bank.P[tracks]
+        assert last[name][0] == pytest.approx(np.sum(weights * service.bank.x[tracks]) / weights.sum(), abs=1e-3)
+        assert last[name][1] == pytest.approx(1.0 / weights.sum(), abs=1e-5)
+
+
+def test_reply_per_measurement_and_stats():
+    streams = sensor_streams()
+    service = IngestionService()
+    chunks = next(batches(streams, per_batch=2, chunk_size=3))
+    replies = service.process_batch(chunks)
+
+    assert len(replies) == len(chunks)
+    for chunk, reply in zip(chunks, replies):
+        lines = reply.splitlines()
+        assert [line.split()[0] for line in lines] == [key[0] for key, _, _, _ in chunk]
+        assert [line.split()[3] for line in lines] == [stamp for _, _, _, stamp in chunk]
+    stats = service.stats()
+    assert stats["tracks"] == len(streams) and stats["objects"] == len(OBJECTS)
+    assert stats["measurements"] == 2 * len(streams) and stats["batches"] == 1
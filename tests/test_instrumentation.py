@@ -0,0 +1,69 @@
+import tracemalloc
+import numpy as np
+import pytest
+import instrumentation
+from filters import KalmanFilter
+
+
+@pytest.fixture
+def instrumented():
+    was_tracing = tracemalloc.is_tracing()
+    instrumentation.reset()
+    yield instrumentation
+    instrumentation.disable()
+    instrumentation.reset()
+    if not was_tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def test_disabled_stages_record_nothing(instrumented):
+    instrumented.disable()
+    with instrumented.stage("filtr", samples=10):
+        pass
+    assert instrumented.report() == {}
+
+
+def test_report_counts_calls_and_samples(instrumented):
+    instrumented.enable()
+    for _ in range(3):
+        with instrumented.stage("filtr", samples=100):
+            pass
+    with instrumented.stage("zapis") as current:
+        current.add_samples(7)
+    KalmanFilter(2, [1.0, 2.0, 3.0], backend="python").run()
+
+    report = instrumented.report()
+    assert report["filtr"]["calls"] == 3 and report["filtr"]["samples"] == 300
+    assert report["zapis"]["samples"] == 7
+    assert report["filter.run[python]"]["samples"] == 3
+    assert all(stats["peak_memory_bytes"] is None for stats in report.values())
+    assert all(stats["wall_sec"] >= 0 for stats in report.values())
+    text = instrumented.format_report(report)
+    assert all(name in text for name in report)
+
+
+def test_memory_of_nested_stages(instrumented):
+    instrumented.enable(memory=True)
+    with instrumented.stage("zewnętrzny"):
+        with instrumented.stage("wewnętrzny"):
+            block = np.ones(2 ** 20)  # 8 MB
+        del block
+    report = instrumented.report()
+    assert report["wewnętrzny"]["peak_memory_bytes"] >= 8 * 2 ** 20
+    # Szczyt etapu zagnieżdżonego wlicza się do etapu nadrzędnego
+    assert report["zewnętrzny"]["peak_memory_bytes"] >= report["wewnętrzny"]["peak_memory_bytes"]
+
+
+def test_merge_reports():
+    first = {"filtr": {"calls": 2, "wall_sec": 1.0, "samples": 100, "samples_per_sec": 100.0,
+                       "peak_memory_bytes": None}}
+    second = {"filtr": {"calls": 1, "wall_sec": 3.0, "samples": 300, "samples_per_sec": 100.0,
+                        "peak_memory_bytes": 2048},
+              "zapis": {"calls": 1, "wall_sec": 0.5, "samples": 0, "samples_per_sec": None,
+                        "peak_memory_bytes": None}}
+
+    merged = instrumentation.merge_reports([first, second])
+    assert merged["filtr"] == {"calls": 3, "wall_sec": 4.0, "samples": 400, "samples_per_sec": 100.0,
+                               "peak_memory_bytes": 2048}
+    assert merged["zapis"]["samples_per_sec"] is None
+    assert instrumentation.merge_reports([]) == {}
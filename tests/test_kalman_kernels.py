@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from conftest import SCENARIOS, make_measurements
+import kalmanKernels
+from filters import KalmanFilter
+
+
+def kernel_arguments(speed, z):
+    f = KalmanFilter(speed, list(z))
+    return f.x, f.P, f.B * f.v, f.R, f.Q1, f.Q2
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+def test_python_kernel_matches_filter_loop(speed, start_height, flight_time):
+    _, noised = make_measurements(speed, start_height, flight_time, n_sensors=1, damage_rate=0.2)
+    z = noised[0]
+    x_estimates, P_trajectory = np.empty_like(z), np.empty_like(z)
+
+    x, P = kalmanKernels.scalar_kalman_kernel(z, *kernel_arguments(speed, z), x_estimates, P_trajectory)
+
+    reference, P_ref, P_trajectory_ref = KalmanFilter(speed, list(z), backend="python").run(
+        return_P_trajectory=True)
+    np.testing.assert_array_equal(x_estimates, reference)
+    np.testing.assert_array_equal(P_trajectory, P_trajectory_ref)
+    assert P == P_ref
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+def test_numba_backend_matches_python(speed, start_height, flight_time):
+    pytest.importorskip("numba")
+    _, noised = make_measurements(speed, start_height, flight_time, n_sensors=1, damage_rate=0.2)
+    z = list(noised[0])
+
+    reference, P_ref, P_trajectory_ref = KalmanFilter(speed, z, backend="python").run(return_P_trajectory=True)
+    estimates, P, P_trajectory = KalmanFilter(speed, z, backend="numba").run(return_P_trajectory=True)
+
+    np.testing.assert_array_equal(estimates, reference)
+    np.testing.assert_array_equal(P_trajectory, P_trajectory_ref)
+    assert P == P_ref
+
+
+def test_resolve_backend(monkeypatch):
+    assert kalmanKernels.resolve_backend("python") == "python"
+    with pytest.raises(ValueError):
+        kalmanKernels.resolve_backend("cuda")
+
+    monkeypatch.setattr(kalmanKernels, "NUMBA_AVAILABLE", False)
+    assert kalmanKernels.resolve_backend("auto") == "python"
+    with pytest.raises(ImportError):
+        kalmanKernels.resolve_backend("numba")
+    with pytest.raises(ImportError):
+        KalmanFilter(2, [1.0, 2.0], backend="numba").run()
+
+    monkeypatch.setattr(kalmanKernels, "NUMBA_AVAILABLE", True)
+    assert kalmanKernels.resolve_backend("auto") == "numba"
+    assert kalmanKernels.resolve_backend("numba") == "numba"
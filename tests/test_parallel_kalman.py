@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from conftest import SCENARIOS, make_measurements
+from filters import KalmanFilter
+from parallelKalman import covariance_trajectory, kalman_filter_parallel
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+@pytest.mark.parametrize("damage_rate", [0.0, 0.3])
+@pytest.mark.parametrize("n_chunks", [1, 3, 8])
+def test_parallel_scan_matches_sequential(speed, start_height, flight_time, damage_rate, n_chunks):
+    _, noised = make_measurements(speed, start_height, flight_time, n_sensors=1, damage_rate=damage_rate)
+    z = noised[0]
+
+    reference, P_ref, P_trajectory_ref = KalmanFilter(speed, list(z), backend="python").run(
+        return_P_trajectory=True)
+    estimates, P, P_trajectory = kalman_filter_parallel(z, speed, n_chunks=n_chunks, workers=2,
+                                                        return_P_trajectory=True)
+
+    np.testing.assert_allclose(estimates, reference, rtol=1e-10, atol=1e-8)
+    np.testing.assert_allclose(P_trajectory, P_trajectory_ref, rtol=1e-10)
+    assert P == pytest.approx(P_ref, rel=1e-10)
+
+
+def test_long_track_with_custom_noise():
+    _, noised = make_measurements(2, 0, 2_000, n_sensors=1, damage_rate=0.1, seed=4)
+    z = noised[0]
+    reference, _ = KalmanFilter(2, list(z), Q1=1.0, Q2=10.0, backend="python").run()
+    estimates, _ = kalman_filter_parallel(z, 2, Q1=1.0, Q2=10.0, workers=4)
+    np.testing.assert_allclose(estimates, reference, rtol=1e-10, atol=1e-8)
+
+
+def test_covariance_trajectory_matches_filter():
+    _, noised = make_measurements(12, 700, 20, n_sensors=1, damage_rate=0.2)
+    _, _, P_trajectory_ref = KalmanFilter(12, list(noised[0]), backend="python").run(return_P_trajectory=True)
+    np.testing.assert_allclose(covariance_trajectory(noised[0], 12), P_trajectory_ref, rtol=1e-10)
+
+
+def test_empty_track():
+    estimates, P = kalman_filter_parallel(np.empty(0), 2)
+    assert estimates.size == 0 and P == 1.0
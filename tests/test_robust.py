@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from conftest import SCENARIOS, make_measurements
+from filters import (ROBUST_GATE, ROBUST_HUBER_K, KalmanFilter, kalman_filter_batch, robust_innovation_weight)
+
+
+def test_innovation_weights():
+    S = 4.0  # Odchylenie innowacji 2
+    y = np.array([0.0, 2.0 * ROBUST_HUBER_K, 2.0 * 2.5, 2.0 * ROBUST_GATE, 2.0 * 3.5, np.nan])
+    w, nis = robust_innovation_weight(y, S)
+    np.testing.assert_allclose(w, [1.0, 1.0, ROBUST_HUBER_K / 2.5, ROBUST_HUBER_K / ROBUST_GATE, 0.0, 0.0])
+    assert np.isnan(nis[-1])
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+@pytest.mark.parametrize("damage_rate", [0.0, 0.3])
+def test_robust_scalar_matches_batch(speed, start_height, flight_time, damage_rate):
+    _, noised = make_measurements(speed, start_height, flight_time, n_sensors=3, damage_rate=damage_rate)
+
+    x, P, P_trajectory = kalman_filter_batch(noised, speed, return_P_trajectory=True, robust=True)
+
+    for track, z in enumerate(noised):
+        estimates, P_track, P_trajectory_track = KalmanFilter(speed, list(z), backend="python", robust=True).run(
+            return_P_trajectory=True)
+        np.testing.assert_array_equal(estimates, x[track])
+        np.testing.assert_array_equal(P_trajectory_track, P_trajectory[track])
+        assert P_track == P[track]
+
+
+def test_robust_numba_kernel_matches_python():
+    pytest.importorskip("numba")
+    _, noised = make_measurements(5, 100, 40, n_sensors=1, damage_rate=0.3)
+    z = list(noised[0])
+    reference, P_ref = KalmanFilter(5, z, backend="python", robust=True).run()
+    estimates, P = KalmanFilter(5, z, backend="numba", robust=True).run()
+    np.testing.assert_array_equal(estimates, reference)
+    assert P == P_ref
+
+
+def test_robust_state_carries_over_between_runs():
+    _, noised = make_measurements(2, 0, 60, n_sensors=1, damage_rate=0.3, seed=2)
+    z = list(noised[0])
+    whole, _ = KalmanFilter(2, z, robust=True).run()
+
+    f = KalmanFilter(2, z[:500], robust=True)
+    first, _ = f.run()
+    f.noised_signals_height = z[500:]
+    second, _ = f.run()
+
+    assert f.noise_scale != 1.0
+    np.testing.assert_array_equal(first + second, whole)
+
+
+def test_robust_mode_rejects_spikes():
+    signals_y, noised = make_measurements(2, 0, 120, n_sensors=4, damage_rate=0.3, seed=1)
+
+    plain, _ = kalman_filter_batch(noised, 2)
+    robust, _ = kalman_filter_batch(noised, 2, robust=True)
+
+    rmse = lambda estimates: np.sqrt(np.mean((estimates - signals_y) ** 2))
+    assert rmse(robust) < 0.25 * rmse(plain)
+    assert rmse(robust) < 3.0
+
+
+def test_robust_spike_above_762m_does_not_pass_through():
+    signals_y, noised = make_measurements(12, 700, 20, n_sensors=1)
+    spike = np.flatnonzero(signals_y > 800)[10]
+    noised[0, spike] += 400.0
+
+    estimates, _ = KalmanFilter(12, list(noised[0]), robust=True).run()
+
+    assert abs(estimates[spike] - signals_y[spike]) < 5.0
+    # Pozostałe próbki powyżej 762 m (bez szumu) przechodzą bez zmian
+    above = np.flatnonzero(signals_y > 800)
+    above = above[above != spike]
+    np.testing.assert_array_equal(np.asarray(estimates)[above[5:]], noised[0, above[5:]])
@@ -0,0 +1,131 @@
+import json
+import numpy as np
+import pytest
+import simulationBuilder as sim
+import sweepRunner
+from scenarioCache import ScenarioCache, generate_scenario, scenario_key
+
+SIGNALS = {"speed": 5, "start_height": 100, "time_step": 0.05, "flight_time": 20}
+
+
+def assert_same_scenario(first, second):
+    for name in ("signals_x", "signals_y", "noised_signals_y"):
+        np.testing.assert_array_equal(getattr(first, name), getattr(second, name))
+
+
+def test_scenario_key_is_content_addressed():
+    key = scenario_key(SIGNALS, 2, (0, 1), 0.1)
+    assert key == scenario_key(dict(reversed(list(SIGNALS.items()))), 2, (0, 1), 0.1)
+    assert key == scenario_key(dict(SIGNALS, speed=5.0), 2, (0, 1), 0.1)
+    assert key != scenario_key(SIGNALS, 2, (0, 2), 0.1)
+    assert key != scenario_key(SIGNALS, 3, (0, 1), 0.1)
+    assert key != scenario_key(SIGNALS, 2, (0, 1), 0.2)
+    assert scenario_key(SIGNALS, 2, None) is None
+
+
+@pytest.mark.parametrize("damage_rate", [0.0, 0.3])
+def test_cached_scenario_matches_generated(damage_rate):
+    cache = ScenarioCache()
+    first = cache.get(SIGNALS, 3, seed=7, damage_rate=damage_rate)
+    second = cache.get(SIGNALS, 3, seed=7, damage_rate=damage_rate)
+
+    assert second is first
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert_same_scenario(first, generate_scenario(SIGNALS, 3, seed=7, damage_rate=damage_rate))
+    with pytest.raises(ValueError):
+        first.noised_signals_y[0, 0] = 0.0  # Tablice współdzielone są tylko do odczytu
+
+
+def test_disk_tier_round_trip(tmp_path):
+    generated = ScenarioCache(folder=str(tmp_path)).get(SIGNALS, 2, seed=3, damage_rate=0.2)
+
+    cache = ScenarioCache(folder=str(tmp_path))
+    loaded = cache.get(SIGNALS, 2, seed=3, damage_rate=0.2)
+
+    assert cache.stats()["disk_hits"] == 1 and cache.stats()["misses"] == 0
+    assert_same_scenario(loaded, generated)
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ScenarioCache(max_entries=2)
+    for seed in range(3):
+        cache.get(SIGNALS, 2, seed=seed)
+    assert len(cache) == 2
+    cache.get(SIGNALS, 2, seed=0)
+    assert cache.stats()["misses"] == 4
+
+    one = generate_scenario(SIGNALS, 2, seed=0).nbytes
+    cache = ScenarioCache(max_bytes=int(1.5 * one))
+    cache.get(SIGNALS, 2, seed=0)
+    cache.get(SIGNALS, 2, seed=1)
+    assert len(cache) == 1 and cache.nbytes == one
+
+
+def test_unseeded_scenarios_are_not_cached():
+    cache = ScenarioCache()
+    cache.get(SIGNALS, 2)
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("robust", [False, True])
+def test_run_simulation_with_cache_matches_without(robust):
+    cache = ScenarioCache()
+    reference = sim.run_simulation(SIGNALS, sensor_damaged=True, damage_rate=0.2, seed=11, robust=robust)
+    for _ in range(2):
+        cached = sim.run_simulation(SIGNALS, sensor_damaged=True, damage_rate=0.2, seed=11, cache=cache,
+                                    robust=robust)
+        np.testing.assert_array_equal(cached.noised_signals_y, reference.noised_signals_y)
+        np.testing.assert_array_equal(cached.combined_estimated_y, reference.combined_estimated_y)
+    assert cache.stats()["hits"] == 1
+
+
+def test_sweep_is_deterministic_and_shares_scenarios(tmp_path):
+    grid = {"speed": [2, 5], "flight_time": [10], "Q1": [1.0, 4.572]}
+    first = sweepRunner.run_sweep(grid, n_trials=2, seed=3, workers=2)
+    second = sweepRunner.run_sweep(grid, n_trials=2, seed=3, workers=1, cache_folder=str(tmp_path))
+
+    assert first.equals(second)
+    # Punkty różniące się tylko Q1 działają na tych samych pomiarach (wspólne liczby losowe)
+    for speed in (2, 5):
+        rows = first[first["speed"] == speed]
+        assert rows["std_noisy_1_mean"].nunique() == 1
+
+
+def test_sweep_checkpoint_keys_depend_on_seeding_and_grid_order(tmp_path):
+    checkpoint = tmp_path / "przeglad.jsonl"
+    grid = {"speed": [2, 5], "flight_time": [10]}
+
+    first = sweepRunner.run_sweep(grid, n_trials=2, workers=1, checkpoint_path=str(checkpoint))
+    resumed = sweepRunner.run_sweep(grid, n_trials=2, workers=1, checkpoint_path=str(checkpoint))
+    assert first.equals(resumed)
+    entries = [json.loads(line) for line in checkpoint.read_text().splitlines()]
+    assert len(entries) == 2
+    assert all(json.loads(entry["key"])["seeding"] == sweepRunner.SWEEP_SEEDING_VERSION for entry in entries)
+
+    # Inna kolejność siatki zmienia ziarna scenariuszy - wiersze liczone są od nowa, nie wznawiane
+    reordered = sweepRunner.run_sweep({"speed": [5, 2], "flight_time": [10]}, n_trials=2, workers=1,
+                                      checkpoint_path=str(checkpoint))
+    assert len(checkpoint.read_text().splitlines()) == 4
+    fresh = sweepRunner.run_sweep({"speed": [5, 2], "flight_time": [10]}, n_trials=2, workers=1)
+    assert reordered.equals(fresh)
+
+    # Wiersze zapisane bez schematu ziaren (poprzedni format klucza) nie są używane
+    old_checkpoint = tmp_path / "stary.jsonl"
+    old_key = json.dumps(dict(sweepRunner.expand_grid(grid)[0], n_trials=2, seed=0), sort_keys=True)
+    old_checkpoint.write_text(json.dumps({"key": old_key, "summary": {"speed": -1}}) + "\n")
+    table = sweepRunner.run_sweep(grid, n_trials=2, workers=1, checkpoint_path=str(old_checkpoint))
+    assert (table["speed"] != -1).all()
+
+
+def test_sweep_splits_filter_parameters_across_workers(tmp_path):
+    # Jeden scenariusz, kilka wartości Q1 - każdy punkt osobnym zadaniem z własnym wierszem wznowienia
+    grid = {"speed": [5], "flight_time": [10], "Q1": [0.5, 1.0, 2.0, 4.572]}
+    checkpoint = tmp_path / "przeglad.jsonl"
+    parallel = sweepRunner.run_sweep(grid, n_trials=2, seed=1, workers=4, checkpoint_path=str(checkpoint),
+                                     cache_folder=str(tmp_path / "scenariusze"))
+    serial = sweepRunner.run_sweep(grid, n_trials=2, seed=1, workers=1)
+
+    assert parallel.equals(serial)
+    entries = [json.loads(line) for line in checkpoint.read_text().splitlines()]
+    assert sorted(entry["summary"]["Q1"] for entry in entries) == grid["Q1"]
+    assert len(list((tmp_path / "scenariusze").glob("*.npz"))) == 1
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from conftest import SCENARIOS, make_measurements
+from filters import KalmanFilter, StreamingKalmanFilter, kalman_filter_batch
+from sensorFaults import inject_sensor_faults
+
+
+def test_fault_injection_is_seeded_and_keeps_shape():
+    _, noised = make_measurements(n_sensors=3)
+    first = inject_sensor_faults(noised, 0.3, rng=7)
+    second = inject_sensor_faults(noised, 0.3, rng=7)
+
+    assert first.shape == noised.shape
+    np.testing.assert_array_equal(first, second)
+    assert np.isnan(first).any()
+    np.testing.assert_array_equal(inject_sensor_faults(noised, 0.0, rng=7), noised)
+    assert inject_sensor_faults(noised[0], 0.3, rng=7).shape == noised[0].shape
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+@pytest.mark.parametrize("damage_rate", [0.1, 0.5])
+def test_batch_matches_scalar_with_faults(speed, start_height, flight_time, damage_rate):
+    _, noised = make_measurements(speed, start_height, flight_time, n_sensors=4, damage_rate=damage_rate)
+    noised[0, :5] = np.nan  # Brak pomiarów na początku toru
+
+    x, P, P_trajectory = kalman_filter_batch(noised, speed, return_P_trajectory=True)
+
+    for track, z in enumerate(noised):
+        x_ref, P_ref, P_trajectory_ref = KalmanFilter(speed, list(z), backend="python").run(
+            return_P_trajectory=True)
+        np.testing.assert_array_equal(x[track], x_ref)
+        np.testing.assert_array_equal(P_trajectory[track], P_trajectory_ref)
+        assert P[track] == P_ref
+    assert not np.isnan(x).any()
+
+
+def test_streaming_filter_matches_scalar_with_faults():
+    _, noised = make_measurements(5, 100, 40, n_sensors=1, damage_rate=0.3, seed=5)
+    z = list(noised[0])
+    z[0] = 100.0  # Filtr strumieniowy startuje od pierwszego pomiaru jak filtr skalarny
+
+    stream = StreamingKalmanFilter(5)
+    estimates = list(stream.feed(z))
+    reference, P = KalmanFilter(5, z, backend="python").run()
+
+    np.testing.assert_array_equal(estimates, reference)
+    assert stream.checkpoint()["P"] == P
@@ -0,0 +1,40 @@
+import numpy as np
+import signalsGeneratingShowing as signals
+
+
+def true_signal(speed=12, start_height=100, flight_time=60):
+    return signals.generate_true_signal_array({"speed": speed, "start_height": start_height, "flight_time": flight_time})[1]
+
+
+def test_seed_reproducibility():
+    signals_y = true_signal()
+    first = signals.generate_noised_signals_array(signals_y, n_sensors=3, rng=7)
+    np.testing.assert_array_equal(first, signals.generate_noised_signals_array(signals_y, n_sensors=3, rng=7))
+    np.testing.assert_array_equal(
+        first, signals.generate_noised_signals_array(signals_y, n_sensors=3, rng=np.random.default_rng(7)))
+    assert not np.array_equal(first, signals.generate_noised_signals_array(signals_y, n_sensors=3, rng=8))
+    # Czujniki mają niezależny szum
+    assert not np.array_equal(first[0], first[1])
+
+
+def test_shared_generator_continues_stream():
+    signals_y = true_signal()
+    rng = np.random.default_rng(3)
+    first = signals.generate_noised_signals_array(signals_y, rng=rng)
+    second = signals.generate_noised_signals_array(signals_y, rng=rng)
+    assert first.shape == signals_y.shape
+    assert not np.array_equal(first, second)
+    np.testing.assert_array_equal(np.stack([first, second]),
+                                  signals.generate_noised_signals_array(signals_y, n_sensors=2, rng=3))
+
+
+def test_noise_amplitude_by_height():
+    signals_y = true_signal()
+    noised = signals.generate_noised_signals_array(signals_y, n_sensors=20, rng=0)
+    relative = np.abs(noised - signals_y) / np.where(signals_y > 0, signals_y, 1.0)
+    tolerance = 1e-3  # zaokrąglenie do 3 miejsc
+    low, middle, high = signals_y <= 152.4, (signals_y > 152.4) & (signals_y <= 762), signals_y > 762
+    assert (relative[:, low] <= 0.03 + tolerance).all()
+    assert (relative[:, middle] <= 0.05 + tolerance).all()
+    assert (relative[:, middle] > 0.03).any()
+    np.testing.assert_array_equal(noised[:, high], np.broadcast_to(signals_y[high], noised[:, high].shape))
@@ -0,0 +1,103 @@
+import os
+import numpy as np
+import pytest
+from simulationArchive import (convert_json_to_archive, load_simulation_archive, open_simulation_mmap,
+                               save_simulation_data, save_simulation_folder)
+
+
+def simulation_data(n_samples=200, kalman_step=3):
+    signals_x = np.round(0.05 * np.arange(n_samples), 3)
+    signals_y = 2.0 * signals_x
+    estimates = signals_y[::kalman_step] + 0.5
+    return {
+        "signals_x": signals_x,
+        "signals_y": signals_y,
+        "noised_signals_y_1": signals_y + 0.1,
+        "noised_signals_y_2": signals_y - 0.1,
+        "estimated_signals_y_1": estimates,
+        "estimated_signals_y_2": estimates + 0.25,
+        "combined_estimated_y": estimates + 0.125,
+        "kalman_step": kalman_step
+    }
+
+
+@pytest.mark.parametrize("extension", ["json", "npz"])
+def test_save_and_load_round_trip(tmp_path, extension):
+    data = simulation_data()
+    path = tmp_path / f"symulacja.{extension}"
+    save_simulation_data(str(path), data, simulation_signal_dict={"speed": 2})
+
+    if extension == "json":
+        archive_path = convert_json_to_archive(str(path))
+    else:
+        archive_path = str(path)
+    with load_simulation_archive(archive_path) as archive:
+        assert archive.kalman_step == data["kalman_step"]
+        for name, values in data.items():
+            if name != "kalman_step":
+                np.testing.assert_array_equal(archive[name], values)
+
+
+@pytest.mark.parametrize("kalman_step", [1, 3, 4])
+@pytest.mark.parametrize("t_start, t_end", [(None, None), (1.0, 2.0), (1.02, 3.33), (0.0, 0.1), (9.0, None)])
+def test_window_slices_estimates_by_kalman_step(tmp_path, kalman_step, t_start, t_end):
+    data = simulation_data(kalman_step=kalman_step)
+    save_simulation_folder(os.fspath(tmp_path / "symulacja"), data)
+    simulation = open_simulation_mmap(os.fspath(tmp_path / "symulacja" / "header.json"))
+
+    window = simulation.window(t_start, t_end)
+
+    # Próbki w przedziale czasu i estymaty tych z nich, które były filtrowane (co kalman_step)
+    signals_x = data["signals_x"]
+    inside = (signals_x >= (-np.inf if t_start is None else t_start)) & \
+             (signals_x <= (np.inf if t_end is None else t_end))
+    filtered = inside[::kalman_step]
+    np.testing.assert_array_equal(window["signals_y"], data["signals_y"][inside])
+    for name in ("estimated_signals_y_1", "estimated_signals_y_2", "combined_estimated_y"):
+        np.testing.assert_array_equal(window[name], data[name][filtered])
+    # Estymata należy do tej samej chwili co próbka idealna w oknie
+    np.testing.assert_array_equal(window["combined_estimated_y"],
+                                  data["signals_y"][::kalman_step][filtered] + 0.625)
+
+
+def test_convert_reads_details_and_keeps_values(tmp_path):
+    data = simulation_data()
+    json_path = os.fspath(tmp_path / "symulacja.json")
+    save_simulation_data(json_path, data)
+    (tmp_path / "szczegóły_symulacji.txt").write_text(
+        "speed: 2\nstart_height: 0\ntime_step: 0.05\nflight_time: 10\nWyniki statystyczne:\n", encoding="utf-8")
+
+    with load_simulation_archive(convert_json_to_archive(json_path, dtype=np.float32)) as archive:
+        assert archive.simulation_signal_dict == {"speed": 2.0, "start_height": 0.0, "time_step": 0.05,
+                                                  "flight_time": 10.0}
+        assert archive.header["dtype"] == "float32"
+        assert archive["signals_y"].dtype == np.float32
+        np.testing.assert_allclose(archive["signals_y"], data["signals_y"], rtol=1e-6)
+
+    folder = convert_json_to_archive(json_path, os.fspath(tmp_path / "mmap"), layout="folder")
+    simulation = open_simulation_mmap(folder)
+    assert isinstance(simulation["combined_estimated_y"], np.memmap)
+    np.testing.assert_array_equal(simulation["combined_estimated_y"], data["combined_estimated_y"])
+    assert simulation.simulation_signal_dict["flight_time"] == 10.0
+
+    with pytest.raises(ValueError):
+        convert_json_to_archive(json_path, layout="hdf5")
+
+
+def test_columns_are_loaded_lazily(tmp_path):
+    path = os.fspath(tmp_path / "symulacja.npz")
+    save_simulation_data(path, simulation_data())
+    with load_simulation_archive(path) as archive:
+        assert archive._cache == {}
+        assert "signals_y" in archive and "kalman_step" in archive and "brak" not in archive
+        archive["signals_y"]
+        assert list(archive._cache) == ["signals_y"]
+        with pytest.raises(KeyError):
+            archive["brak"]
+
+
+def test_binary_archive_is_smaller_than_json(tmp_path):
+    data = simulation_data(n_samples=5000)
+    save_simulation_data(os.fspath(tmp_path / "symulacja.json"), data)
+    save_simulation_data(os.fspath(tmp_path / "symulacja.npz"), data)
+    assert os.path.getsize(tmp_path / "symulacja.npz") < os.path.getsize(tmp_path / "symulacja.json") / 2
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from conftest import SCENARIOS, make_measurements
+from filters import kalman_filter_batch
+from smoothers import FixedLagSmoother, history_from_estimates, rts_smoother, smooth_estimates
+
+
+def rts_reference(x_pred, P_pred, x_filtered, P_filtered):
+    """
+    Wygładzanie RTS pętlą wstecz po próbkach jednego toru
+    """
+    x_smoothed = x_filtered.copy()
+    P_smoothed = P_filtered.copy()
+    for k in range(len(x_filtered) - 2, -1, -1):
+        C = P_filtered[k] / P_pred[k + 1]
+        x_smoothed[k] = x_filtered[k] + C * (x_smoothed[k + 1] - x_pred[k + 1])
+        P_smoothed[k] = P_filtered[k] + C * C * (P_smoothed[k + 1] - P_pred[k + 1])
+    return x_smoothed, P_smoothed
+
+
+def scenario(speed, start_height, flight_time, damage_rate=0.0):
+    _, noised = make_measurements(speed, start_height, flight_time, n_sensors=3, damage_rate=damage_rate)
+    noised[:, 0] = np.nan_to_num(noised[:, 0], nan=start_height)
+    return noised
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+@pytest.mark.parametrize("damage_rate", [0.0, 0.2])
+def test_rts_smoother_matches_backward_loop(speed, start_height, flight_time, damage_rate):
+    noised = scenario(speed, start_height, flight_time, damage_rate)
+    _, _, history = kalman_filter_batch(noised, speed, return_history=True)
+
+    x_smoothed, P_smoothed = rts_smoother(**history)
+
+    for track in range(noised.shape[0]):
+        x_ref, P_ref = rts_reference(*(history[name][track] for name in
+                                       ("x_pred", "P_pred", "x_filtered", "P_filtered")))
+        np.testing.assert_allclose(x_smoothed[track], x_ref, rtol=1e-10, atol=1e-8)
+        np.testing.assert_allclose(P_smoothed[track], P_ref, rtol=1e-10, atol=1e-12)
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+def test_history_from_estimates_matches_filter_history(speed, start_height, flight_time):
+    noised = scenario(speed, start_height, flight_time, damage_rate=0.2)
+    estimates, _, history = kalman_filter_batch(noised, speed, return_history=True)
+
+    rebuilt = history_from_estimates(noised, estimates, speed)
+
+    for name, values in history.items():
+        np.testing.assert_allclose(rebuilt[name], values, rtol=1e-10, atol=1e-8, err_msg=name)
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+def test_fixed_lag_smoother_converges_to_rts(speed, start_height, flight_time):
+    noised = scenario(speed, start_height, flight_time, damage_rate=0.1)
+    z = noised[0]
+    estimates, _ = kalman_filter_batch(z, speed)
+    smoothed, _ = smooth_estimates(z, estimates[0], speed)
+
+    # Opóźnienie równe długości lotu - pełne przejście wstecz jak RTS
+    full_lag = FixedLagSmoother(speed, lag=len(z))
+    values = list(full_lag.feed(z)) + full_lag.flush()
+    np.testing.assert_allclose(values, smoothed, rtol=1e-10, atol=1e-8)
+
+    # Krótkie opóźnienie - wartości wydawane z opóźnieniem lag próbek, blisko pełnego wygładzania
+    lag = 40
+    smoother = FixedLagSmoother(speed, lag=lag)
+    streamed = list(smoother.feed(z))
+    assert len(streamed) == len(z) - lag
+    values = streamed + smoother.flush()
+    assert len(values) == len(z)
+    np.testing.assert_allclose(values[-lag:], smoothed[-lag:], rtol=1e-10, atol=1e-8)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from conftest import make_measurements
+from filters import KalmanFilter
+from stateSpace import LinearKalmanFilter, batch_linear_kalman, constant_velocity_model, scalar_model
+
+
+# Scenariusze w jednym reżimie szumu (scalar_model ma stały szum procesu i nie przerywa filtracji)
+@pytest.mark.parametrize("speed, start_height, flight_time, Q", [
+    pytest.param(2, 0, 60, 4.572, id="below-152m"),
+    pytest.param(5, 200, 60, 38.1, id="152m-762m"),
+])
+def test_scalar_model_matches_kalman_filter(speed, start_height, flight_time, Q):
+    _, noised = make_measurements(speed, start_height, flight_time, n_sensors=1, seed=2)
+    z = noised[0]
+    z[5::17] = np.nan  # Braki pomiaru bez impulsów, które mogłyby przekroczyć 762 m
+
+    expected, P_expected, P_trajectory_expected = KalmanFilter(speed, z.tolist(), Q1=Q, Q2=Q, backend="python").run(
+        return_P_trajectory=True)
+    x, P, P_trajectory = LinearKalmanFilter(**scalar_model(speed, Q)).run(z, controls=[speed],
+                                                                         return_P_trajectory=True)
+
+    np.testing.assert_allclose(x[:, 0], expected, rtol=1e-12, atol=1e-9)
+    np.testing.assert_allclose(P_trajectory[:, 0, 0], P_trajectory_expected, rtol=1e-12)
+    assert P[0, 0] == pytest.approx(P_expected, rel=1e-12)
+
+
+def test_batch_matches_single_track():
+    _, noised = make_measurements(2, 0, 30, n_sensors=4, damage_rate=0.1, seed=5)
+    noised[:, 0] = 0.0
+    model = constant_velocity_model(measurement_noise=4.0)
+    estimates, P = batch_linear_kalman(noised, model["F"], model["H"], model["Q"], model["R"], P0=model["P0"])
+    for track, final_P, z in zip(estimates, P, noised):
+        expected, expected_P = LinearKalmanFilter(**model).run(z)
+        np.testing.assert_allclose(track, expected, rtol=1e-10, atol=1e-9)
+        np.testing.assert_allclose(final_P, expected_P, rtol=1e-10)
+
+
+def test_constant_velocity_model_estimates_speed():
+    signals_y, noised = make_measurements(5, 0, 60, n_sensors=1, seed=1)
+    x, _ = LinearKalmanFilter(**constant_velocity_model(measurement_noise=4.0)).run(noised[0])
+    assert x[-200:, 1].mean() == pytest.approx(5.0, rel=0.05)
+    assert np.abs(x[-200:, 0] - signals_y[-200:]).mean() < np.abs(noised[0, -200:] - signals_y[-200:]).mean()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from conftest import SCENARIOS, make_measurements
+from filters import KalmanFilter
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+def test_steady_state_matches_exact_filter(speed, start_height, flight_time):
+    _, noised = make_measurements(speed, start_height, flight_time, n_sensors=1)
+    z = list(noised[0])
+
+    exact, P_exact = KalmanFilter(speed, z, backend="python").run()
+    fast = KalmanFilter(speed, z, steady_state=True)
+    estimates, P = fast.run()
+
+    np.testing.assert_allclose(estimates, exact, rtol=0, atol=1e-6)
+    assert P == pytest.approx(P_exact, rel=1e-6)
+
+
+def test_steady_state_with_missing_samples():
+    _, noised = make_measurements(2, 0, 60, n_sensors=1, damage_rate=0.2, seed=3)
+    z = list(noised[0])
+    exact, _ = KalmanFilter(2, z, backend="python").run()
+    estimates, _ = KalmanFilter(2, z, steady_state=True).run()
+    np.testing.assert_allclose(estimates, exact, rtol=0, atol=1e-6)
+
+
+def test_validate_reports_deviation_from_exact_filter():
+    _, noised = make_measurements(2, 0, 120, n_sensors=1)
+    z = list(noised[0])
+    exact, _ = KalmanFilter(2, z, backend="python").run()
+
+    fast = KalmanFilter(2, z)
+    estimates, _ = fast.run_steady_state(validate=True)
+
+    report = fast.steady_state_report
+    assert report["fixed_gain_samples"] > 0
+    assert report["max_deviation"] == pytest.approx(np.max(np.abs(np.asarray(estimates) - exact)), abs=1e-12)
+    assert report["max_deviation"] < 1e-6
+
+
+def test_validate_uses_tuned_R_and_current_state():
+    # Filtr strojony (R spoza progów prędkości) i wznowiony z innego stanu niż domyślny
+    _, noised = make_measurements(2, 0, 120, n_sensors=1, seed=1)
+    z = list(noised[0])
+    fast = KalmanFilter(2, z, R=0.37)
+    fast.x, fast.P = z[0] + 5.0, 3.0
+
+    exact = KalmanFilter(2, z, backend="python", R=0.37)
+    exact.x, exact.P = fast.x, fast.P
+    reference, _ = exact.run()
+
+    estimates, _ = fast.run_steady_state(validate=True)
+    deviation = np.max(np.abs(np.asarray(estimates) - reference))
+    assert fast.steady_state_report["max_deviation"] == pytest.approx(deviation, abs=1e-12)
+    assert deviation < 1e-6
@@ -0,0 +1,48 @@
+import json
+import numpy as np
+import pytest
+from conftest import SCENARIOS, make_measurements
+from filters import KalmanFilter, StreamingKalmanFilter
+
+
+def measurements(speed, start_height, flight_time):
+    _, noised = make_measurements(speed, start_height, flight_time, n_sensors=1, damage_rate=0.1, seed=4)
+    z = noised[0].copy()
+    z[0] = start_height  # Pierwsza próbka z pomiarem - start jak w KalmanFilter
+    return z
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+def test_streaming_matches_scalar_filter(speed, start_height, flight_time):
+    z = measurements(speed, start_height, flight_time)
+    expected = KalmanFilter(speed, z.tolist(), backend="python").run()[0]
+    streaming = StreamingKalmanFilter(speed)
+    np.testing.assert_array_equal(list(streaming.feed(z.tolist())), expected)
+
+
+@pytest.mark.parametrize("speed, start_height, flight_time", SCENARIOS)
+def test_checkpoint_restore_continues_exactly(speed, start_height, flight_time):
+    z = measurements(speed, start_height, flight_time).tolist()
+    reference = KalmanFilter(speed, z, backend="python")
+    expected, P = reference.run()
+
+    for split in (1, len(z) // 3, len(z) - 1):
+        first = StreamingKalmanFilter(speed)
+        head = list(first.feed(z[:split]))
+        # Stan przechodzi przez JSON, jak przy zapisie na dysk między uruchomieniami
+        saved = json.loads(json.dumps(first.checkpoint()))
+
+        second = StreamingKalmanFilter(speed)
+        second.restore(saved)
+        tail = list(second.feed(z[split:]))
+        np.testing.assert_array_equal(head + tail, expected)
+        assert second.checkpoint() == {"x": reference.x, "P": P}
+
+
+def test_checkpoint_before_first_measurement():
+    streaming = StreamingKalmanFilter(2)
+    assert np.isnan(streaming.step(float("nan")))
+    restored = StreamingKalmanFilter(2)
+    restored.restore(streaming.checkpoint())
+    assert restored.state.x is None
+    assert restored.step(10.0) == streaming.step(10.0)
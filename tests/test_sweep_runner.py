@@ -0,0 +1,43 @@
+import json
+import pytest
+import sweepRunner
+
+GRID = {"speed": [2, 5], "flight_time": [10], "Q1": [1.0, 4.572]}
+
+
+def read_checkpoint(path):
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def test_resume_reuses_finished_points(tmp_path):
+    checkpoint = tmp_path / "przeglad.jsonl"
+    full = sweepRunner.run_sweep(GRID, n_trials=2, seed=5, workers=1, checkpoint_path=str(checkpoint))
+    entries = read_checkpoint(checkpoint)
+    assert len(entries) == len(full)
+    for entry in entries:
+        key = json.loads(entry["key"])
+        assert {name: key[name] for name in sweepRunner.default_sweep_point} == {
+            name: entry["summary"][name] for name in sweepRunner.default_sweep_point}
+        assert (key["n_trials"], key["seed"], key["seeding"]) == (2, 5, sweepRunner.SWEEP_SEEDING_VERSION)
+        assert len(key["scenario"]) == 64
+
+    # Przerwany przegląd: zostały dwa wiersze, jeden oznaczony, by sprawdzić, że nie jest liczony ponownie
+    kept = entries[:2]
+    kept[0]["summary"]["marker"] = "z pliku"
+    checkpoint.write_text("".join(json.dumps(entry) + "\n" for entry in kept))
+
+    resumed = sweepRunner.run_sweep(GRID, n_trials=2, seed=5, workers=1, checkpoint_path=str(checkpoint))
+    assert len(read_checkpoint(checkpoint)) == len(full)
+    assert resumed["marker"].notna().sum() == 1
+    assert resumed.drop(columns="marker").equals(full)
+
+
+@pytest.mark.parametrize("change", [{"n_trials": 3}, {"seed": 6}])
+def test_resume_ignores_rows_of_other_settings(tmp_path, change):
+    checkpoint = tmp_path / "przeglad.jsonl"
+    settings = dict(n_trials=2, seed=5, workers=1)
+    sweepRunner.run_sweep(GRID, checkpoint_path=str(checkpoint), **settings)
+    rerun = sweepRunner.run_sweep(GRID, checkpoint_path=str(checkpoint), **dict(settings, **change))
+
+    assert len(read_checkpoint(checkpoint)) == 2 * len(rerun)
+    assert rerun.equals(sweepRunner.run_sweep(GRID, **dict(settings, **change)))
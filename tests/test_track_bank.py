@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from conftest import make_measurements
+from filters import KalmanFilter
+from trackBank import TrackBank
+
+
+def scenario(damage_rate=0.0):
+    # Tory z różnymi prędkościami; pierwsze próbki pierwszego toru każdej prędkości są brakami
+    tracks = []
+    for speed, start_height, seed in ((2, 0, 0), (5, 100, 1), (12, 700, 2)):
+        _, noised = make_measurements(speed, start_height, 20, n_sensors=2, damage_rate=damage_rate, seed=seed)
+        noised[0, :7] = np.nan
+        noised[1, 0] = np.nan_to_num(noised[1, 0], nan=start_height)
+        tracks += [(speed, z) for z in noised]
+    return tracks
+
+
+def assert_matches_scalar(estimates, reference, z):
+    # Przed pierwszym pomiarem bank nie ma estymaty; od niego - zgodność z filtrem skalarnym
+    first = int(np.argmax(~np.isnan(z)))
+    assert np.isnan(estimates[:first]).all()
+    if first == 0:
+        np.testing.assert_array_equal(estimates, reference)
+    else:
+        np.testing.assert_allclose(estimates[first:], reference[first:], rtol=1e-12, atol=1e-9)
+
+
+@pytest.mark.parametrize("damage_rate", [0.0, 0.2])
+def test_track_bank_matches_scalar(damage_rate):
+    tracks = scenario(damage_rate)
+    bank = TrackBank(capacity=2)  # Wzrost pojemności w trakcie dodawania torów
+    ids = [bank.add_track(speed) for speed, _ in tracks]
+    Z = np.array([z for _, z in tracks])
+
+    estimates = np.array([bank.step(ids, Z[:, k]) for k in range(Z.shape[1])]).T
+
+    for track, (speed, z) in enumerate(tracks):
+        reference, P = KalmanFilter(speed, list(z), backend="python").run()
+        assert_matches_scalar(estimates[track], np.asarray(reference), z)
+        assert bank.state([ids[track]])[1][0] == pytest.approx(P, rel=1e-12)
+
+
+def test_track_bank_partial_steps_and_slot_reuse():
+    tracks = scenario(damage_rate=0.2)
+    bank = TrackBank()
+    ids = [bank.add_track(speed) for speed, _ in tracks]
+    received = [[] for _ in tracks]
+    estimated = [[] for _ in tracks]
+
+    # W każdym takcie pomiar dostają tylko niektóre tory
+    rng = np.random.default_rng(0)
+    for k in range(len(tracks[0][1])):
+        selected = np.flatnonzero(rng.random(len(tracks)) < 0.5)
+        if not len(selected):
+            continue
+        estimates = bank.step([ids[i] for i in selected], [tracks[i][1][k] for i in selected])
+        for i, estimate in zip(selected, estimates):
+            received[i].append(tracks[i][1][k])
+            estimated[i].append(estimate)
+
+    # Każdy tor odpowiada filtrowi skalarnemu na ciągu pomiarów, które otrzymał
+    for (speed, _), z, estimates in zip(tracks, received, estimated):
+        reference, _ = KalmanFilter(speed, z, backend="python").run()
+        assert_matches_scalar(np.asarray(estimates), np.asarray(reference), np.asarray(z))
+
+    bank.remove_track(ids[1])
+    with pytest.raises(KeyError):
+        bank.remove_track(ids[1])
+    assert bank.add_track(3.0) == ids[1]
+    assert bank.skipped[ids[1]] == 0 and not bank.initialized[ids[1]]
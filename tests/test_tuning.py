@@ -0,0 +1,93 @@
+import os
+import numpy as np
+import pytest
+from conftest import make_measurements
+import tuning
+from filters import measurement_noise_for_speed
+
+
+def recorded_tracks(speeds=(2, 5), n_sensors=2, flight_time=30):
+    tracks, track_speeds, truths = [], [], []
+    for seed, speed in enumerate(speeds):
+        signals_y, noised = make_measurements(speed, 100, flight_time, n_sensors=n_sensors, damage_rate=0.05,
+                                              seed=seed)
+        tracks.extend(noised)
+        track_speeds.extend([speed] * n_sensors)
+        truths.extend([signals_y] * n_sensors)
+    return tracks, track_speeds, truths
+
+
+def reference_log_likelihood(z, v, Q1, Q2, R):
+    """
+    Log-wiarygodność innowacji liczona pętlą skalarną (jak KalmanFilter.prediction/update)
+    """
+    x, P, total = next(zk for zk in z if zk == zk), 1.0, 0.0
+    for zk in z:
+        if zk > 762:
+            continue
+        x_pred, P_pred = x + 0.05 * v, P + R
+        if zk != zk:
+            x, P = x_pred, P_pred
+            continue
+        S = P_pred + R + (Q1 if zk <= 152.4 else Q2)
+        total += np.log(2 * np.pi * S) + (zk - x_pred) ** 2 / S
+        K = P_pred / S
+        x, P = x_pred + K * (zk - x_pred), (1 - K) * P_pred
+    return -0.5 * total
+
+
+def test_innovation_log_likelihood_matches_scalar_loop():
+    tracks, speeds, _ = recorded_tracks()
+    R = measurement_noise_for_speed(np.array(speeds))
+    values = tuning.innovation_log_likelihood(np.array(tracks), np.array(speeds, dtype=float), 3.0, 20.0, R)
+    expected = [reference_log_likelihood(z, v, 3.0, 20.0, r) for z, v, r in zip(tracks, speeds, R)]
+    np.testing.assert_allclose(values, expected, rtol=1e-9)
+
+
+@pytest.mark.parametrize("objective", ["likelihood", "std"])
+def test_tuning_does_not_worsen_objective(objective):
+    tracks, speeds, truths = recorded_tracks()
+    result = tuning.tune_noise_parameters(tracks, speeds, truths, objective=objective, grid_size=3,
+                                          refinements=2, workers=1)
+
+    data = {"Z": tuning._stack_tracks(tracks), "v": np.array(speeds, dtype=float),
+            "truth": tuning._stack_tracks(truths), "objective": objective}
+    initial = [tuning.default_noise_parameters["Q1"], tuning.default_noise_parameters["Q2"],
+               float(np.mean(measurement_noise_for_speed(data["v"])))]
+    tuned_value, initial_value = tuning._evaluate_candidates([[result["Q1"], result["Q2"], result["R"]], initial],
+                                                             data)
+    assert tuned_value == pytest.approx(result["value"], rel=1e-9)
+    assert tuned_value <= initial_value
+
+
+def test_tuning_rejects_single_point_grid():
+    tracks, speeds, _ = recorded_tracks()
+    with pytest.raises(ValueError):
+        tuning.tune_noise_parameters(tracks, speeds, grid_size=1, workers=1)
+
+
+def test_cached_tuning_table_invalidation(tmp_path, monkeypatch):
+    tracks, speeds, _ = recorded_tracks()
+    path = str(tmp_path / "tabela.json")
+    calls = []
+    tune = tuning.tune_speed_buckets
+    monkeypatch.setattr(tuning, "tune_speed_buckets", lambda *args, **kwargs: calls.append(1) or tune(*args, **kwargs))
+    settings = {"grid_size": 2, "refinements": 1, "workers": 1}
+
+    first = tuning.cached_tuning_table(tracks, speeds, path=path, **settings)
+    assert tuning.cached_tuning_table(tracks, speeds, path=path, **settings) == first
+    assert len(calls) == 1
+
+    # Zmiana danych lub ustawień unieważnia zapisaną tabelę
+    changed = [np.array(track) for track in tracks]
+    changed[0][5] += 1.0
+    tuning.cached_tuning_table(changed, speeds, path=path, **settings)
+    tuning.cached_tuning_table(changed, speeds, path=path, **dict(settings, refinements=2))
+    assert len(calls) == 3
+    assert tuning.load_tuning_table(path)["fingerprint"] != first["fingerprint"]
+
+
+def test_default_tuning_path_does_not_depend_on_working_directory():
+    assert os.path.isabs(tuning.default_tuning_path)
+    assert os.path.dirname(os.path.dirname(tuning.default_tuning_path)) == os.path.dirname(
+        os.path.abspath(tuning.__file__))
@@ -0,0 +1,154 @@
+import numpy as np
+from filters import measurement_noise_for_speed
+
+
+class TrackBank:
+    """
+    Silnik filtracji wielu torów jednocześnie.
+    Stan wszystkich torów przechowywany jest w ciągłych tablicach NumPy
+    (struktura tablic), a identyfikatorem toru jest numer jego slotu.
+    Zwolnione sloty są ponownie wykorzystywane przez kolejne tory.
+    """
+
+    def __init__(self, capacity=1024, Q1=4.572, Q2=38.1):
+        """
+        Inicjalizacja banku torów
+        :param capacity: Początkowa liczba slotów (rośnie automatycznie)
+        :param Q1: Domyślny szum procesu dla wysokości <= 152.4m
+        :param Q2: Domyślny szum procesu dla wysokości > 152.4m
+        """
+        self.default_Q1 = Q1
+        self.default_Q2 = Q2
+        self.capacity = 0
+        self.x = np.empty(0)  # Estymaty wysokości
+        self.P = np.empty(0)  # Niepewności estymacji
+        self.Bv = np.empty(0)  # Wpływ prędkości na pozycję (B * v)
+        self.R = np.empty(0)  # Szum pomiarowy zależny od prędkości
+        self.Q1 = np.empty(0)  # Szum procesu dla niskich wysokości
+        self.Q2 = np.empty(0)  # Szum procesu dla wysokich wysokości
+        self.active = np.zeros(0, dtype=bool)  # Czy slot jest zajęty
+        self.initialized = np.zeros(0, dtype=bool)  # Czy tor otrzymał już pomiar
+        self.skipped = np.zeros(0, dtype=np.int64)  # Kroki bez pomiaru przed pierwszym pomiarem toru
+        self.free_slots = []  # Stos wolnych slotów
+        self._grow(capacity)
+
+    def _grow(self, new_capacity):
+        """
+        Powiększa tablice stanu do nowej pojemności
+        :param new_capacity: Nowa liczba slotów
+        """
+        extra = new_capacity - self.capacity
+        self.x = np.concatenate([self.x, np.zeros(extra)])
+        self.P = np.concatenate([self.P, np.ones(extra)])
+        self.Bv = np.concatenate([self.Bv, np.zeros(extra)])
+        self.R = np.concatenate([self.R, np.zeros(extra)])
+        self.Q1 = np.concatenate([self.Q1, np.zeros(extra)])
+        self.Q2 = np.concatenate([self.Q2, np.zeros(extra)])
+        self.active = np.concatenate([self.active, np.zeros(extra, dtype=bool)])
+        self.initialized = np.concatenate([self.initialized, np.zeros(extra, dtype=bool)])
+        self.skipped = np.concatenate([self.skipped, np.zeros(extra, dtype=np.int64)])
+        # Odwrócona kolejność, żeby najpierw przydzielać najniższe sloty
+        self.free_slots.extend(range(new_capacity - 1, self.capacity - 1, -1))
+        self.capacity = new_capacity
+
+    def __len__(self):
+        return self.capacity - len(self.free_slots)
+
+    @property
+    def nbytes(self):
+        """
+        Rozmiar tablic stanu w bajtach
+        """
+        return sum(a.nbytes for a in (self.x, self.P, self.Bv, self.R, self.Q1, self.Q2,
+                                      self.active, self.initialized, self.skipped))
+
+    def add_track(self, v: float, Q1=None, Q2=None):
+        """
+        Dodaje nowy tor
+        :param v: Stała prędkość toru (m/s)
+        :param Q1: Szum procesu dla wysokości <= 152.4m (domyślnie z banku)
+        :param Q2: Szum procesu dla wysokości > 152.4m (domyślnie z banku)
+        :return: Identyfikator toru (numer slotu)
+        """
+        if not self.free_slots:
+            self._grow(max(2 * self.capacity, 1))
+        track_id = self.free_slots.pop()
+
+        self.x[track_id] = 0.0
+        self.P[track_id] = 1.0  # Początkowa niepewność estymacji
+        self.Bv[track_id] = 0.05 * v
+        self.R[track_id] = measurement_noise_for_speed(v)
+        self.Q1[track_id] = self.default_Q1 if Q1 is None else Q1
+        self.Q2[track_id] = self.default_Q2 if Q2 is None else Q2
+        self.active[track_id] = True
+        self.initialized[track_id] = False
+        self.skipped[track_id] = 0
+        return track_id
+
+    def remove_track(self, track_id):
+        """
+        Usuwa tor i zwalnia jego slot do ponownego użycia
+        :param track_id: Identyfikator toru
+        """
+        if not self.active[track_id]:
+            raise KeyError(f"Tor {track_id} nie istnieje")
+        self.active[track_id] = False
+        self.free_slots.append(track_id)
+
+    def step(self, track_ids, measurements):
+        """
+        Jeden krok filtracji dla torów, które otrzymały pomiar w tym takcie.
+        Każdy tor może wystąpić w track_ids co najwyżej raz.
+        Start toru jak w KalmanFilter: stan początkowy to pierwszy dostępny pomiar, przesunięty
+        predykcjami przez wcześniejsze braki (NaN), więc kolejne estymaty są zgodne z filtrem
+        skalarnym (z dokładnością do zaokrągleń). Estymat dla braków przed pierwszym pomiarem
+        nie da się wyznaczyć na bieżąco - zwracany jest dla nich NaN (KalmanFilter zna cały ciąg).
+        :param track_ids: Identyfikatory torów
+        :param measurements: Pomiary dla kolejnych torów
+        :return: Tablica wyestymowanych wartości dla podanych torów
+        """
+        ids = np.asarray(track_ids, dtype=np.intp)
+        z = np.asarray(measurements, dtype=float)
+        if not self.active[ids].all():
+            raise KeyError("Pomiar dla nieistniejącego toru")
+
+        # Początkowa wysokość z pierwszego dostępnego pomiaru toru; braki przed nim
+        # (zliczane w skipped) odpowiadają predykcjom filtru skalarnego od tego pomiaru
+        missing = np.isnan(z)
+        waiting = ~self.initialized[ids] & missing
+        self.skipped[ids[waiting]] += 1
+        new = ~self.initialized[ids] & ~missing
+        if new.any():
+            new_ids = ids[new]
+            self.x[new_ids] = z[new] + self.skipped[new_ids] * self.Bv[new_ids]
+            self.P[new_ids] = 1.0 + self.skipped[new_ids] * self.R[new_ids]
+            self.initialized[new_ids] = True
+
+        # Tory bez dostępnego pomiaru od początku nie mają jeszcze estymaty
+        started = self.initialized[ids]
+        x = self.x[ids]
+        P = self.P[ids]
+
+        # Faza predykcji
+        x_pred = x + self.Bv[ids]
+        P_pred = P + self.R[ids]
+
+        # Faza aktualizacji (maski zamiast warunków, brak pomiaru - wzmocnienie 0)
+        szum_procesu = np.where(z <= 152.4, self.Q1[ids], self.Q2[ids])
+        K = np.where(missing, 0.0, P_pred / (P_pred + self.R[ids] + szum_procesu))
+        passthrough = (z > 762) | ~started
+        x = np.where(passthrough, x, x_pred + K * (np.where(missing, x_pred, z) - x_pred))
+        P = np.where(passthrough, P, (1 - K) * P_pred)
+
+        self.x[ids] = x
+        self.P[ids] = P
+        return np.where(passthrough, z, x)
+
+    def state(self, track_ids):
+        """
+        Zwraca stan wybranych torów
+        :param track_ids: Identyfikatory torów
+        :return: (x, P) - tablice estymat i niepewności
+        """
+        ids = np.asarray(track_ids, dtype=np.intp)
+        return self.x[ids], self.P[ids]
@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from filters import (kalman_filter_batch, measurement_noise_for_speed, speed_bucket,
+                     SPEED_BUCKET_LIMITS, SPEED_BUCKET_R)
+from metrics import calculate_std_errors
+
+TUNING_FORMAT_VERSION = 1
+default_tuning_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataFolder", "tabela_strojenia.json")
+default_noise_parameters = {"Q1": 4.572, "Q2": 38.1}
+
+# Dane przekazywane raz do każdego procesu roboczego (patrz _init_worker)
+_worker_data = None
+
+
+def innovation_log_likelihood(noised_signals_height, v, Q1, Q2, R):
+    """
+    Logarytm wiarygodności innowacji filtru dla każdego toru.
+    Innowacja y = z - x_pred ma wariancję S = P_pred + R + Q (jak w KalmanFilter.update);
+    pomijane są próbki bez pomiaru i powyżej 762 m.
+
+    Parametry:
+    noised_signals_height (np.array): Pomiary (tory x próbki)
+    v, Q1, Q2, R: Prędkość i parametry szumu (liczby lub tablice o długości liczby torów)
+
+    Zwraca:
+    np.array: Log-wiarygodność każdego toru
+    """
+    Z = np.atleast_2d(np.asarray(noised_signals_height, dtype=float))
+    n_tracks = Z.shape[0]
+    _, _, history = kalman_filter_batch(Z, v, Q1, Q2, R=R, return_history=True)
+
+    R = np.broadcast_to(np.asarray(R, dtype=float), (n_tracks,))[:, None]
+    Q = np.where(Z <= 152.4, np.broadcast_to(np.asarray(Q1, dtype=float), (n_tracks,))[:, None],
+                 np.broadcast_to(np.asarray(Q2, dtype=float), (n_tracks,))[:, None])
+    S = history["P_pred"] + R + Q
+    y = Z - history["x_pred"]
+    used = ~np.isnan(Z) & (Z <= 762)
+    terms = np.where(used, np.log(2 * np.pi * S) + y * y / S, 0.0)
+    return -0.5 * terms.sum(axis=1)
+
+
+def filtered_std_error(noised_signals_height, signals_y, v, Q1, Q2, R):
+    """
+    Odchylenie standardowe błędu estymat względem sygnału idealnego dla każdego toru
+
+    Parametry:
+    noised_signals_height (np.array): Pomiary (tory x próbki)
+    signals_y (np.array): Sygnały idealne (tory x próbki)
+    v, Q1, Q2, R: Prędkość i parametry szumu (liczby lub tablice o długości liczby torów)
+
+    Zwraca:
+    np.array: Odchylenie standardowe błędu estymat każdego toru
+    """
+    Z = np.atleast_2d(np.asarray(noised_signals_height, dtype=float))
+    estimates, _ = kalman_filter_batch(Z, v, Q1, Q2, R=R)
+    truth = np.broadcast_to(np.asarray(signals_y, dtype=float), Z.shape)
+    return np.array([calculate_std_errors(y, z, x)[1] for y, z, x in zip(truth, Z, estimates)])
+
+
+def _init_worker(data):
+    global _worker_data
+    _worker_data = data
+
+
+def _evaluate_candidates(candidates, data=None):
+    """
+    Funkcja celu (do minimalizacji) dla grupy kandydatów (Q1, Q2, R).
+    Wszystkie kandydaty i tory liczone są jednym wywołaniem filtru wsadowego.
+    """
+    data = _worker_data if data is None else data
+    Z, v, truth, objective = data["Z"], data["v"], data["truth"], data["objective"]
+    n_tracks = Z.shape[0]
+    candidates = np.asarray(candidates, dtype=float)
+    Q1, Q2, R = (np.repeat(candidates[:, i], n_tracks) for i in range(3))
+    Z_all = np.tile(Z, (len(candidates), 1))
+    v_all = np.tile(v, len(candidates))
+
+    if objective == "likelihood":
+        values = -innovation_log_likelihood(Z_all, v_all, Q1, Q2, R)
+    else:
+        values = filtered_std_error(Z_all, np.tile(truth, (len(candidates), 1)), v_all, Q1, Q2, R)
+    return values.reshape(len(candidates), n_tracks).mean(axis=1)
+
+
+def _stack_tracks(tracks):
+    """
+    Układa tory różnej długości w tablicę (tory x próbki), dopełniając brakami pomiaru (NaN)
+    """
+    tracks = [np.asarray(track, dtype=float) for track in tracks]
+    stacked = np.full((len(tracks), max(len(track) for track in tracks)), np.nan)
+    for row, track in zip(stacked, tracks):
+        row[:len(track)] = track
+    return stacked
+
+
+def tune_noise_parameters(tracks, speeds, signals_y=None, objective="likelihood", initial=None,
+                          grid_size=5, refinements=4, span=10.0, workers=None, max_batch_tracks=256):
+    """
+    Dopasowanie Q1, Q2 i R do zbioru zarejestrowanych torów.
+    Przeszukiwanie siatki w skali logarytmicznej wokół najlepszego punktu, zawężanej
+    w kolejnych rundach. Kandydaci rozdzielani są między procesy, a każda grupa
+    kandydatów liczona jest jednym wywołaniem filtru wsadowego.
+
+    Parametry:
+    tracks (list): Pomiary torów (listy lub tablice, mogą mieć różne długości)
+    speeds (list): Prędkość każdego toru (m/s) lub jedna prędkość dla wszystkich
+    signals_y (list): Sygnały idealne torów (wymagane dla objective="std")
+    objective (str): "likelihood" - maksymalizacja wiarygodności innowacji,
+                     "std" - minimalizacja odchylenia błędu estymat (calculate_std_errors)
+    initial (dict): Punkt startowy {"Q1", "Q2", "R"} (domyślnie obecne stałe)
+    grid_size (int): Liczba wartości każdego parametru w siatce (co najmniej 2)
+    refinements (int): Liczba rund zawężania siatki
+    span (float): Początkowy zakres przeszukiwania (krotność wokół punktu startowego)
+    workers (int): Liczba procesów (domyślnie liczba rdzeni, 1 - bez puli procesów)
+    max_batch_tracks (int): Maksymalna liczba torów w jednym wywołaniu filtru
+
+    Zwraca:
+    dict: Najlepsze {"Q1", "Q2", "R", "objective", "value", "n_tracks"}
+    """
+    if grid_size < 2:
+        raise ValueError(f"Siatka strojenia wymaga co najmniej 2 wartości parametru (grid_size={grid_size})")
+    if objective not in ("likelihood", "std"):
+        raise ValueError(f"Nieznana funkcja celu: {objective}")
+    if objective == "std" and signals_y is None:
+        raise ValueError("Funkcja celu 'std' wymaga sygnałów idealnych")
+
+    Z = _stack_tracks(tracks)
+    v = np.broadcast_to(np.asarray(speeds, dtype=float), (Z.shape[0],)).copy()
+    truth = _stack_tracks(signals_y) if signals_y is not None else None
+    data = {"Z": Z, "v": v, "truth": truth, "objective": objective}
+
+    if initial is None:
+        initial = dict(default_noise_parameters, R=float(np.mean(measurement_noise_for_speed(v))))
+    center = np.log([initial["Q1"], initial["Q2"], initial["R"]])
+    half_width = np.log(span)
+    offsets = np.linspace(-1.0, 1.0, grid_size)
+    group_size = max(1, max_batch_tracks // Z.shape[0])
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(data,)) if workers != 1 else None
+    try:
+        best_value = np.inf
+        for _ in range(refinements):
+            axes = [c + half_width * offsets for c in center]
+            grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1)
+            candidates = np.exp(grid.reshape(-1, 3))
+            groups = [candidates[i:i + group_size] for i in range(0, len(candidates), group_size)]
+            if executor:
+                values = np.concatenate(list(executor.map(_evaluate_candidates, groups)))
+            else:
+                values = np.concatenate([_evaluate_candidates(group, data) for group in groups])
+
+            best = int(np.nanargmin(values))
+            if values[best] < best_value:
+                best_value = float(values[best])
+                center = np.log(candidates[best])
+            # Kolejna runda: siatka o szerokości dwóch oczek wokół najlepszego punktu
+            half_width *= 2.0 / (grid_size - 1)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    Q1, Q2, R = np.exp(center).tolist()
+    return {"Q1": Q1, "Q2": Q2, "R": R, "objective": objective, "value": best_value, "n_tracks": int(Z.shape[0])}
+
+
+def tune_speed_buckets(tracks, speeds, signals_y=None, objective="likelihood", **kwargs):
+    """
+    Tabela parametrów szumu dla przedziałów prędkości (jak progi R w KalmanFilter).
+    Tory grupowane są według przedziału prędkości i strojone osobno.
+
+    Parametry:
+    tracks, speeds, signals_y, objective: Jak w tune_noise_parameters
+    **kwargs: Pozostałe argumenty tune_noise_parameters
+
+    Zwraca:
+    dict: Tabela strojenia {"format_version", "buckets": [...]}; przedział bez torów ma wartość None
+    """
+    speeds = np.broadcast_to(np.asarray(speeds, dtype=float), (len(tracks),))
+    buckets = speed_bucket(speeds)
+    table = {"format_version": TUNING_FORMAT_VERSION, "objective": objective, "buckets": []}
+    for bucket, max_speed in enumerate(SPEED_BUCKET_LIMITS + (None,)):
+        selected = np.flatnonzero(buckets == bucket)
+        if len(selected) == 0:
+            table["buckets"].append(None)
+            continue
+        initial = dict(default_noise_parameters, R=SPEED_BUCKET_R[bucket])
+        result = tune_noise_parameters(
+            [tracks[i] for i in selected], speeds[selected],
+            None if signals_y is None else [signals_y[i] for i in selected],
+            objective=objective, initial=initial, **kwargs)
+        table["buckets"].append(dict(result, max_speed=max_speed))
+    return table
+
+
+def dataset_fingerprint(tracks, speeds, signals_y=None, **settings):
+    """
+    Skrót SHA-256 zbioru torów i ustawień strojenia (klucz pamięci podręcznej)
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    digest.update(np.asarray(speeds, dtype=float).tobytes())
+    for series in (tracks, () if signals_y is None else signals_y):
+        for track in series:
+            digest.update(np.ascontiguousarray(track, dtype=float).tobytes())
+            digest.update(b"|")
+    return digest.hexdigest()
+
+
+def save_tuning_table(table, path=default_tuning_path):
+    """
+    Zapisuje tabelę strojenia do pliku JSON
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(table, f, indent=4, ensure_ascii=False)
+
+
+def load_tuning_table(path=default_tuning_path):
+    """
+    Wczytuje tabelę strojenia z pliku JSON
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        table = json.load(f)
+    if table.get("format_version") != TUNING_FORMAT_VERSION:
+        raise ValueError(f"Nieobsługiwana wersja tabeli strojenia: {table.get('format_version')}")
+    return table
+
+
+def cached_tuning_table(tracks, speeds, signals_y=None, objective="likelihood", path=default_tuning_path,
+                        **kwargs):
+    """
+    Tabela strojenia z pamięci podręcznej na dysku; strojenie uruchamiane jest tylko wtedy,
+    gdy zapisana tabela powstała dla innych danych lub ustawień
+
+    Parametry:
+    tracks, speeds, signals_y, objective, **kwargs: Jak w tune_speed_buckets
+    path (str): Plik tabeli strojenia
+
+    Zwraca:
+    dict: Tabela strojenia
+    """
+    fingerprint = dataset_fingerprint(tracks, speeds, signals_y, objective=objective, **kwargs)
+    if os.path.exists(path):
+        table = load_tuning_table(path)
+        if table.get("fingerprint") == fingerprint:
+            return table
+
+    table = tune_speed_buckets(tracks, speeds, signals_y, objective=objective, **kwargs)
+    table["fingerprint"] = fingerprint
+    save_tuning_table(table, path)
+    return table
+
+
+def noise_parameters_for_speed(table, v):
+    """
+    Parametry szumu z tabeli strojenia dla danej prędkości
+    (przedział bez strojenia - obecne stałe Q1, Q2 i R z progów prędkości)
+
+    Parametry:
+    table (dict lub str): Tabela strojenia lub ścieżka pliku
+    v (float): Prędkość (m/s)
+
+    Zwraca:
+    dict: {"Q1", "Q2", "R"}
+    """
+    if isinstance(table, str):
+        table = load_tuning_table(table)
+    entry = table["buckets"][speed_bucket(v)]
+    if entry is None:
+        return dict(default_noise_parameters, R=measurement_noise_for_speed(v))
+    return {"Q1": entry["Q1"], "Q2": entry["Q2"], "R": entry["R"]}
+
+
+if __name__ == "__main__":
+    import signalsGeneratingShowing as signals
+
+    rng = np.random.default_rng(0)
+    tracks, speeds, truths = [], [], []
+    for speed in (1, 2, 5, 10, 15):
+        _, signals_y = signals.generate_true_signal_array({"speed": speed, "flight_time": 300})
+        for noised in signals.generate_noised_signals_array(signals_y, n_sensors=4, rng=rng):
+            tracks.append(noised)
+            speeds.append(speed)
+            truths.append(signals_y)
+    print(json.dumps(tune_speed_buckets(tracks, speeds, truths, objective="std"), indent=4))